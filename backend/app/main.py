@@ -4,7 +4,7 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-from app.routers import dashboard, transactions, community, squad, perks, grocery, fx, market, chat, streaks, profile, rewards, ai_insights
+from app.routers import dashboard, transactions, community, squad, perks, grocery, fx, market, chat, streaks, profile, rewards, ai_insights, search
 
 app = FastAPI(title="Stash API", version="2.0.0")
 
@@ -29,6 +29,7 @@ app.include_router(streaks.router, prefix="/api")
 app.include_router(profile.router, prefix="/api")
 app.include_router(rewards.router, prefix="/api")
 app.include_router(ai_insights.router, prefix="/api")
+app.include_router(search.router, prefix="/api")
 
 
 @app.get("/")
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Query
 from pydantic import BaseModel
+from app.services import llm_cache
 from app.services.ai_insights import get_feature_insights
 
 router = APIRouter()
@@ -27,3 +28,9 @@ def ai_insights(feature: str = Query("dashboard")):
     """
     result = get_feature_insights(feature)
     return result
+
+
+@router.get("/ai/cache")
+def ai_cache_stats():
+    """LLM response cache: entries, hits per tier, hit rate and latency saved."""
+    return llm_cache.stats()
@@ -13,6 +13,9 @@ class ChatResponse(BaseModel):
     response: str
     sources: list[str] = []
     intent: str = "general"
+    confidence: float = 0.0
+    intents: list[dict] = []
+    contextTimings: dict[str, float] = {}
 
 
 @router.post("/chat", response_model=ChatResponse)
@@ -27,4 +30,7 @@ def chat(msg: ChatMessage):
         response=result["response"],
         sources=result["sources"],
         intent=result.get("intent", "general"),
+        confidence=result.get("confidence", 0.0),
+        intents=result.get("intents", []),
+        contextTimings=result.get("contextTimings", {}),
     )
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from datetime import datetime, timedelta
 from app.services.data_loader import load_json
+from app.services import coin_ledger, streak_engine
 
 router = APIRouter()
 
@@ -23,7 +24,7 @@ def _get_greeting():
 def get_dashboard():
     user = load_json("user_profile.json")
     budget = load_json("budget.json")
-    streaks = load_json("streaks.json")
+    streaks = streak_engine.state()
 
     total_balance = budget["totalBalance"]
     locked_total = sum(f["amount"] for f in budget["lockedFunds"])
@@ -84,8 +85,7 @@ def get_dashboard():
     first_name = user["name"].split()[0] if user.get("name") else "there"
 
     # Coin balance
-    coins = load_json("coins.json")
-    coin_balance = coins.get("balance", 0)
+    coin_balance = coin_ledger.balance()
 
     return {
         "user": user,
@@ -1,9 +1,76 @@
-from fastapi import APIRouter
-from app.services.data_loader import load_json
+from fastapi import APIRouter, Query
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from app.services import fx_alerts, fx_analytics
 
 router = APIRouter()
 
 
+# ── Models ──
+class RatePoint(BaseModel):
+    rate: float
+    date: Optional[str] = None
+
+
+class AlertRequest(BaseModel):
+    type: str                 # threshold | move | percentile
+    direction: str = "above"  # above | below (| either, for move)
+    value: float              # rate, % move, or percentile
+    window: int = fx_analytics.DEFAULT_WINDOW
+    label: Optional[str] = ""
+
+
 @router.get("/fx")
 def get_fx():
-    return load_json("fx_rates.json")
+    return fx_analytics.snapshot()
+
+
+@router.get("/fx/analytics")
+def get_fx_analytics(window: int = Query(fx_analytics.DEFAULT_WINDOW, ge=2, le=3650)):
+    """Rolling means, volatility, percentile and momentum over the last `window` days."""
+    return fx_analytics.analytics(window)
+
+
+@router.post("/fx/rates")
+def add_fx_rate(point: RatePoint):
+    """Append a new rate point (defaults to today)."""
+    if point.rate <= 0:
+        return {"success": False, "message": "Rate must be positive"}
+    day = point.date or datetime.now().strftime("%Y-%m-%d")
+    try:
+        record = fx_analytics.add_rate(day, point.rate)
+    except ValueError:
+        return {"success": False, "message": "Date must be YYYY-MM-DD"}
+    return {"success": True, "point": record, "triggered": fx_alerts.evaluate()}
+
+
+@router.get("/fx/alerts")
+def list_fx_alerts(status: Optional[str] = None):
+    return {"alerts": fx_alerts.alerts(status)}
+
+
+@router.post("/fx/alerts")
+def create_fx_alert(req: AlertRequest):
+    """Register a one-shot alert; it fires on the first rate point that crosses it."""
+    if not 2 <= req.window <= 3650:
+        return {"success": False, "message": "Window must be between 2 and 3650"}
+    try:
+        alert = fx_alerts.create(req.type, req.direction, req.value, req.window, req.label or "")
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
+    return {"success": True, "alert": alert}
+
+
+@router.delete("/fx/alerts/{alert_id}")
+def delete_fx_alert(alert_id: str):
+    if not fx_alerts.delete(alert_id):
+        return {"success": False, "message": "Alert not found"}
+    return {"success": True}
+
+
+@router.get("/fx/alerts/notifications")
+def fx_alert_notifications(limit: int = Query(20, ge=1, le=200)):
+    """Recent alert notifications from the in-app notifier."""
+    recent = getattr(fx_alerts.notifier(), "recent", None)
+    return {"notifications": recent(limit) if recent else []}
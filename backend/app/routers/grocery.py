@@ -1,14 +1,57 @@
 from fastapi import APIRouter, Query
-from typing import Optional
-from app.services.data_loader import load_json
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from app.services import grocery_basket, grocery_index, grocery_stats, price_history
 
 router = APIRouter()
 
 
+# ── Models ──
+class BasketItem(BaseModel):
+    name: str
+    qty: int = 1
+
+
+class BasketRequest(BaseModel):
+    items: List[BasketItem]
+    max_stores: int = Field(2, ge=1, le=grocery_basket.MAX_STORES)
+    store_penalty: float = 1.5
+
+
 @router.get("/grocery")
-def get_grocery(item: Optional[str] = Query(None)):
-    data = load_json("grocery_prices.json")
-    items = data["items"]
+def get_grocery(
+    item: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=200),
+):
+    """All grocery items, or the best fuzzy matches for `item`."""
     if item:
-        items = [i for i in items if item.lower() in i["name"].lower()]
-    return items
+        return grocery_index.search(item, limit)
+    items = grocery_index.items()
+    return items[:limit] if limit else items
+
+
+@router.get("/grocery/stats")
+def get_grocery_stats():
+    """Per-item price spread and cheapest store, plus per-store basket index."""
+    return grocery_stats.table()
+
+
+@router.get("/grocery/{item_id}/prices")
+def get_item_prices(item_id: str):
+    """Receipt-observed price history and current estimate per store."""
+    history = price_history.item_history(item_id)
+    if history is None:
+        return {"error": "Item not found"}
+    return history
+
+
+@router.post("/grocery/basket")
+def plan_basket(req: BasketRequest):
+    """Cheapest way to buy a shopping list: one store, or split across up to max_stores."""
+    if not req.items:
+        return {"error": "Shopping list is empty"}
+    return grocery_basket.plan(
+        [i.model_dump() for i in req.items],
+        max_stores=req.max_stores,
+        store_penalty=req.store_penalty,
+    )
@@ -1,13 +1,43 @@
 from fastapi import APIRouter, Query
 from typing import Optional
-from app.services.data_loader import load_json
+from app.services import market_index
 
 router = APIRouter()
 
 
+def _csv(value: Optional[str]) -> Optional[list[str]]:
+    return [v.strip() for v in value.split(",") if v.strip()] if value else None
+
+
 @router.get("/market")
 def get_market(type: Optional[str] = Query(None)):
-    listings = load_json("market_listings.json")
-    if type:
-        listings = [l for l in listings if l["type"] == type]
-    return listings
+    return market_index.query(types=_csv(type), page_size=None)["items"]
+
+
+@router.get("/market/query")
+def query_market(
+    type: Optional[str] = Query(None, description="Comma-separated listing types"),
+    category: Optional[str] = Query(None, description="Comma-separated categories"),
+    minPrice: Optional[float] = Query(None, ge=0),
+    maxPrice: Optional[float] = Query(None, ge=0),
+    minRating: Optional[float] = Query(None, ge=0, le=5),
+    maxDistance: Optional[float] = Query(None, ge=0, description="Kilometres"),
+    sort: str = Query("featured"),
+    page: int = Query(1, ge=1),
+    pageSize: int = Query(market_index.DEFAULT_PAGE_SIZE, ge=1, le=market_index.MAX_PAGE_SIZE),
+):
+    """Faceted listing search: filters, sort, pagination and facet counts."""
+    try:
+        return market_index.query(
+            types=_csv(type),
+            categories=_csv(category),
+            min_price=minPrice,
+            max_price=maxPrice,
+            min_rating=minRating,
+            max_distance=maxDistance,
+            sort=sort,
+            page=page,
+            page_size=pageSize,
+        )
+    except ValueError as e:
+        return {"error": str(e)}
@@ -1,13 +1,11 @@
 from fastapi import APIRouter, Query
 from typing import Optional
-from app.services.data_loader import load_json
+from app.services import perk_index
 
 router = APIRouter()
 
 
 @router.get("/perks")
-def get_perks(category: Optional[str] = Query(None)):
-    perks = load_json("perks.json")
-    if category and category != "All":
-        perks = [p for p in perks if p["category"] == category]
-    return perks
+def get_perks(category: Optional[str] = Query(None), near_you: bool = Query(False, alias="nearYou")):
+    """Live (unexpired) perks, optionally for one category and/or only those near you."""
+    return perk_index.perks(category, near_you)
@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from app.services.data_loader import load_json
+from app.services import streak_engine
 
 router = APIRouter()
 
@@ -8,7 +9,7 @@ router = APIRouter()
 def get_profile():
     user = load_json("user_profile.json")
     budget = load_json("budget.json")
-    streaks = load_json("streaks.json")
+    streaks = streak_engine.state()
 
     total_balance = budget["totalBalance"]
     locked_total = sum(f["amount"] for f in budget["lockedFunds"])
@@ -1,8 +1,7 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from pydantic import BaseModel
-from datetime import datetime
-from app.services.data_loader import load_json, save_json
-import uuid
+from typing import Optional
+from app.services import coin_ledger, reward_shop
 
 router = APIRouter()
 
@@ -12,116 +11,106 @@ class PurchaseRequest(BaseModel):
     reward_id: str
 
 
-# ── Helpers ──
-def _get_coins():
-    return load_json("coins.json")
-
-
-def _save_coins(data):
-    save_json("coins.json", data)
-
-
-def _add_history(coins_data, entry_type: str, amount: int, source: str, label: str):
-    entry = {
-        "id": f"ch-{uuid.uuid4().hex[:6]}",
-        "type": entry_type,
-        "amount": amount if entry_type == "earned" else -abs(amount),
-        "source": source,
-        "label": label,
-        "date": datetime.now().strftime("%Y-%m-%d"),
-    }
-    coins_data["history"].insert(0, entry)
-    # Keep only last 50 entries
-    coins_data["history"] = coins_data["history"][:50]
-    return entry
-
-
 # ── Endpoints ──
 @router.get("/coins")
 def get_coins():
     """Get current coin balance and history."""
-    coins = _get_coins()
+    history, next_cursor = coin_ledger.history(limit=20)
     return {
-        "balance": coins["balance"],
-        "lifetime": coins["lifetime"],
-        "history": coins["history"][:20],
+        "balance": coin_ledger.balance(),
+        "lifetime": coin_ledger.lifetime(),
+        "history": history,
+        "historyCursor": next_cursor,
     }
 
 
 @router.get("/coins/balance")
 def get_coin_balance():
     """Quick endpoint for just the coin balance (used by TopBar)."""
-    coins = _get_coins()
-    return {"balance": coins["balance"]}
+    return {"balance": coin_ledger.balance()}
+
+
+@router.get("/coins/history")
+def get_coin_history(
+    source: Optional[str] = None,
+    since: Optional[str] = Query(None, description="YYYY-MM-DD, inclusive"),
+    until: Optional[str] = Query(None, description="YYYY-MM-DD, inclusive"),
+    limit: int = Query(coin_ledger.DEFAULT_PAGE_SIZE, ge=1, le=100),
+    cursor: Optional[int] = None,
+):
+    """Full coin history, newest first, filterable by source and date range."""
+    history, next_cursor = coin_ledger.history(source, since, until, limit, cursor)
+    return {"history": history, "nextCursor": next_cursor}
+
+
+@router.get("/coins/rollups")
+def get_coin_rollups(period: str = Query("day", pattern="^(day|month)$")):
+    """Coins earned and spent per day or month."""
+    return {"period": period, "rollups": coin_ledger.rollups(period)}
 
 
 @router.get("/rewards-shop")
 def get_rewards_shop():
     """Get all available rewards in the shop."""
-    rewards = load_json("rewards_shop.json")
-    coins = _get_coins()
     return {
-        "balance": coins["balance"],
-        "rewards": rewards,
+        "balance": coin_ledger.balance(),
+        "rewards": reward_shop.rewards(),
     }
 
 
 @router.post("/rewards-shop/purchase")
 def purchase_reward(req: PurchaseRequest):
-    """Purchase a reward with coins."""
-    rewards = load_json("rewards_shop.json")
-    coins = _get_coins()
-
-    # Find the reward
-    reward = None
-    for r in rewards:
-        if r["id"] == req.reward_id:
-            reward = r
-            break
-
-    if not reward:
-        return {"success": False, "message": "Reward not found"}
-
-    if reward.get("purchased"):
-        return {"success": False, "message": "Already purchased"}
-
-    if reward.get("stock") is not None and reward["stock"] <= 0:
-        return {"success": False, "message": "Out of stock"}
-
-    if coins["balance"] < reward["cost"]:
-        return {
-            "success": False,
-            "message": f"Not enough coins. Need {reward['cost']}, have {coins['balance']}",
-        }
-
-    # Deduct coins
-    coins["balance"] -= reward["cost"]
-    _add_history(coins, "spent", reward["cost"], "reward", f"Redeemed: {reward['name']}")
-    _save_coins(coins)
-
-    # Mark reward as purchased & reduce stock
-    reward["purchased"] = True
-    reward["purchasedAt"] = datetime.now().strftime("%Y-%m-%d %H:%M")
-    if reward.get("stock") is not None:
-        reward["stock"] -= 1
-    save_json("rewards_shop.json", rewards)
+    """Purchase a reward with coins (reserve + commit in one step)."""
+    try:
+        reward = reward_shop.purchase(req.reward_id)
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
 
     return {
         "success": True,
         "reward": reward,
-        "newBalance": coins["balance"],
+        "newBalance": coin_ledger.balance(),
         "message": f"🎉 Redeemed {reward['name']}!",
     }
 
 
+@router.post("/rewards-shop/reservations")
+def reserve_reward(req: PurchaseRequest):
+    """Hold one unit of a reward while the user confirms."""
+    try:
+        reservation = reward_shop.reserve(req.reward_id)
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
+    return {"success": True, "reservation": reservation}
+
+
+@router.post("/rewards-shop/reservations/{reservation_id}/commit")
+def commit_reservation(reservation_id: str):
+    """Pay for a held reward."""
+    try:
+        reward = reward_shop.commit(reservation_id)
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
+    return {
+        "success": True,
+        "reward": reward,
+        "newBalance": coin_ledger.balance(),
+        "message": f"🎉 Redeemed {reward['name']}!",
+    }
+
+
+@router.delete("/rewards-shop/reservations/{reservation_id}")
+def release_reservation(reservation_id: str):
+    """Give a held unit back before its reservation expires."""
+    if not reward_shop.release(reservation_id):
+        return {"success": False, "message": "Reservation not found or expired"}
+    return {"success": True}
+
+
 @router.post("/coins/earn")
 def earn_coins_manual(amount: int = 0, source: str = "bonus", label: str = "Bonus coins"):
     """Admin/system endpoint to award coins."""
     if amount <= 0:
         return {"success": False, "message": "Amount must be positive"}
-    coins = _get_coins()
-    coins["balance"] += amount
-    coins["lifetime"] += amount
-    _add_history(coins, "earned", amount, source, label)
-    _save_coins(coins)
-    return {"success": True, "newBalance": coins["balance"]}
+    coin_ledger.earn(amount, source, label)
+    return {"success": True, "newBalance": coin_ledger.balance()}
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Query
+from typing import Optional
+from app.services.search_index import search as run_search
+
+router = APIRouter()
+
+
+@router.get("/search")
+def search(
+    q: str = Query(..., min_length=1),
+    kind: Optional[str] = Query(None, description="post | listing"),
+    intent: Optional[str] = None,
+    type: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Full-text search over community posts and market listings (BM25-ranked).
+    Supports "quoted phrases", prefix* terms and price caps like "under €700".
+    """
+    return run_search(
+        q,
+        kind=kind,
+        intent=intent,
+        listing_type=type,
+        min_price=min_price,
+        max_price=max_price,
+        limit=limit,
+    )
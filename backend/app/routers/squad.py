@@ -1,9 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional
-from app.services.data_loader import load_json, save_json
-import uuid
-from datetime import datetime
+from app.services import activity_feed, squad_ledger
 
 router = APIRouter()
 
@@ -26,54 +25,51 @@ class SettleRequest(BaseModel):
 
 @router.get("/squad")
 def get_squad():
-    members = load_json("squad_members.json")
-    activity = load_json("squad_activity.json")
-    return {"members": members, "activity": activity}
+    activity, next_cursor = activity_feed.page()
+    return {"members": squad_ledger.members(), "activity": activity, "activityCursor": next_cursor}
+
+
+@router.get("/squad/activity")
+def get_squad_activity(
+    limit: int = Query(activity_feed.DEFAULT_PAGE_SIZE, ge=1, le=100),
+    cursor: Optional[int] = None,
+):
+    """Older squad activity, newest first. Pass `nextCursor` back to page on."""
+    activity, next_cursor = activity_feed.page(limit, cursor)
+    return {"activity": activity, "nextCursor": next_cursor}
 
 
 @router.post("/squad/split")
 def split_expense(req: SplitExpenseRequest):
     """Split an expense among squad members."""
-    members = load_json("squad_members.json")
-    activity = load_json("squad_activity.json")
-
-    # Calculate per-person share
-    num_people = len(req.member_ids) + 1  # +1 for "you"
+    names = squad_ledger.member_names()
+    if req.paid_by not in names:
+        return JSONResponse(status_code=404, content={"success": False, "message": f"Unknown payer: {req.paid_by}"})
+
+    # Unknown ids are skipped; the share is computed over who actually splits
+    member_ids = [m_id for m_id in dict.fromkeys(req.member_ids) if m_id != squad_ledger.YOU and m_id in names]
+    skipped = [m_id for m_id in req.member_ids if m_id not in names]
+    if not member_ids:
+        return JSONResponse(status_code=422, content={"success": False, "message": "No valid squad members to split with"})
+
+    event = squad_ledger.record_split(
+        req.description, req.total_amount, req.paid_by, member_ids + [squad_ledger.YOU]
+    )
+    num_people = len(event["shares"])
     per_person = round(req.total_amount / num_people, 2)
 
-    # Update member balances
-    updated_ids = []
-    for member in members:
-        if member["id"] in req.member_ids:
-            if req.paid_by == "you":
-                # You paid, so they owe you
-                if member["direction"] == "you-owe":
-                    member["amount"] = max(0, member["amount"] - per_person)
-                    if member["amount"] == 0:
-                        member["direction"] = "owes-you"
-                        member["amount"] = 0
-                else:
-                    member["amount"] += per_person
-                member["reason"] = f"{req.description} (split)"
-                member["daysSince"] = 0
-            updated_ids.append(member["id"])
-
     # Add activity entry
-    new_activity = {
-        "id": f"act-{uuid.uuid4().hex[:6]}",
-        "emoji": "✂️",
-        "text": f"New split: {req.description} — €{req.total_amount:.2f} total (€{per_person:.2f} each)",
-        "time": "Just now",
-    }
-    activity.insert(0, new_activity)
-
-    save_json("squad_members.json", members)
-    save_json("squad_activity.json", activity)
+    payer = "" if req.paid_by == squad_ledger.YOU else f", paid by {names[req.paid_by]}"
+    new_activity = activity_feed.record(
+        "✂️",
+        f"New split: {req.description} — €{req.total_amount:.2f} total{payer} (€{per_person:.2f} each)",
+    )
 
     return {
         "success": True,
         "perPerson": per_person,
         "totalPeople": num_people,
+        "skippedMemberIds": skipped,
         "activity": new_activity,
     }
 
@@ -81,52 +77,60 @@ def split_expense(req: SplitExpenseRequest):
 @router.post("/squad/nudge")
 def nudge_member(req: NudgeRequest):
     """Send a nudge to a squad member who owes you."""
-    members = load_json("squad_members.json")
-    activity = load_json("squad_activity.json")
-
-    for member in members:
-        if member["id"] == req.member_id:
-            new_activity = {
-                "id": f"act-{uuid.uuid4().hex[:6]}",
-                "emoji": "👆",
-                "text": f"You sent a nudge to {member['name']} for €{member['amount']:.2f}",
-                "time": "Just now",
-            }
-            activity.insert(0, new_activity)
-            save_json("squad_activity.json", activity)
-            return {"success": True, "message": f"Nudge sent to {member['name']}!"}
+    member = squad_ledger.get_member(req.member_id)
+    if member is None:
+        return {"success": False, "message": "Member not found"}
 
-    return {"success": False, "message": "Member not found"}
+    squad_ledger.record_nudge(member["id"])
+    activity_feed.record("👆", f"You sent a nudge to {member['name']} for €{member['amount']:.2f}")
+    return {"success": True, "message": f"Nudge sent to {member['name']}!"}
 
 
 @router.post("/squad/settle")
 def settle_debt(req: SettleRequest):
     """Settle a debt with a squad member. If amount is 0, settle the full balance."""
-    members = load_json("squad_members.json")
-    activity = load_json("squad_activity.json")
-
-    for member in members:
-        if member["id"] == req.member_id:
-            prev_amount = member["amount"]
-            prev_direction = member["direction"]
-            # If amount is 0, settle the entire balance
-            settle_amount = req.amount if req.amount > 0 else prev_amount
-            member["amount"] = max(0, member["amount"] - settle_amount)
-            if member["amount"] == 0:
-                member["direction"] = "settled"
-            member["daysSince"] = 0
-
-            emoji = "💸" if prev_direction == "you-owe" else "✅"
-            new_activity = {
-                "id": f"act-{uuid.uuid4().hex[:6]}",
-                "emoji": emoji,
-                "text": f"{'You paid' if prev_direction == 'you-owe' else member['name'] + ' paid you'} €{settle_amount:.2f}",
-                "time": "Just now",
-            }
-            activity.insert(0, new_activity)
-
-            save_json("squad_members.json", members)
-            save_json("squad_activity.json", activity)
-            return {"success": True, "remaining": member["amount"]}
-
-    return {"success": False, "message": "Member not found"}
+    member = squad_ledger.get_member(req.member_id)
+    if member is None:
+        return {"success": False, "message": "Member not found"}
+
+    prev_amount = member["amount"]
+    prev_direction = member["direction"]
+    # If amount is 0, settle the entire balance
+    settle_amount = req.amount if req.amount > 0 else prev_amount
+    paid = min(settle_amount, prev_amount)
+    if paid > 0:
+        if prev_direction == "you-owe":
+            squad_ledger.record_payment(squad_ledger.YOU, member["id"], paid)
+        else:
+            squad_ledger.record_payment(member["id"], squad_ledger.YOU, paid)
+
+    emoji = "💸" if prev_direction == "you-owe" else "✅"
+    activity_feed.record(
+        emoji,
+        f"{'You paid' if prev_direction == 'you-owe' else member['name'] + ' paid you'} €{settle_amount:.2f}",
+    )
+    return {"success": True, "remaining": squad_ledger.get_member(member["id"])["amount"]}
+
+
+@router.get("/squad/settlement-plan")
+def get_settlement_plan():
+    """Fewest transfers that settle every balance in the squad (not just yours)."""
+    names = squad_ledger.member_names()
+    transfers = [
+        {
+            "from": t["from"],
+            "fromName": names.get(t["from"], t["from"]),
+            "to": t["to"],
+            "toName": names.get(t["to"], t["to"]),
+            "amount": t["amount"] / 100,
+        }
+        for t in squad_ledger.settlement_plan()
+    ]
+    balances = {p: cents / 100 for p, cents in squad_ledger.net_balances().items()}
+    return {"transfers": transfers, "transferCount": len(transfers), "netBalances": balances}
+
+
+@router.get("/squad/ledger")
+def get_squad_ledger(member_id: Optional[str] = None):
+    """Audit trail: the ledger events behind the current balances."""
+    return {"events": squad_ledger.history(member_id)}
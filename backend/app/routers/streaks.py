@@ -1,8 +1,7 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
-from datetime import datetime
 from app.services.data_loader import load_json, save_json
-import uuid
+from app.services import coin_ledger, mission_engine, streak_engine
 
 router = APIRouter()
 
@@ -13,46 +12,33 @@ class MissionToggle(BaseModel):
 
 def _award_coins(amount: int, source: str, label: str):
     """Award coins to the user and record in history."""
-    coins = load_json("coins.json")
-    coins["balance"] += amount
-    coins["lifetime"] += amount
-    entry = {
-        "id": f"ch-{uuid.uuid4().hex[:6]}",
-        "type": "earned",
-        "amount": amount,
-        "source": source,
-        "label": label,
-        "date": datetime.now().strftime("%Y-%m-%d"),
-    }
-    coins["history"].insert(0, entry)
-    coins["history"] = coins["history"][:50]
-    save_json("coins.json", coins)
-    return coins["balance"]
+    coin_ledger.earn(amount, source, label)
+    return coin_ledger.balance()
 
 
 @router.get("/streaks")
 def get_streaks():
-    streaks = load_json("streaks.json")
-    # Add coin rewards for milestones
-    milestone_coins = {3: 50, 7: 100, 14: 150, 30: 250, 60: 400, 90: 600}
-    for m in streaks["milestones"]:
-        m["coins"] = milestone_coins.get(m["days"], 0)
-    return streaks
+    """Live streak state, derived from transactions and the daily budget."""
+    return streak_engine.state()
+
+
+@router.post("/streaks/backfill")
+def backfill_streaks():
+    """Recompute the streak from the full transaction history."""
+    return {"success": True, **streak_engine.backfill()}
 
 
 @router.get("/survival-missions")
 def get_survival_missions():
-    missions = load_json("survival_missions.json")
-    # Ensure each mission has a coin value (XP = coins)
-    for m in missions:
-        if "coins" not in m:
-            m["coins"] = m["xp"]
-    return missions
+    """Missions with today's status; rule-driven ones complete on their own."""
+    return mission_engine.missions()
 
 
 @router.post("/survival-missions/toggle")
 def toggle_mission(req: MissionToggle):
-    """Toggle a survival mission's completed status and award/deduct coins."""
+    """Toggle a manual survival mission's completed status and award/deduct coins."""
+    if mission_engine.is_automatic(req.mission_id):
+        return {"success": False, "message": "This mission completes automatically from your spending"}
     missions = load_json("survival_missions.json")
     for m in missions:
         if m["id"] == req.mission_id:
@@ -70,10 +56,8 @@ def toggle_mission(req: MissionToggle):
                 )
             elif not m["completed"] and was_completed:
                 # Deduct coins if un-completing
-                coins = load_json("coins.json")
-                coins["balance"] = max(0, coins["balance"] - coins_amount)
-                save_json("coins.json", coins)
-                new_balance = coins["balance"]
+                coin_ledger.reverse(coins_amount, "mission", f"Undone: {m['title']}")
+                new_balance = coin_ledger.balance()
 
             return {
                 "success": True,
@@ -87,7 +71,7 @@ def toggle_mission(req: MissionToggle):
 @router.get("/streaks/rewards")
 def get_rewards():
     """Get available reward coupons earned from streaks."""
-    streaks = load_json("streaks.json")
+    streaks = streak_engine.state()
     rewards = []
     for milestone in streaks["milestones"]:
         if milestone["achieved"]:
@@ -105,10 +89,11 @@ def get_rewards():
 @router.post("/streaks/rewards/{reward_id}/claim")
 def claim_reward(reward_id: str):
     """Claim a streak reward."""
+    achieved = {m["days"] for m in streak_engine.state()["milestones"] if m["achieved"]}
     streaks = load_json("streaks.json")
     for milestone in streaks["milestones"]:
         rid = f"rwd-{milestone['days']}"
-        if rid == reward_id and milestone["achieved"]:
+        if rid == reward_id and milestone["days"] in achieved:
             milestone["claimed"] = True
             save_json("streaks.json", streaks)
             return {"success": True, "reward": milestone["reward"]}
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, UploadFile, File
+from fastapi import APIRouter, UploadFile, File, Query
 from pydantic import BaseModel
 from typing import Optional, List, Dict
 from app.services.data_loader import load_json, save_json
+from app.services import currency, llm_client, mission_engine, perk_matcher, price_history, streak_engine
+import numpy as np
 import uuid
-import os
 import base64
 import json
 import re
@@ -12,10 +13,52 @@ from datetime import datetime
 
 router = APIRouter()
 
+VISION_TIMEOUT_SECONDS = 60
+
 
 @router.get("/transactions")
-def get_transactions():
-    return load_json("transactions.json")
+def get_transactions(in_currency: Optional[str] = Query(None, alias="in")):
+    """All transactions; with ?in=INR each also carries a "converted" amount at its date's rate."""
+    transactions = load_json("transactions.json")
+    if not in_currency:
+        return transactions
+    try:
+        return currency.convert_transactions(transactions, in_currency)
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+@router.get("/transactions/summary")
+def get_spending_summary(in_currency: Optional[str] = Query(None, alias="in")):
+    """Spending totals, daily average and per-category/per-day breakdowns, optionally in another currency."""
+    transactions = load_json("transactions.json")
+    if not transactions:
+        return {"currency": (in_currency or "EUR").upper(), "total": 0.0, "count": 0, "dailyAvgSpend": 0.0, "byCategory": {}, "byDay": []}
+    try:
+        if in_currency:
+            rows = currency.convert_transactions(transactions, in_currency)
+            amounts = np.array([t["converted"]["amount"] for t in rows])
+            code = in_currency.upper()
+        else:
+            amounts = np.array([t.get("amount", 0) for t in transactions], dtype=float)
+            code = transactions[0].get("currency", "EUR")
+    except ValueError as e:
+        return {"error": str(e)}
+
+    spend = np.abs(amounts)
+    categories, cat_idx = np.unique([t.get("category", "other") for t in transactions], return_inverse=True)
+    days, day_idx = np.unique([t["date"][:10] for t in transactions], return_inverse=True)
+    by_category = np.bincount(cat_idx, weights=spend, minlength=len(categories))
+    by_day = np.bincount(day_idx, weights=spend, minlength=len(days))
+    order = np.argsort(-by_category, kind="stable")
+    return {
+        "currency": code,
+        "total": round(float(spend.sum()), 2),
+        "count": len(transactions),
+        "dailyAvgSpend": round(float(spend.sum()) / len(days), 2),
+        "byCategory": {str(categories[i]): round(float(by_category[i]), 2) for i in order},
+        "byDay": [{"date": str(d), "amount": round(float(a), 2)} for d, a in zip(days, by_day)],
+    }
 
 
 class NewExpense(BaseModel):
@@ -53,11 +96,20 @@ def add_transaction(expense: NewExpense):
         "type": "roast" if expense.amount > 15 else "neutral",
         "perkMissed": None,
     }
+    perk_matcher.annotate([new_tx])
     transactions.insert(0, new_tx)
     save_json("transactions.json", transactions)
+    streak_engine.record(new_tx)
+    mission_engine.record(new_tx)
     return new_tx
 
 
+@router.post("/transactions/perks/backfill")
+def backfill_missed_perks(overwrite: bool = False):
+    """Fill `perkMissed` across the stored history (overwrite=true recomputes existing ones)."""
+    return perk_matcher.backfill(overwrite)
+
+
 @router.post("/expense/scan")
 async def scan_receipt(file: UploadFile = File(...)):
     """
@@ -101,33 +153,19 @@ async def scan_receipt(file: UploadFile = File(...)):
         },
     ]
 
+    vision_messages = [
+        {"role": "system", "content": vision_system_prompt},
+        {"role": "user", "content": vision_user_content},
+    ]
+
     # ── Method 1: Azure OpenAI Vision (primary — uses existing Azure config) ──
-    azure_key = os.environ.get("AZURE_OPENAI_API_KEY", "")
-    if azure_key:
+    if llm_client.available("azure"):
         try:
-            from openai import AzureOpenAI
-
-            endpoint = os.environ.get("AZURE_OPENAI_ENDPOINT", "https://cityupstart.cognitiveservices.azure.com/")
-            api_version = os.environ.get("AZURE_OPENAI_API_VERSION", "2024-12-01-preview")
-            model = os.environ.get("AI_MODEL", "gpt-4.1")
-
-            client = AzureOpenAI(
-                api_key=azure_key,
-                azure_endpoint=endpoint,
-                api_version=api_version,
+            model = llm_client.default_model("azure")
+            raw = await llm_client.acomplete(
+                vision_messages, provider="azure", max_tokens=1000, temperature=0.1, timeout=VISION_TIMEOUT_SECONDS
             )
-
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": vision_system_prompt},
-                    {"role": "user", "content": vision_user_content},
-                ],
-                max_tokens=1000,
-                temperature=0.1,
-            )
-
-            raw = response.choices[0].message.content.strip()
+            raw = raw.strip()
             raw = re.sub(r"^```(?:json)?\s*", "", raw)
             raw = re.sub(r"\s*```$", "", raw)
             parsed = json.loads(raw)
@@ -139,6 +177,7 @@ async def scan_receipt(file: UploadFile = File(...)):
             if "total" not in parsed:
                 parsed["total"] = sum(item.get("price", 0) for item in parsed["items"])
 
+            price_history.submit(parsed)
             return {
                 "success": True,
                 "parsed": parsed,
@@ -150,23 +189,12 @@ async def scan_receipt(file: UploadFile = File(...)):
             print(f"Azure Vision scan failed: {e}, trying next method...")
 
     # ── Method 2: OpenAI GPT-4o Vision (if direct API key set) ──
-    openai_key = os.environ.get("OPENAI_API_KEY", "")
-    if openai_key:
+    if llm_client.available("openai"):
         try:
-            from openai import OpenAI
-            client = OpenAI(api_key=openai_key)
-
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": vision_system_prompt},
-                    {"role": "user", "content": vision_user_content},
-                ],
-                max_tokens=1000,
-                temperature=0.1,
+            raw = await llm_client.acomplete(
+                vision_messages, provider="openai", max_tokens=1000, temperature=0.1, timeout=VISION_TIMEOUT_SECONDS
             )
-
-            raw = response.choices[0].message.content.strip()
+            raw = raw.strip()
             raw = re.sub(r"^```(?:json)?\s*", "", raw)
             raw = re.sub(r"\s*```$", "", raw)
             parsed = json.loads(raw)
@@ -178,6 +206,7 @@ async def scan_receipt(file: UploadFile = File(...)):
             if "total" not in parsed:
                 parsed["total"] = sum(item.get("price", 0) for item in parsed["items"])
 
+            price_history.submit(parsed)
             return {
                 "success": True,
                 "parsed": parsed,
@@ -192,6 +221,7 @@ async def scan_receipt(file: UploadFile = File(...)):
     try:
         parsed = _local_ocr_parse(image_bytes)
         if parsed and parsed.get("items"):
+            price_history.submit(parsed)
             return {
                 "success": True,
                 "parsed": parsed,
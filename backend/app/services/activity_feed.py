@@ -0,0 +1,169 @@
+"""
+Bounded squad activity feed.
+
+Activity used to be `insert(0, …)` + a full rewrite of squad_activity.json,
+so the file grew forever and GET /squad returned all of it. Now:
+
+  • every entry gets a monotonically increasing `seq` and is appended to
+    squad_activity.jsonl (the active segment);
+  • once the active segment holds SEGMENT_SIZE entries it is renamed to an
+    archive segment, squad_activity.<first seq>.jsonl, and a new one starts;
+  • the newest HOT_CAPACITY entries are kept in a ring buffer, so the first
+    pages are served from memory;
+  • pages are addressed by cursor = the seq of the last entry returned.
+
+squad_activity.json is only read once, to seed the log.
+"""
+
+import re
+import threading
+import uuid
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+from typing import Optional
+from app.services.data_loader import (
+    load_json,
+    load_jsonl,
+    append_jsonl,
+    file_lock,
+    list_data_files,
+    rename_data_file,
+)
+
+
+SEED_FILE = "squad_activity.json"
+ACTIVE_FILE = "squad_activity.jsonl"
+SEGMENT_PATTERN = "squad_activity.*.jsonl"
+SEGMENT_RE = re.compile(r"squad_activity\.(\d+)\.jsonl$")
+HOT_CAPACITY = 200
+SEGMENT_SIZE = 1000
+DEFAULT_PAGE_SIZE = 20
+
+_lock = threading.RLock()
+_hot: deque = deque(maxlen=HOT_CAPACITY)
+_segments: list[tuple[int, str]] = []   # (first seq, filename), oldest first
+_active_first_seq = 1
+_active_count = 0
+_next_seq = 1
+_loaded = False
+
+
+# ──────────────── Loading ────────────────
+
+
+def _ensure_loaded() -> None:
+    global _loaded, _next_seq, _active_count, _active_first_seq
+    if _loaded:
+        return
+    with _lock:
+        if _loaded:
+            return
+        _segments.clear()
+        for name in list_data_files(SEGMENT_PATTERN):
+            match = SEGMENT_RE.match(name)
+            if match:
+                _segments.append((int(match.group(1)), name))
+        _segments.sort()
+
+        active = load_jsonl(ACTIVE_FILE)
+        if not active and not _segments:
+            # Seed from the legacy file (stored newest first)
+            seed = list(reversed(load_json(SEED_FILE)))
+            now = datetime.now().isoformat()
+            active = [{**entry, "seq": i + 1, "at": entry.get("at", now)} for i, entry in enumerate(seed)]
+            with file_lock(ACTIVE_FILE):
+                append_jsonl(ACTIVE_FILE, active)
+
+        tail = active[-HOT_CAPACITY:]
+        if len(tail) < HOT_CAPACITY and _segments:
+            tail = load_jsonl(_segments[-1][1])[-(HOT_CAPACITY - len(tail)):] + tail
+        _hot.clear()
+        _hot.extend(tail)
+
+        _active_count = len(active)
+        if active:
+            _active_first_seq = active[0]["seq"]
+            _next_seq = active[-1]["seq"] + 1
+        elif _segments:
+            last = load_jsonl(_segments[-1][1])
+            _next_seq = last[-1]["seq"] + 1 if last else _segments[-1][0]
+            _active_first_seq = _next_seq
+        _loaded = True
+
+
+# ──────────────── Writes ────────────────
+
+
+def _rotate() -> None:
+    global _active_count, _active_first_seq
+    name = f"squad_activity.{_active_first_seq:08d}.jsonl"
+    with file_lock(ACTIVE_FILE):
+        rename_data_file(ACTIVE_FILE, name)
+    _segments.append((_active_first_seq, name))
+    _active_first_seq = _next_seq
+    _active_count = 0
+
+
+def record(emoji: str, text: str) -> dict:
+    """Append an activity entry (newest) and return it."""
+    global _next_seq, _active_count
+    _ensure_loaded()
+    with _lock:
+        entry = {
+            "id": f"act-{uuid.uuid4().hex[:6]}",
+            "seq": _next_seq,
+            "emoji": emoji,
+            "text": text,
+            "time": "Just now",
+            "at": datetime.now().isoformat(),
+        }
+        with file_lock(ACTIVE_FILE):
+            append_jsonl(ACTIVE_FILE, [entry])
+        _hot.append(entry)
+        _next_seq += 1
+        _active_count += 1
+        if _active_count >= SEGMENT_SIZE:
+            _rotate()
+    return entry
+
+
+# ──────────────── Reads ────────────────
+
+
+def _cold(before: int, limit: int) -> list[dict]:
+    """Entries with seq < before, newest first, read from the segment files."""
+    sources = [(first, name) for first, name in _segments]
+    sources.append((_active_first_seq, ACTIVE_FILE))
+    # Start from the segment that contains seq `before - 1`
+    i = bisect_left([first for first, _ in sources], before) - 1
+
+    out: list[dict] = []
+    while i >= 0 and len(out) < limit:
+        entries = [e for e in load_jsonl(sources[i][1]) if e["seq"] < before]
+        out.extend(reversed(entries[-(limit - len(out)):]))
+        i -= 1
+    return out
+
+
+def page(limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[int] = None) -> tuple[list[dict], Optional[int]]:
+    """Newest-first page of activity; returns (entries, next cursor or None)."""
+    _ensure_loaded()
+    with _lock:
+        before = cursor if cursor is not None else _next_seq
+        entries: list[dict] = []
+        if _hot and _hot[0]["seq"] < before:
+            # Hot seqs are contiguous, so the cut point is a subtraction
+            end = min(before - _hot[0]["seq"], len(_hot))
+            start = max(0, end - limit)
+            entries = [_hot[i] for i in range(end - 1, start - 1, -1)]
+        if len(entries) < limit:
+            oldest = entries[-1]["seq"] if entries else before
+            entries.extend(_cold(oldest, limit - len(entries)))
+
+    next_cursor = entries[-1]["seq"] if entries and entries[-1]["seq"] > 1 else None
+    return entries, next_cursor
+
+
+def recent(limit: int = DEFAULT_PAGE_SIZE) -> list[dict]:
+    return page(limit)[0]
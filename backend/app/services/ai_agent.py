@@ -10,7 +10,20 @@ If OPENAI_API_KEY is set, can optionally call GPT for richer responses.
 import os
 import re
 from typing import Any
+from app.services import (
+    coin_ledger,
+    fx_analytics,
+    grocery_stats,
+    intent_classifier,
+    llm_cache,
+    llm_client,
+    mission_engine,
+    perk_index,
+    squad_ledger,
+    streak_engine,
+)
 from app.services.data_loader import load_json
+from app.services.lazy_context import LazyContext
 
 
 # ──────────────── State Graph ────────────────
@@ -57,72 +70,75 @@ class StateGraph:
 
 
 def classify_intent(state: AgentState) -> AgentState:
-    """Node 1: Classify user intent from the message."""
-    msg = state["message"].lower()
-    intent_map = [
-        ("irp", ["irp", "residence permit", "visa", "immigration", "stamp 2"]),
-        ("grocery", ["grocery", "groceries", "food price", "cheapest", "lidl", "tesco", "aldi", "milk", "bread", "rice", "eggs"]),
-        ("fx", ["transfer", "fx", "exchange", "rate", "inr", "rupee", "wise", "remitly"]),
-        ("budget", ["budget", "spend", "runway", "broke", "money left", "balance", "save"]),
-        ("streak", ["streak", "mission", "reward", "coupon"]),
-        ("transport", ["transport", "bus", "luas", "dart", "bike", "airport", "taxi", "leap card"]),
-        ("accommodation", ["accommodation", "room", "apartment", "rent", "housing", "digs"]),
-        ("community", ["community", "post", "connect", "people", "friends"]),
-        ("perks", ["perk", "discount", "offer", "coupon", "student deal", "unidays"]),
-        ("squad", ["squad", "split", "owe", "pay back", "roommate"]),
-        ("market", ["market", "secondhand", "buy", "sell", "starter kit", "barter"]),
-    ]
-
-    for intent, keywords in intent_map:
-        if any(kw in msg for kw in keywords):
-            state["intent"] = intent
-            state["matched_keywords"] = [kw for kw in keywords if kw in msg]
-            return state
-
-    state["intent"] = "general"
-    state["matched_keywords"] = []
+    """Node 1: Classify user intent from the message (ranked, with confidence)."""
+    result = intent_classifier.classify(state["message"])
+    state["intent"] = result["intent"]
+    state["confidence"] = result["confidence"]
+    state["intents"] = result["intents"]
+    state["matched_keywords"] = result["intents"][0]["keywords"] if result["intents"] else []
     return state
 
 
-def load_context(state: AgentState) -> AgentState:
-    """Node 2: Load ALL relevant data files for full user context."""
-    intent = state.get("intent", "general")
-    context = {}
-
-    # Always load full user context for complete knowledge
-    all_files = {
-        "user": "user_profile.json",
-        "budget": "budget.json",
-        "transactions": "transactions.json",
-        "streaks": "streaks.json",
-        "missions": "survival_missions.json",
-        "coins": "coins.json",
-    }
-    for key, filename in all_files.items():
-        try:
-            context[key] = load_json(filename)
-        except Exception:
-            pass
-
-    # Also load intent-specific data
-    intent_data_map = {
-        "fx": ["fx_rates.json"],
-        "grocery": ["grocery_prices.json"],
-        "streak": ["streaks.json", "survival_missions.json"],
-        "perks": ["perks.json"],
-        "squad": ["squad_members.json", "squad_activity.json"],
-        "market": ["market_listings.json"],
-        "community": ["community_posts.json"],
-    }
+# Every context key the agent knows how to load; nothing runs until a path reads the key
+CONTEXT_LOADERS = {
+    "user": lambda: load_json("user_profile.json"),
+    "budget": lambda: load_json("budget.json"),
+    "transactions": lambda: load_json("transactions.json"),
+    "coins": coin_ledger.summary,
+    "streaks": streak_engine.state,
+    "missions": mission_engine.missions,
+    "perks": perk_index.perks,
+    "fx": fx_analytics.analytics,
+    "grocerystats": grocery_stats.table,
+    "squad_members": squad_ledger.members,
+}
+
+# Data files behind each context key — their mtimes version cached LLM responses
+CONTEXT_FILES = {
+    "user": ("user_profile.json",),
+    "budget": ("budget.json",),
+    "transactions": ("transactions.json",),
+    "coins": ("coins.json", "coin_ledger.jsonl"),
+    "streaks": ("streaks.json", "transactions.json", "budget.json"),
+    "missions": ("survival_missions.json", "transactions.json"),
+    "perks": ("perks.json",),
+    "fx": ("fx_rates.json", "fx_rate_points.jsonl"),
+    "grocerystats": ("grocery_prices.json",),
+    "squad_members": ("squad_snapshot.json", "squad_ledger.jsonl"),
+}
+
+# What each template reads (general and budget also need the budget summary)
+TEMPLATE_CONTEXT = {
+    "irp": (),
+    "grocery": ("grocerystats",),
+    "fx": ("fx",),
+    "budget": ("budget", "user"),
+    "streak": ("streaks", "missions"),
+    "transport": (),
+    "accommodation": (),
+    "community": (),
+    "perks": ("perks",),
+    "squad": ("squad_members",),
+    "market": (),
+    "general": ("budget", "user"),
+}
+
+# What the LLM prompt reads (_build_user_summary + _format_budget); the intent's template keys are added for the fallback
+LLM_CONTEXT = ("user", "budget", "transactions", "streaks", "coins", "squad_members", "fx", "missions")
+
+
+def _llm_key() -> str | None:
+    api_key = os.getenv("AZURE_OPENAI_API_KEY")
+    return api_key if api_key and os.getenv("AI_MODE", "mock") != "mock" else None
 
-    for filename in intent_data_map.get(intent, []):
-        try:
-            key = filename.replace(".json", "").replace("_", "")
-            context[key] = load_json(filename)
-        except Exception:
-            pass
 
-    state["context"] = context
+def load_context(state: AgentState) -> AgentState:
+    """Node 2: Scope a lazy context to what the chosen path declares; files load on first access."""
+    intent = state.get("intent", "general")
+    keys = TEMPLATE_CONTEXT.get(intent, TEMPLATE_CONTEXT["general"])
+    if _llm_key():
+        keys = (*LLM_CONTEXT, *keys)
+    state["context"] = LazyContext(CONTEXT_LOADERS, keys)
     return state
 
 
@@ -133,21 +149,15 @@ def generate_response(state: AgentState) -> AgentState:
     ctx = state.get("context", {})
     msg = state["message"]
 
-    # Build context string for LLM or template
-    budget_summary = _format_budget(ctx)
-    sources: list[str] = []
-
-    # Check for LLM availability
-    api_key = os.getenv("AZURE_OPENAI_API_KEY")
-    ai_mode = os.getenv("AI_MODE", "mock")
-    if api_key and ai_mode != "mock":
-        response = _llm_generate(msg, intent, ctx, api_key)
+    if _llm_key():
+        response = _llm_generate(msg, intent, ctx)
         sources = ["Stash AI (Azure GPT-powered)", f"{intent.title()} data"]
     else:
-        response, sources = _template_generate(intent, msg, ctx, budget_summary)
+        response, sources = _template_generate(intent, msg, ctx)
 
     state["response"] = response
     state["sources"] = sources
+    state["context_timings"] = getattr(ctx, "timings", {})
     state["__done"] = True
     return state
 
@@ -171,22 +181,12 @@ def _format_budget(ctx: dict) -> str:
     )
 
 
-def _llm_generate(msg: str, intent: str, ctx: dict, api_key: str) -> str:
+def _llm_generate(msg: str, intent: str, ctx: dict) -> str:
     """Azure OpenAI-powered response generation."""
     try:
-        from openai import AzureOpenAI
         from app.services.ai_insights import _build_user_summary
 
-        endpoint = os.getenv("AZURE_OPENAI_ENDPOINT", "https://cityupstart.cognitiveservices.azure.com/")
-        api_version = os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview")
-        model = os.getenv("AI_MODEL", "gpt-4.1")
-
-        client = AzureOpenAI(
-            api_key=api_key,
-            azure_endpoint=endpoint,
-            api_version=api_version,
-        )
-
+        model = llm_client.default_model()
         user_summary = _build_user_summary(ctx)
 
         system_prompt = (
@@ -202,25 +202,27 @@ def _llm_generate(msg: str, intent: str, ctx: dict, api_key: str) -> str:
             f"USER DATA:\n{user_summary}\n\n"
             f"Additional context: {_format_budget(ctx)}"
         )
-        completion = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": msg},
-            ],
-            max_tokens=500,
-            temperature=0.7,
-        )
-        return completion.choices[0].message.content or "I couldn't generate a response."
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": msg},
+        ]
+        params = {"max_tokens": 500, "temperature": 0.7}
+
+        def call() -> str:
+            return llm_client.complete(messages, model=model, **params) or "I couldn't generate a response."
+
+        files = [f for key in ctx.loaded() for f in CONTEXT_FILES.get(key, ())]
+        return llm_cache.cached_completion(call, model, messages, params, llm_cache.data_versions(files), question=msg)
     except Exception as e:
         print(f"[Stash AI] LLM error: {e}")
         # Fallback to template if LLM fails
-        response, _ = _template_generate(intent, msg, ctx, _format_budget(ctx))
+        response, _ = _template_generate(intent, msg, ctx)
         return response
 
 
-def _template_generate(intent: str, msg: str, ctx: dict, budget_summary: str) -> tuple[str, list[str]]:
+def _template_generate(intent: str, msg: str, ctx: dict) -> tuple[str, list[str]]:
     """Template-based response generation (no API key needed)."""
+    budget_summary = _format_budget(ctx) if "budget" in TEMPLATE_CONTEXT.get(intent, TEMPLATE_CONTEXT["general"]) else ""
     generators = {
         "irp": _gen_irp,
         "grocery": _gen_grocery,
@@ -259,18 +261,17 @@ def _gen_irp(msg, ctx, budget_summary):
 
 
 def _gen_grocery(msg, ctx, budget_summary):
-    items = ctx.get("groceryprices", {}).get("items", [])
+    stats = ctx.get("grocerystats", {})
     item_keywords = ["milk", "bread", "rice", "eggs", "chicken", "curd", "yogurt", "butter", "cheese", "banana"]
     found = next((kw for kw in item_keywords if kw in msg.lower()), "")
 
-    if found and items:
-        matched = [i for i in items if found.lower() in i["name"].lower()]
+    if found and stats:
+        matched = [r for r in stats.get("items", []) if found.lower() in r["name"].lower()]
         if matched:
             lines = []
-            for it in matched[:5]:
-                prices = ", ".join(f"{s['store']}: €{s['price']}" for s in it["stores"])
-                cheapest = min(it["stores"], key=lambda s: s["price"])
-                lines.append(f"• {it['name']}: {prices} → Cheapest at {cheapest['store']}")
+            for row in matched[:5]:
+                prices = ", ".join(f"{store}: €{price}" for store, price in row["prices"].items())
+                lines.append(f"• {row['name']}: {prices} → Cheapest at {row['cheapestStore']}")
             return (
                 f"Here's what I found for **{found}** across Dublin stores:\n\n"
                 + "\n".join(lines)
@@ -293,7 +294,7 @@ def _gen_grocery(msg, ctx, budget_summary):
 
 
 def _gen_fx(msg, ctx, budget_summary):
-    fx = ctx.get("fxrates", {})
+    fx = ctx.get("fx", {})
     rate = fx.get("currentRate", "N/A")
     best = fx.get("bestTimeToTransfer", "N/A")
     return (
@@ -331,7 +332,7 @@ def _gen_budget(msg, ctx, budget_summary):
 
 def _gen_streak(msg, ctx, budget_summary):
     streaks = ctx.get("streaks", {})
-    missions = ctx.get("survivalmissions", [])
+    missions = ctx.get("missions", [])
     completed = sum(1 for m in missions if m.get("completed"))
     milestones = streaks.get("milestones", [])
     ms_text = ""
@@ -407,7 +408,7 @@ def _gen_perks(msg, ctx, budget_summary):
 
 
 def _gen_squad(msg, ctx, budget_summary):
-    members = ctx.get("squadmembers", [])
+    members = ctx.get("squad_members", [])
     owed = sum(m["amount"] for m in members if m["direction"] == "owes-you")
     owing = sum(m["amount"] for m in members if m["direction"] == "you-owe")
     return (
@@ -472,4 +473,7 @@ def run_agent(message: str) -> dict:
         "response": result.get("response", "I'm not sure how to help with that."),
         "sources": result.get("sources", []),
         "intent": result.get("intent", "general"),
+        "confidence": result.get("confidence", 0.0),
+        "intents": result.get("intents", []),
+        "contextTimings": result.get("context_timings", {}),
     }
@@ -10,12 +10,36 @@ import os
 import json
 from datetime import datetime, timedelta
 from typing import Any
+from app.services import (
+    activity_feed,
+    coin_ledger,
+    community_store,
+    fx_analytics,
+    grocery_stats,
+    llm_cache,
+    llm_client,
+    mission_engine,
+    perk_index,
+    reward_shop,
+    squad_ledger,
+    streak_engine,
+)
 from app.services.data_loader import load_json
 
 
 # ──────────────── Full Context Loader ────────────────
 
 
+# Data files behind the full context — their mtimes version cached LLM insights
+CONTEXT_FILES = [
+    "user_profile.json", "budget.json", "transactions.json", "perks.json", "market_listings.json",
+    "ghost_budget.json", "roasts.json", "community_posts.json", "community_log.jsonl",
+    "squad_snapshot.json", "squad_ledger.jsonl", "squad_activity.jsonl", "coins.json", "coin_ledger.jsonl",
+    "rewards_shop.json", "reward_purchases.jsonl", "streaks.json", "survival_missions.json",
+    "grocery_prices.json", "fx_rates.json", "fx_rate_points.jsonl",
+]
+
+
 def _load_full_user_context() -> dict[str, Any]:
     """Load ALL user data into a single context dict."""
     ctx: dict[str, Any] = {}
@@ -23,17 +47,7 @@ def _load_full_user_context() -> dict[str, Any]:
         "user": "user_profile.json",
         "budget": "budget.json",
         "transactions": "transactions.json",
-        "streaks": "streaks.json",
-        "missions": "survival_missions.json",
-        "squad_members": "squad_members.json",
-        "squad_activity": "squad_activity.json",
-        "perks": "perks.json",
-        "grocery": "grocery_prices.json",
-        "fx": "fx_rates.json",
         "market": "market_listings.json",
-        "community": "community_posts.json",
-        "coins": "coins.json",
-        "rewards_shop": "rewards_shop.json",
         "ghost_budget": "ghost_budget.json",
         "roasts": "roasts.json",
     }
@@ -42,6 +56,24 @@ def _load_full_user_context() -> dict[str, Any]:
             ctx[key] = load_json(filename)
         except Exception:
             ctx[key] = None
+    # Community, squad, coin, reward, streak, mission, perk, grocery and FX state come from their stores, not the seed files
+    stores = {
+        "perks": perk_index.perks,
+        "community": community_store.all_posts,
+        "squad_members": squad_ledger.members,
+        "squad_activity": activity_feed.recent,
+        "coins": coin_ledger.summary,
+        "rewards_shop": reward_shop.rewards,
+        "streaks": streak_engine.state,
+        "missions": mission_engine.missions,
+        "grocery": grocery_stats.table,
+        "fx": fx_analytics.analytics,
+    }
+    for key, reader in stores.items():
+        try:
+            ctx[key] = reader()
+        except Exception:
+            ctx[key] = None
     return ctx
 
 
@@ -162,18 +194,7 @@ FEATURE_PROMPTS = {
 def _llm_generate_insights(feature: str, ctx: dict) -> dict:
     """Generate insights using Azure OpenAI with full user context."""
     try:
-        from openai import AzureOpenAI
-
-        api_key = os.getenv("AZURE_OPENAI_API_KEY")
-        endpoint = os.getenv("AZURE_OPENAI_ENDPOINT", "https://cityupstart.cognitiveservices.azure.com/")
-        api_version = os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview")
-        model = os.getenv("AI_MODEL", "gpt-4.1")
-
-        client = AzureOpenAI(
-            api_key=api_key,
-            azure_endpoint=endpoint,
-            api_version=api_version,
-        )
+        model = llm_client.default_model()
 
         user_summary = _build_user_summary(ctx)
         feature_instruction = FEATURE_PROMPTS.get(feature, FEATURE_PROMPTS["dashboard"])
@@ -193,25 +214,25 @@ def _llm_generate_insights(feature: str, ctx: dict) -> dict:
             f"USER DATA:\n{user_summary}"
         )
 
-        completion = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": feature_instruction},
-            ],
-            max_tokens=500,
-            temperature=0.7,
-        )
-
-        raw = completion.choices[0].message.content or "[]"
-        # Clean up potential markdown formatting
-        raw = raw.strip()
-        if raw.startswith("```"):
-            raw = raw.split("\n", 1)[1] if "\n" in raw else raw[3:]
-        if raw.endswith("```"):
-            raw = raw[:-3]
-        raw = raw.strip()
-
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": feature_instruction},
+        ]
+        params = {"max_tokens": 500, "temperature": 0.7}
+
+        def call() -> str:
+            raw = llm_client.complete(messages, model=model, **params) or "[]"
+            # Clean up potential markdown formatting
+            raw = raw.strip()
+            if raw.startswith("```"):
+                raw = raw.split("\n", 1)[1] if "\n" in raw else raw[3:]
+            if raw.endswith("```"):
+                raw = raw[:-3]
+            raw = raw.strip()
+            json.loads(raw)  # Only valid JSON gets cached
+            return raw
+
+        raw = llm_cache.cached_completion(call, model, messages, params, llm_cache.data_versions(CONTEXT_FILES))
         insights = json.loads(raw)
         return {"insights": insights, "source": "Stash AI (GPT-powered)", "feature": feature}
 
@@ -368,10 +389,9 @@ def _insights_fx(ctx: dict) -> list:
     insights = []
 
     rate = fx.get("currentRate", 0)
-    rates = fx.get("historicalRates", [])
+    avg_rate = fx.get("rolling", {}).get("mean30")
 
-    if rates:
-        avg_rate = sum(r["rate"] for r in rates) / len(rates)
+    if avg_rate:
         if rate > avg_rate * 1.02:
             insights.append({
                 "emoji": "🟢",
@@ -411,32 +431,22 @@ def _insights_fx(ctx: dict) -> list:
 
 
 def _insights_grocery(ctx: dict) -> list:
-    grocery = ctx.get("grocery") or {}
+    stats = ctx.get("grocery") or {}
     budget = ctx.get("budget") or {}
     transactions = ctx.get("transactions") or []
     insights = []
 
-    items = grocery.get("items", [])
     grocery_spend = sum(abs(t.get("amount", 0)) for t in transactions if t.get("category") == "groceries")
     daily_budget = budget.get("dailyBudget", 35)
 
-    # Find items with biggest price differences
-    biggest_diff = []
-    for item in items:
-        prices = [s["price"] for s in item.get("stores", [])]
-        if len(prices) >= 2:
-            diff = max(prices) - min(prices)
-            if diff > 0.5:
-                cheapest_store = min(item["stores"], key=lambda s: s["price"])
-                biggest_diff.append((item["name"], diff, cheapest_store["store"], cheapest_store["price"]))
-
-    biggest_diff.sort(key=lambda x: x[1], reverse=True)
-    if biggest_diff:
-        top = biggest_diff[0]
+    # Item with the biggest price difference across stores
+    spreads = [r for r in stats.get("items", []) if r["spread"] > 0.5]
+    if spreads:
+        top = max(spreads, key=lambda r: r["spread"])
         insights.append({
             "emoji": "💰",
-            "title": f"Save on {top[0]}",
-            "text": f"{top[0]} varies by €{top[1]:.2f} across stores. Get it at {top[2]} for €{top[3]:.2f} — cheapest option!",
+            "title": f"Save on {top['name']}",
+            "text": f"{top['name']} varies by €{top['spread']:.2f} across stores. Get it at {top['cheapestStore']} for €{top['min']:.2f} — cheapest option!",
         })
 
     if grocery_spend > daily_budget * 3:
@@ -453,7 +463,7 @@ def _insights_grocery(ctx: dict) -> list:
         })
 
     # Sale alerts
-    on_sale = [item for item in items for s in item.get("stores", []) if s.get("onSale")]
+    on_sale = stats.get("onSale", [])
     if on_sale:
         insights.append({
             "emoji": "🏷️",
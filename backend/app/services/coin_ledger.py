@@ -0,0 +1,237 @@
+"""
+Append-only coin ledger.
+
+Replaces the read-modify-write of coins.json (whose history was cut to the
+last 50 entries). Every earn, spend or reversal is appended to
+coin_ledger.jsonl; balance and lifetime are materialized in memory and
+updated under one lock, so a spend can never take the balance negative.
+
+The first time the ledger opens, it is seeded from coins.json: one
+"opening" entry carries whatever the truncated history can't explain,
+followed by the surviving history entries, oldest first.
+
+Indexes kept per entry (seq is 1-based and contiguous):
+  • by source — seq lists for "mission", "streak", "reward", …
+  • by date — a parallel list of dates for bisect range queries
+  • daily rollups — earned / spent / count per day, updated on append
+  • refs — a set of every entry ref, so "was this already paid?" is O(1)
+
+History pages are newest first with cursor = seq of the last entry returned.
+"""
+
+import threading
+import uuid
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Optional
+from app.services.data_loader import load_json, load_jsonl, append_jsonl, file_lock
+
+
+LEDGER_FILE = "coin_ledger.jsonl"
+SEED_FILE = "coins.json"
+DEFAULT_PAGE_SIZE = 20
+
+_lock = threading.RLock()
+_entries: list[dict] = []
+_dates: list[str] = []
+_by_source: dict[str, list[int]] = {}
+_daily: dict[str, dict] = {}
+_refs: set[str] = set()
+_balance = 0
+_lifetime = 0
+_loaded = False
+
+
+# ──────────────── Applying entries ────────────────
+
+
+def _apply(entry: dict) -> None:
+    global _balance, _lifetime
+    _entries.append(entry)
+    _dates.append(entry["date"])
+    _by_source.setdefault(entry["source"], []).append(entry["seq"])
+    if entry.get("ref"):
+        _refs.add(entry["ref"])
+
+    _balance += entry["amount"]
+    if entry["type"] == "opening":
+        _lifetime += entry.get("lifetime", 0)
+        return
+    if entry["type"] == "earned":
+        _lifetime += entry["amount"]
+
+    day = _daily.setdefault(entry["date"], {"date": entry["date"], "earned": 0, "spent": 0, "count": 0})
+    if entry["amount"] >= 0:
+        day["earned"] += entry["amount"]
+    else:
+        day["spent"] += -entry["amount"]
+    day["count"] += 1
+
+
+def _seed_entries() -> list[dict]:
+    coins = load_json(SEED_FILE)
+    history = sorted(reversed(coins.get("history", [])), key=lambda h: h.get("date", ""))
+    explained = sum(h["amount"] for h in history)
+    earned = sum(h["amount"] for h in history if h.get("type") == "earned")
+    first_date = history[0]["date"] if history else datetime.now().strftime("%Y-%m-%d")
+
+    entries = [{
+        "id": "ch-opening",
+        "type": "opening",
+        "amount": coins.get("balance", 0) - explained,
+        "lifetime": coins.get("lifetime", 0) - earned,
+        "source": "opening",
+        "label": "Balance before ledger",
+        "date": first_date,
+    }]
+    entries.extend({k: h[k] for k in ("id", "type", "amount", "source", "label", "date")} for h in history)
+    for seq, entry in enumerate(entries, start=1):
+        entry["seq"] = seq
+    return entries
+
+
+def _ensure_loaded() -> None:
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if _loaded:
+            return
+        entries = load_jsonl(LEDGER_FILE)
+        if not entries:
+            entries = _seed_entries()
+            with file_lock(LEDGER_FILE):
+                append_jsonl(LEDGER_FILE, entries)
+        for entry in entries:
+            _apply(entry)
+        _loaded = True
+
+
+def _append(entry_type: str, amount: int, source: str, label: str, ref: Optional[str] = None) -> dict:
+    entry = {
+        "id": f"ch-{uuid.uuid4().hex[:6]}",
+        "seq": len(_entries) + 1,
+        "type": entry_type,
+        "amount": amount,
+        "source": source,
+        "label": label,
+        "date": datetime.now().strftime("%Y-%m-%d"),
+        "at": datetime.now().isoformat(),
+    }
+    if ref:
+        entry["ref"] = ref
+    with file_lock(LEDGER_FILE):
+        append_jsonl(LEDGER_FILE, [entry])
+    _apply(entry)
+    return entry
+
+
+# ──────────────── Writes ────────────────
+
+
+def earn(amount: int, source: str, label: str, ref: Optional[str] = None) -> dict:
+    """Credit coins. Returns the ledger entry."""
+    _ensure_loaded()
+    with _lock:
+        return _append("earned", abs(amount), source, label, ref)
+
+
+def spend(amount: int, source: str, label: str, ref: Optional[str] = None) -> Optional[dict]:
+    """Debit coins if the balance covers it; None if it doesn't.
+
+    `ref` links the entry to whatever it paid for (e.g. a purchase id).
+    """
+    _ensure_loaded()
+    with _lock:
+        if _balance < amount:
+            return None
+        return _append("spent", -abs(amount), source, label, ref)
+
+
+def reverse(amount: int, source: str, label: str) -> dict:
+    """Take back up to `amount` coins (never below zero), e.g. an un-completed mission."""
+    _ensure_loaded()
+    with _lock:
+        return _append("reversed", -min(abs(amount), _balance), source, label)
+
+
+# ──────────────── Reads ────────────────
+
+
+def balance() -> int:
+    _ensure_loaded()
+    return _balance
+
+
+def lifetime() -> int:
+    _ensure_loaded()
+    return _lifetime
+
+
+def history(
+    source: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[int] = None,
+) -> tuple[list[dict], Optional[int]]:
+    """Newest-first page of entries filtered by source and date range (YYYY-MM-DD, inclusive)."""
+    _ensure_loaded()
+    with _lock:
+        # Seq window [lo, hi) from the date range and cursor
+        lo = bisect_left(_dates, since) + 1 if since else 1
+        hi = bisect_right(_dates, until) + 1 if until else len(_entries) + 1
+        if cursor is not None:
+            hi = min(hi, cursor)
+
+        if source is None:
+            seqs = range(max(lo, hi - limit), hi)
+            has_more = seqs.start > lo
+        else:
+            source_seqs = _by_source.get(source, [])
+            start = bisect_left(source_seqs, lo)
+            end = bisect_left(source_seqs, hi)
+            seqs = source_seqs[max(start, end - limit):end]
+            has_more = end - start > limit
+
+        entries = [_entries[seq - 1] for seq in reversed(seqs)]
+    next_cursor = entries[-1]["seq"] if entries and has_more else None
+    return entries, next_cursor
+
+
+def has_ref(ref: str) -> bool:
+    """Whether any entry carries `ref` (e.g. a milestone or mission already paid)."""
+    _ensure_loaded()
+    return ref in _refs
+
+
+def entries_with_ref(source: str) -> list[dict]:
+    """Entries from `source` that carry a ref, oldest first."""
+    _ensure_loaded()
+    with _lock:
+        return [_entries[seq - 1] for seq in _by_source.get(source, []) if _entries[seq - 1].get("ref")]
+
+
+def rollups(period: str = "day") -> list[dict]:
+    """Earned / spent / count per day (or per month), newest first."""
+    _ensure_loaded()
+    with _lock:
+        days = [dict(d) for d in _daily.values()]
+    if period == "month":
+        months: dict[str, dict] = {}
+        for d in days:
+            key = d["date"][:7]
+            m = months.setdefault(key, {"date": key, "earned": 0, "spent": 0, "count": 0})
+            for field in ("earned", "spent", "count"):
+                m[field] += d[field]
+        days = list(months.values())
+    return sorted(days, key=lambda d: d["date"], reverse=True)
+
+
+def summary(history_limit: int = 50) -> dict:
+    """coins.json-shaped view: balance, lifetime and the most recent history."""
+    return {
+        "balance": balance(),
+        "lifetime": lifetime(),
+        "history": history(limit=history_limit)[0],
+    }
@@ -0,0 +1,171 @@
+"""
+Ranked community feed index.
+
+Keeps one sorted list per (sort mode, intent) so `GET /community` can serve
+newest / top / hot pages with a bisect instead of re-sorting every post per
+request. The lists are built once from the community store and updated in
+place when a post is created, voted on or commented on.
+
+Hot ranking follows the classic "log votes + age" formula: the time term is
+the post's own creation timestamp, so scores never need recomputing as the
+clock moves — newer posts simply start higher.
+"""
+
+import base64
+import math
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Optional
+from app.services import community_store
+
+
+SORT_MODES = ("newest", "top", "hot")
+# Seconds of recency worth one order of magnitude of upvotes
+HOT_DECAY_SECONDS = 45000
+ALL = "All"
+
+_lock = threading.RLock()
+_posts: dict[str, dict] = {}
+_keys: dict[str, dict[str, float]] = {}                      # post id → {sort: key}
+_orders: dict[str, dict[str, list[tuple[float, str]]]] = {}  # sort → intent → [(-key, id)]
+_loaded = False
+
+
+# ──────────────── Scoring ────────────────
+
+
+def _created_ts(post: dict) -> float:
+    try:
+        return datetime.fromisoformat(post.get("createdAt", "")).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def hot_score(upvotes: int, created_ts: float) -> float:
+    """Upvotes decayed by age: log10(votes) plus creation time in decay units."""
+    return math.log10(max(upvotes, 1)) + created_ts / HOT_DECAY_SECONDS
+
+
+def _sort_keys(post: dict) -> dict[str, float]:
+    ts = _created_ts(post)
+    upvotes = post.get("upvotes", 0)
+    return {
+        "newest": ts,
+        # Ties on votes fall back to recency (fractional part stays < 1)
+        "top": upvotes + ts / 1e10,
+        "hot": hot_score(upvotes, ts),
+    }
+
+
+# ──────────────── Index maintenance ────────────────
+
+
+def _index_add(post: dict) -> None:
+    keys = _sort_keys(post)
+    _keys[post["id"]] = keys
+    for sort, key in keys.items():
+        for bucket in (ALL, post.get("intent", "GENERAL")):
+            insort(_orders[sort].setdefault(bucket, []), (-key, post["id"]))
+
+
+def _index_remove(post: dict) -> None:
+    keys = _keys.pop(post["id"], None)
+    if keys is None:
+        return
+    for sort, key in keys.items():
+        for bucket in (ALL, post.get("intent", "GENERAL")):
+            entries = _orders[sort].get(bucket, [])
+            i = bisect_left(entries, (-key, post["id"]))
+            if i < len(entries) and entries[i][1] == post["id"]:
+                entries.pop(i)
+
+
+def rebuild(posts: list[dict]) -> None:
+    """Rebuild every ordering from a full list of posts."""
+    global _loaded
+    with _lock:
+        _posts.clear()
+        _keys.clear()
+        _orders.clear()
+        for sort in SORT_MODES:
+            _orders[sort] = {}
+        buckets: dict[str, dict[str, list]] = {sort: {} for sort in SORT_MODES}
+        for post in posts:
+            _posts[post["id"]] = post
+            keys = _sort_keys(post)
+            _keys[post["id"]] = keys
+            for sort, key in keys.items():
+                for bucket in (ALL, post.get("intent", "GENERAL")):
+                    buckets[sort].setdefault(bucket, []).append((-key, post["id"]))
+        for sort, by_intent in buckets.items():
+            _orders[sort] = {bucket: sorted(entries) for bucket, entries in by_intent.items()}
+        _loaded = True
+
+
+def apply_write(*posts: dict) -> None:
+    """Re-rank posts that were just created, voted or commented on."""
+    with _lock:
+        if not _loaded:
+            return  # Not built yet — the first query builds from the store
+        for post in posts:
+            _index_remove(post)
+            _posts[post["id"]] = post
+            _index_add(post)
+
+
+def _ensure_loaded() -> None:
+    if not _loaded:
+        rebuild(community_store.all_posts())
+
+
+# ──────────────── Queries ────────────────
+
+
+def encode_cursor(key: float, post_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{key!r}|{post_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[float, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        key, post_id = raw.split("|", 1)
+        return float(key), post_id
+    except ValueError:
+        raise ValueError("Invalid cursor") from None
+
+
+def _present(post: dict, include_comments: bool) -> dict:
+    # Copy so the store can keep appending comments while this page is serialised
+    slim = {k: v for k, v in post.items() if k != "comments"}
+    if include_comments:
+        slim["comments"] = list(post.get("comments", []))
+    else:
+        slim["commentCount"] = len(post.get("comments", []))
+    return slim
+
+
+def page(
+    sort: str = "newest",
+    intent: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_comments: bool = True,
+) -> tuple[list[dict], Optional[str]]:
+    """Return one page of posts and the cursor for the next page (None at the end)."""
+    if sort not in SORT_MODES:
+        raise ValueError(f"Unknown sort '{sort}'")
+    after = decode_cursor(cursor) if cursor else None
+
+    with _lock:
+        _ensure_loaded()
+        entries = _orders[sort].get(intent if intent and intent != ALL else ALL, [])
+        start = bisect_right(entries, after) if after else 0
+        end = len(entries) if limit is None else start + limit
+        window = entries[start:end]
+        posts = [_present(_posts[post_id], include_comments) for _, post_id in window]
+        next_cursor = None
+        if window and end < len(entries):
+            last_key, last_id = window[-1]
+            next_cursor = encode_cursor(last_key, last_id)
+    return posts, next_cursor
@@ -0,0 +1,213 @@
+"""
+Community post NLP and matching.
+
+Keyword/regex helpers that read a post's intent, locations, budget and
+duration, plus the OFFERING↔SEEKING match scoring built on them. Used when a
+post is created (community router), by the background matchmaker and by the
+search index (budget → price filter).
+"""
+
+import re
+import uuid
+from datetime import datetime
+from typing import Optional
+
+
+# ──────────────── Extraction ────────────────
+
+
+LOCATION_KEYWORDS = [
+    "dublin 1", "dublin 2", "dublin 3", "dublin 4", "dublin 5", "dublin 6",
+    "dublin 7", "dublin 8", "dublin 9", "dublin 10", "dublin 11", "dublin 12",
+    "d1", "d2", "d3", "d4", "d5", "d6", "d7", "d8", "d9",
+    "rathmines", "ranelagh", "phibsborough", "drumcondra", "glasnevin",
+    "ballsbridge", "sandymount", "clontarf", "howth", "dun laoghaire",
+    "tallaght", "blanchardstown", "city centre", "parnell", "smithfield",
+    "stoneybatter", "portobello", "harold's cross", "terenure",
+]
+
+OFFERING_PATTERNS = [
+    r"\b(giving away|for free|free\b|selling|subletting|leaving|offering|available)",
+    r"\b(take over|handover|starter kit|moving out|graduating)\b",
+]
+
+SEEKING_PATTERNS = [
+    r"\b(looking for|need|seeking|wanted|anyone know|searching)\b",
+    r"\b(where can i|help me find|recommendation)\b",
+]
+
+
+def detect_intent(content: str) -> str:
+    """Detect post intent using keyword patterns."""
+    text = content.lower()
+    offer_score = sum(1 for p in OFFERING_PATTERNS if re.search(p, text))
+    seek_score = sum(1 for p in SEEKING_PATTERNS if re.search(p, text))
+    if offer_score > seek_score:
+        return "OFFERING"
+    elif seek_score > offer_score:
+        return "SEEKING"
+    return "GENERAL"
+
+
+def extract_locations(content: str) -> list[str]:
+    """Extract Dublin locations from post content."""
+    text = content.lower()
+    return [loc for loc in LOCATION_KEYWORDS if loc in text]
+
+
+def extract_budget(content: str) -> Optional[dict]:
+    """Extract budget/price information from post content."""
+    match = re.search(r'€\s*(\d+)(?:\s*[-–to]+\s*€?\s*(\d+))?', content)
+    if match:
+        low = int(match.group(1))
+        high = int(match.group(2)) if match.group(2) else low
+        return {"low": low, "high": high}
+    return None
+
+
+def extract_duration(content: str) -> Optional[str]:
+    """Extract time duration from post."""
+    text = content.lower()
+    patterns = [
+        r'(\d+)\s*months?',
+        r'(summer|winter|spring|semester|term)',
+        r'(short[- ]term|long[- ]term|temporary)',
+        r'(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w*\s*(?:to|[-–])\s*(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w*',
+    ]
+    for p in patterns:
+        match = re.search(p, text)
+        if match:
+            return match.group(0)
+    return None
+
+
+def auto_generate_tags(content: str, intent: str) -> list[str]:
+    """Generate tags from content using NLP."""
+    tags = []
+    text = content.lower()
+    locs = extract_locations(content)
+    if locs:
+        tags.extend(locs[:2])
+
+    keyword_tags = {
+        "accommodation": ["room", "apartment", "flat", "rent", "sublet", "accommodation"],
+        "free-stuff": ["free", "giving away", "giveaway"],
+        "food": ["food", "meal", "curry", "cook", "eat"],
+        "events": ["event", "party", "meetup", "gathering"],
+        "study": ["study", "library", "exam", "assignment", "tutor"],
+        "transport": ["bus", "luas", "dart", "bike", "transport"],
+        "jobs": ["job", "internship", "work", "hiring", "part-time"],
+    }
+    for tag, keywords in keyword_tags.items():
+        if any(kw in text for kw in keywords):
+            tags.append(tag)
+
+    return list(dict.fromkeys(tags))  # dedupe preserving order
+
+
+# ──────────────── Matching ────────────────
+
+
+MATCH_STOPWORDS = {"the", "a", "an", "in", "for", "to", "of", "and", "or", "i", "is", "my"}
+MATCH_THRESHOLD = 1.5
+
+
+def match_features(post: dict) -> dict:
+    """Pre-extract the fields used to score a post against match candidates."""
+    return {
+        "locs": set(extract_locations(post["content"])),
+        "budget": extract_budget(post["content"]),
+        "tags": set(tag.lower() for tag in post.get("tags", [])),
+        "words": set(post["content"].lower().split()) - MATCH_STOPWORDS,
+    }
+
+
+def score_match(a: dict, b: dict) -> float:
+    """Score two posts' match features against each other."""
+    score = 0.0
+
+    # Location overlap
+    if a["locs"] & b["locs"]:
+        score += 3
+
+    # Budget compatibility
+    if a["budget"] and b["budget"]:
+        if (a["budget"]["low"] <= b["budget"]["high"] and
+                a["budget"]["high"] >= b["budget"]["low"]):
+            score += 2
+
+    # Tag overlap
+    score += len(a["tags"] & b["tags"])
+
+    # Content keyword overlap
+    score += min(len(a["words"] & b["words"]), 3) * 0.5
+    return score
+
+
+def match_text(post: dict, match: dict) -> str:
+    """Matchmaker message shown on `post` pointing at `match`."""
+    if post["intent"] == "SEEKING":
+        return (
+            f"🔍 Found a potential match! @{match['author']} posted about: "
+            f"\"{match['content'][:100]}...\" — Check their post for details!"
+        )
+    return (
+        f"🤝 Someone might need this! @{match['author']} is looking for: "
+        f"\"{match['content'][:100]}...\" — They could be a match!"
+    )
+
+
+def find_match(post: dict, all_posts: list) -> Optional[str]:
+    """Find matching posts (OFFERING↔SEEKING) using NLP."""
+    if post["intent"] == "GENERAL":
+        return None
+
+    target_intent = "OFFERING" if post["intent"] == "SEEKING" else "SEEKING"
+    candidates = [p for p in all_posts if p["intent"] == target_intent and p["id"] != post["id"]]
+    if not candidates:
+        return None
+
+    post_features = match_features(post)
+    best_match = None
+    best_score = 0
+
+    for candidate in candidates:
+        score = score_match(post_features, match_features(candidate))
+        if score > best_score:
+            best_score = score
+            best_match = candidate
+
+    if best_match and best_score >= MATCH_THRESHOLD:
+        return match_text(post, best_match)
+    return None
+
+
+def ai_comment(post: dict, text: str) -> dict:
+    """Generate an AI matchmaker comment."""
+    locations = extract_locations(post["content"])
+    budget = extract_budget(post["content"])
+    duration = extract_duration(post["content"])
+
+    details = []
+    if locations:
+        details.append(f"📍 Location: {', '.join(locations).title()}")
+    if budget:
+        price = f"€{budget['low']}" if budget['low'] == budget['high'] else f"€{budget['low']}-€{budget['high']}"
+        details.append(f"💰 Budget: {price}")
+    if duration:
+        details.append(f"📅 Duration: {duration}")
+
+    detail_str = "\n".join(details)
+    content = f"{text}"
+    if detail_str:
+        content += f"\n\n**Extracted Details:**\n{detail_str}"
+    content += "\n\n⚠️ Safety Reminder: Always verify in person before transferring any money!"
+
+    return {
+        "id": f"cc-ai-{uuid.uuid4().hex[:6]}",
+        "author": "Stash AI",
+        "avatar": "🤖",
+        "content": content,
+        "isAI": True,
+        "createdAt": datetime.now().isoformat(),
+    }
@@ -0,0 +1,235 @@
+"""
+Id-indexed community post store.
+
+community_posts.json is the snapshot; every change since the last snapshot
+lives in community_log.jsonl as a small record:
+
+    {"op": "post",    "post": {...}}
+    {"op": "comment", "postId": "cp-…", "comment": {...}, "aiMatch": "…"?}
+    {"op": "votes",   "postId": "cp-…", "upvotes": 26}
+
+Comments are appended as soon as they are made. Votes only touch an
+in-memory counter; a flusher thread writes the latest absolute count for
+each voted post every few seconds, so a hot post costs one record per
+interval instead of one full-file rewrite per vote. Records are idempotent
+(ids / absolute counts), so replaying a log over a newer snapshot is safe.
+Once the log grows past COMPACT_AFTER records it is folded back into the
+snapshot.
+
+Durability: comments and new posts are on disk when the call returns. Vote
+counts are on disk within FLUSH_INTERVAL_SECONDS; a normal shutdown flushes
+the rest (`shutdown()`, registered with atexit when the store loads), but a
+hard kill loses up to that window of votes.
+"""
+
+import atexit
+import threading
+import time
+from typing import Optional
+from app.services.data_loader import (
+    load_json,
+    save_json,
+    load_jsonl,
+    append_jsonl,
+    truncate_jsonl,
+    file_lock,
+)
+
+
+SNAPSHOT_FILE = "community_posts.json"
+LOG_FILE = "community_log.jsonl"
+FLUSH_INTERVAL_SECONDS = 2.0
+COMPACT_AFTER = 1000
+
+_lock = threading.RLock()
+_posts: dict[str, dict] = {}
+_order: list[str] = []          # oldest → newest
+_dirty_votes: set[str] = set()
+_log_records = 0
+_loaded = False
+_flusher: threading.Thread | None = None
+_stop = threading.Event()
+
+
+# ──────────────── Loading & replay ────────────────
+
+
+def _apply(record: dict) -> None:
+    op = record.get("op")
+    if op == "post":
+        post = record["post"]
+        if post["id"] not in _posts:
+            _posts[post["id"]] = post
+            _order.append(post["id"])
+    elif op == "comment":
+        post = _posts.get(record["postId"])
+        comment = record["comment"]
+        if post is not None and all(c["id"] != comment["id"] for c in post["comments"]):
+            post["comments"].append(comment)
+            if record.get("aiMatch") and not post.get("aiMatch"):
+                post["aiMatch"] = record["aiMatch"]
+    elif op == "votes":
+        post = _posts.get(record["postId"])
+        if post is not None:
+            post["upvotes"] = record["upvotes"]
+
+
+def _ensure_loaded() -> None:
+    global _loaded, _log_records
+    if _loaded:
+        return
+    with _lock:
+        if _loaded:
+            return
+        snapshot = load_json(SNAPSHOT_FILE)
+        for post in reversed(snapshot):
+            post.setdefault("comments", [])
+            _posts[post["id"]] = post
+            _order.append(post["id"])
+        records = load_jsonl(LOG_FILE)
+        for record in records:
+            _apply(record)
+        _log_records = len(records)
+        _loaded = True
+        _start_flusher()
+
+
+# ──────────────── Reads ────────────────
+
+
+def all_posts() -> list[dict]:
+    """All posts, newest first (the snapshot's stored order)."""
+    _ensure_loaded()
+    with _lock:
+        return [_posts[post_id] for post_id in reversed(_order)]
+
+
+def get_post(post_id: str) -> Optional[dict]:
+    _ensure_loaded()
+    return _posts.get(post_id)
+
+
+# ──────────────── Writes ────────────────
+
+
+def _append(records: list[dict]) -> None:
+    global _log_records
+    with file_lock(LOG_FILE):
+        append_jsonl(LOG_FILE, records)
+    _log_records += len(records)
+
+
+def insert_post(post: dict) -> dict:
+    _ensure_loaded()
+    with _lock:
+        post.setdefault("comments", [])
+        _apply({"op": "post", "post": post})
+        _append([{"op": "post", "post": post}])
+    return post
+
+
+def add_comments(
+    items: list[tuple[str, dict]],
+    ai_matches: Optional[dict[str, str]] = None,
+) -> list[Optional[dict]]:
+    """Attach several comments with a single log append.
+
+    `ai_matches` maps post id → matchmaker text to set as the post's aiMatch
+    if it has none yet. Returns the updated post for each item (None if the
+    post doesn't exist).
+    """
+    _ensure_loaded()
+    with _lock:
+        records = []
+        updated: list[Optional[dict]] = []
+        for post_id, comment in items:
+            post = _posts.get(post_id)
+            if post is None:
+                updated.append(None)
+                continue
+            record = {"op": "comment", "postId": post_id, "comment": comment}
+            if ai_matches and post_id in ai_matches:
+                record["aiMatch"] = ai_matches[post_id]
+            _apply(record)
+            records.append(record)
+            updated.append(post)
+        if records:
+            _append(records)
+    return updated
+
+
+def add_comment(post_id: str, comment: dict) -> Optional[dict]:
+    return add_comments([(post_id, comment)])[0]
+
+
+def vote(post_id: str, delta: int) -> Optional[dict]:
+    """Adjust a post's upvotes in memory (never below 0); persisted by the flusher."""
+    _ensure_loaded()
+    with _lock:
+        post = _posts.get(post_id)
+        if post is None:
+            return None
+        post["upvotes"] = max(0, post.get("upvotes", 0) + delta)
+        _dirty_votes.add(post_id)
+    return post
+
+
+# ──────────────── Persistence ────────────────
+
+
+def flush() -> None:
+    """Write pending vote counts, compacting the log if it has grown large."""
+    if not _loaded:
+        return
+    with _lock:
+        if _dirty_votes:
+            records = [
+                {"op": "votes", "postId": post_id, "upvotes": _posts[post_id]["upvotes"]}
+                for post_id in _dirty_votes
+            ]
+            _dirty_votes.clear()
+            _append(records)
+        if _log_records >= COMPACT_AFTER:
+            compact()
+
+
+def compact() -> None:
+    """Fold the log into a fresh community_posts.json snapshot."""
+    global _log_records
+    _ensure_loaded()
+    with _lock:
+        # Pending votes are already applied in memory, so the snapshot covers them
+        _dirty_votes.clear()
+        with file_lock(SNAPSHOT_FILE), file_lock(LOG_FILE):
+            save_json(SNAPSHOT_FILE, [_posts[post_id] for post_id in reversed(_order)])
+            truncate_jsonl(LOG_FILE)
+        _log_records = 0
+
+
+def _start_flusher() -> None:
+    global _flusher
+    if _flusher is not None:
+        return
+
+    def _run():
+        while not _stop.wait(FLUSH_INTERVAL_SECONDS):
+            try:
+                flush()
+            except Exception as e:
+                print(f"[Community] Flush failed: {e}")
+
+    _stop.clear()
+    _flusher = threading.Thread(target=_run, name="stash-community-flush", daemon=True)
+    _flusher.start()
+    atexit.register(shutdown)
+
+
+def shutdown() -> None:
+    """Stop the flusher and write pending votes. Call before reloading this module."""
+    global _flusher
+    atexit.unregister(shutdown)
+    if _flusher is not None:
+        _stop.set()
+        _flusher.join()
+        _flusher = None
+    flush()
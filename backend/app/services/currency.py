@@ -0,0 +1,99 @@
+"""
+Currency conversion for transactions.
+
+Rates come from the FX series (fx_analytics): the rate for a date is the
+latest point on or before it, found with a binary search over the sorted
+date array. Whole pages of transactions convert in one batch: the
+distinct dates not yet cached are looked up with a single
+np.searchsorted, and the amounts are multiplied as a vector. The per-date
+cache is dropped whenever a new rate point is added.
+
+The series quotes one pair (base → target, e.g. INR → EUR); both
+directions of that pair are supported.
+"""
+
+import threading
+import numpy as np
+from datetime import date
+from typing import Optional
+from app.services import fx_analytics
+
+
+_lock = threading.RLock()
+_days = np.zeros(0, dtype=np.int64)
+_rates = np.zeros(0)
+_rate_cache: dict[str, float] = {}     # "YYYY-MM-DD" → target per base
+_version: Optional[int] = None
+
+
+def _refresh() -> None:
+    global _days, _rates, _version
+    version = fx_analytics.version()
+    if version == _version:
+        return
+    _days, _rates = fx_analytics.series()
+    _rate_cache.clear()
+    _version = version
+
+
+def _pair() -> tuple[str, str]:
+    stats = fx_analytics.analytics()
+    return stats.get("base") or "INR", stats.get("target") or "EUR"
+
+
+def supported(currency: str) -> bool:
+    return currency.upper() in _pair()
+
+
+def rates_for(dates: list[str]) -> np.ndarray:
+    """Target-per-base rate in effect on each date (YYYY-MM-DD or ISO datetime)."""
+    days = [d[:10] for d in dates]
+    with _lock:
+        _refresh()
+        if not len(_rates):
+            raise ValueError("No FX rates available")
+        missing = [d for d in dict.fromkeys(days) if d not in _rate_cache]
+        if missing:
+            ordinals = np.array([date.fromisoformat(d).toordinal() for d in missing], dtype=np.int64)
+            # Latest point on or before each date; dates before the series use its first point
+            idx = np.clip(np.searchsorted(_days, ordinals, side="right") - 1, 0, len(_rates) - 1)
+            _rate_cache.update(zip(missing, _rates[idx].tolist()))
+        return np.array([_rate_cache[d] for d in days])
+
+
+def factors(currencies: list[str], dates: list[str], to: str) -> np.ndarray:
+    """Multipliers converting each (currency, date) amount into `to`."""
+    base, target = _pair()
+    to = to.upper()
+    if to not in (base, target):
+        raise ValueError(f"No rates for {to} — supported: {base}, {target}")
+    codes = [c.upper() for c in currencies]
+    unknown = sorted({c for c in codes if c not in (base, target)})
+    if unknown:
+        raise ValueError(f"No rates for {', '.join(unknown)} — supported: {base}, {target}")
+
+    out = np.ones(len(codes))
+    needs = np.array([c != to for c in codes], dtype=bool)
+    if needs.any():
+        rates = rates_for([d for d, n in zip(dates, needs) if n])
+        # rate = target per base: base → target multiplies, target → base divides
+        out[needs] = rates if to == target else 1.0 / rates
+    return out
+
+
+def convert_transactions(transactions: list[dict], to: str) -> list[dict]:
+    """Copies of `transactions`, each with a "converted" {amount, currency, rate} block."""
+    if not transactions:
+        return []
+    amounts = np.array([t.get("amount", 0) for t in transactions], dtype=float)
+    multipliers = factors(
+        [t.get("currency", "EUR") for t in transactions],
+        [t.get("date", date.today().isoformat()) for t in transactions],
+        to,
+    )
+    converted = np.round(amounts * multipliers, 2)
+    to = to.upper()
+    return [
+        {**t, "converted": {"amount": float(a), "currency": to, "rate": float(m)}}
+        for t, a, m in zip(transactions, converted, multipliers)
+    ]
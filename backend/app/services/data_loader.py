@@ -1,8 +1,13 @@
 import json
+import os
+import threading
 from pathlib import Path
 
 DATA_DIR = Path(__file__).resolve().parent.parent.parent / "data"
 
+_file_locks: dict[str, threading.RLock] = {}
+_file_locks_guard = threading.Lock()
+
 
 def load_json(filename: str):
     filepath = DATA_DIR / filename
@@ -14,3 +19,78 @@ def save_json(filename: str, data):
     filepath = DATA_DIR / filename
     with open(filepath, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def save_json_atomic(filename: str, data):
+    """Write to a temp file and swap it in, so a crash never leaves a truncated file."""
+    filepath = DATA_DIR / filename
+    tmp = filepath.with_name(filepath.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, filepath)
+
+
+def load_jsonl(filename: str, offset: int = 0) -> list:
+    """Read an append-only JSON-lines file from a byte offset; a missing file is an empty log."""
+    filepath = DATA_DIR / filename
+    if not filepath.exists():
+        return []
+    records = []
+    with open(filepath, "r", encoding="utf-8") as f:
+        f.seek(offset)
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def append_jsonl(filename: str, records: list):
+    """Append records to a JSON-lines file, one compact object per line."""
+    filepath = DATA_DIR / filename
+    with open(filepath, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def truncate_jsonl(filename: str):
+    """Empty a JSON-lines log once its records are folded into a snapshot."""
+    filepath = DATA_DIR / filename
+    with open(filepath, "w", encoding="utf-8"):
+        pass
+
+
+def list_data_files(pattern: str) -> list[str]:
+    """Names of data files matching a glob pattern, sorted."""
+    return sorted(p.name for p in DATA_DIR.glob(pattern))
+
+
+def rename_data_file(src: str, dst: str):
+    os.replace(DATA_DIR / src, DATA_DIR / dst)
+
+
+def file_size(filename: str) -> int:
+    """Size in bytes of a data file (0 if missing) — used as a log offset."""
+    try:
+        return (DATA_DIR / filename).stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def file_mtime(filename: str) -> int:
+    """Modification time (ns) of a data file — a cheap change token for caches."""
+    try:
+        return (DATA_DIR / filename).stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def file_lock(filename: str) -> threading.RLock:
+    """Per-file lock guarding load → mutate → save cycles on a data file."""
+    with _file_locks_guard:
+        lock = _file_locks.get(filename)
+        if lock is None:
+            lock = _file_locks[filename] = threading.RLock()
+        return lock
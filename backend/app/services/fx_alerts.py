@@ -0,0 +1,338 @@
+"""
+FX rate alerts.
+
+Users register one-shot alerts on the INR→EUR rate instead of re-polling
+/fx:
+
+  • threshold  — rate goes above / below a fixed value;
+  • move       — rate moves `value`% up / down / either way from the rate
+                 when the alert was set (stored as a fixed threshold);
+  • percentile — the current rate ranks in the top / bottom band of the
+                 last `window` points (e.g. above the 90th percentile).
+
+Alerts fire on a crossing, not on a state: an alert whose condition the
+current value already meets when it is created (e.g. "above 0.0110" while
+the rate is 0.0112) starts disarmed, and only arms once a point lands back
+on the other side of its threshold. The next crossing after that fires it.
+
+Every alert reduces to a number compared against one value per rate
+point, so alerts are kept in sorted lists rather than scanned:
+
+  _above / _below                 (rate threshold, alert id)
+  _pct_above[w] / _pct_below[w]   (percentile threshold, alert id), per window
+  _rearm_above[s] / _rearm_below[s]
+                                  disarmed alerts, waiting for the value
+                                  (s = None for the rate, or a window) to
+                                  move strictly above / below their threshold
+
+When a point arrives, one bisect on each list finds every alert it
+crosses — a prefix of the "above" list, a suffix of the "below" list — and
+that slice is cut out. "Either way" move alerts sit in both lists; the
+copy left behind after the other side fires is skipped lazily, as are
+deleted alerts.
+
+Alerts, arms and triggers are an append-only log in fx_alerts.jsonl.
+Notifications go through a pluggable notifier (`set_notifier`); the
+default InMemoryNotifier keeps the recent ones for GET
+/fx/alerts/notifications.
+"""
+
+import threading
+import uuid
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from datetime import datetime
+from typing import Optional
+from app.services import fx_analytics
+from app.services.data_loader import load_jsonl, append_jsonl, file_lock
+
+
+ALERTS_FILE = "fx_alerts.jsonl"
+KINDS = ("threshold", "move", "percentile")
+DIRECTIONS = {"threshold": ("above", "below"), "move": ("above", "below", "either"), "percentile": ("above", "below")}
+
+_lock = threading.RLock()
+_alerts: dict[str, dict] = {}
+_above: list[tuple[float, str]] = []
+_below: list[tuple[float, str]] = []
+_pct_above: dict[int, list[tuple[float, str]]] = {}
+_pct_below: dict[int, list[tuple[float, str]]] = {}
+_rearm_above: dict[Optional[int], list[tuple[float, str]]] = {}
+_rearm_below: dict[Optional[int], list[tuple[float, str]]] = {}
+_loaded = False
+
+
+# ──────────────── Notifiers ────────────────
+
+
+class InMemoryNotifier:
+    """Keeps the most recent notifications in memory (the default, and the stand-in for tests)."""
+
+    def __init__(self, capacity: int = 200):
+        self.sent: deque = deque(maxlen=capacity)
+
+    def send(self, notification: dict) -> None:
+        self.sent.appendleft(notification)
+
+    def recent(self, limit: int = 20) -> list[dict]:
+        return list(self.sent)[:limit]
+
+
+_notifier = InMemoryNotifier()
+
+
+def set_notifier(notifier) -> None:
+    """Swap the delivery channel — anything with a `send(notification)` method."""
+    global _notifier
+    _notifier = notifier
+
+
+def notifier():
+    return _notifier
+
+
+# ──────────────── Index ────────────────
+
+
+def _scope(alert: dict) -> Optional[int]:
+    """What an alert is compared against: None for the rate, else its percentile window."""
+    return alert["window"] if alert["kind"] == "percentile" else None
+
+
+def _bounds(alert: dict) -> tuple[float, float]:
+    if alert["kind"] == "percentile":
+        return alert["value"], alert["value"]
+    return alert["threshold"], alert.get("lowerThreshold", alert["threshold"])
+
+
+def _index(alert: dict) -> None:
+    upper, lower = _bounds(alert)
+    if not alert.get("armed", True):
+        # Already past its threshold: wait for the value to come back first
+        if alert["direction"] == "above":
+            insort(_rearm_below.setdefault(_scope(alert), []), (upper, alert["id"]))
+        else:
+            insort(_rearm_above.setdefault(_scope(alert), []), (lower, alert["id"]))
+        return
+    if alert["kind"] == "percentile":
+        above = _pct_above.setdefault(alert["window"], [])
+        below = _pct_below.setdefault(alert["window"], [])
+    else:
+        above, below = _above, _below
+    if alert["direction"] in ("above", "either"):
+        insort(above, (upper, alert["id"]))
+    if alert["direction"] in ("below", "either"):
+        insort(below, (lower, alert["id"]))
+
+
+def _apply(record: dict) -> None:
+    op = record.get("op")
+    if op == "add":
+        alert = {k: v for k, v in record.items() if k != "op"}
+        _alerts[alert["id"]] = alert
+        if alert["status"] == "active":
+            _index(alert)
+    elif op == "arm" and record["id"] in _alerts:
+        alert = _alerts[record["id"]]
+        if not alert.get("armed", True) and alert["status"] == "active":
+            alert.update(armed=True, armedAt=record["at"])
+            _index(alert)
+    elif op == "trigger" and record["id"] in _alerts:
+        _alerts[record["id"]].update(status="triggered", triggeredAt=record["at"], triggeredRate=record["rate"])
+    elif op == "delete":
+        _alerts.pop(record["id"], None)
+
+
+def _ensure_loaded() -> None:
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if _loaded:
+            return
+        for record in load_jsonl(ALERTS_FILE):
+            _apply(record)
+        _loaded = True
+
+
+def _cut_above(entries: list[tuple[float, str]], value: float) -> list[str]:
+    """Ids with threshold <= value (a prefix), removed from the list."""
+    k = bisect_right(entries, value, key=lambda e: e[0])
+    hits = [alert_id for _, alert_id in entries[:k]]
+    del entries[:k]
+    return hits
+
+
+def _cut_below(entries: list[tuple[float, str]], value: float) -> list[str]:
+    """Ids with threshold >= value (a suffix), removed from the list."""
+    k = bisect_left(entries, value, key=lambda e: e[0])
+    hits = [alert_id for _, alert_id in entries[k:]]
+    del entries[k:]
+    return hits
+
+
+def _cut_strictly_above(entries: list[tuple[float, str]], value: float) -> list[str]:
+    """Ids with threshold < value (a prefix) — the value has risen past them."""
+    k = bisect_left(entries, value, key=lambda e: e[0])
+    hits = [alert_id for _, alert_id in entries[:k]]
+    del entries[:k]
+    return hits
+
+
+def _cut_strictly_below(entries: list[tuple[float, str]], value: float) -> list[str]:
+    """Ids with threshold > value (a suffix) — the value has dropped past them."""
+    k = bisect_right(entries, value, key=lambda e: e[0])
+    hits = [alert_id for _, alert_id in entries[k:]]
+    del entries[k:]
+    return hits
+
+
+# ──────────────── API ────────────────
+
+
+def create(kind: str, direction: str, value: float, window: int = fx_analytics.DEFAULT_WINDOW, label: str = "") -> dict:
+    """Register an alert. Raises ValueError on bad input."""
+    _ensure_loaded()
+    if kind not in KINDS:
+        raise ValueError(f"Alert type must be one of: {', '.join(KINDS)}")
+    if direction not in DIRECTIONS[kind]:
+        raise ValueError(f"Direction for a {kind} alert must be one of: {', '.join(DIRECTIONS[kind])}")
+    rate = fx_analytics.current_rate()
+
+    alert = {
+        "id": f"fxa-{uuid.uuid4().hex[:8]}",
+        "kind": kind,
+        "direction": direction,
+        "value": value,
+        "label": label,
+        "status": "active",
+        "createdAt": datetime.now().isoformat(),
+        "rateAtCreation": rate,
+    }
+    if kind == "threshold":
+        if value <= 0:
+            raise ValueError("Threshold must be a positive rate")
+        alert["threshold"] = value
+    elif kind == "move":
+        if value <= 0 or rate is None:
+            raise ValueError("Move must be a positive percentage (and a current rate must exist)")
+        up, down = rate * (1 + value / 100), rate * (1 - value / 100)
+        alert["threshold"] = up if direction in ("above", "either") else down
+        if direction == "either":
+            alert["lowerThreshold"] = down
+    else:
+        if not 0 < value < 100:
+            raise ValueError("Percentile must be between 0 and 100")
+        alert["window"] = window
+
+    # Which side of the threshold the value is on now: an alert that is
+    # already met only arms once the value crosses back
+    if kind == "percentile":
+        current = fx_analytics.analytics(window).get("percentile") if rate is not None else None
+    else:
+        current = rate
+    alert["valueAtCreation"] = current
+    upper, lower = _bounds(alert)
+    if current is None or direction == "either":
+        alert["armed"] = True
+    elif direction == "above":
+        alert["armed"] = current < upper
+    else:
+        alert["armed"] = current > lower
+
+    with _lock:
+        with file_lock(ALERTS_FILE):
+            append_jsonl(ALERTS_FILE, [{"op": "add", **alert}])
+        _apply({"op": "add", **alert})
+    return alert
+
+
+def delete(alert_id: str) -> bool:
+    _ensure_loaded()
+    with _lock:
+        if alert_id not in _alerts:
+            return False
+        with file_lock(ALERTS_FILE):
+            append_jsonl(ALERTS_FILE, [{"op": "delete", "id": alert_id}])
+        _apply({"op": "delete", "id": alert_id})
+        return True
+
+
+def alerts(status: Optional[str] = None) -> list[dict]:
+    _ensure_loaded()
+    with _lock:
+        rows = [a for a in _alerts.values() if status is None or a["status"] == status]
+    return sorted(rows, key=lambda a: a["createdAt"], reverse=True)
+
+
+def evaluate() -> list[dict]:
+    """Fire every active alert the latest rate point crosses. Call after each new point."""
+    _ensure_loaded()
+    rate = fx_analytics.current_rate()
+    if rate is None:
+        return []
+    with _lock:
+        candidates = _cut_above(_above, rate) + _cut_below(_below, rate)
+        for window in list(_pct_above):
+            percentile = fx_analytics.analytics(window).get("percentile", 0.0)
+            candidates += _cut_above(_pct_above[window], percentile)
+            candidates += _cut_below(_pct_below[window], percentile)
+
+        now = datetime.now().isoformat()
+        fired = []
+        for alert_id in dict.fromkeys(candidates):
+            alert = _alerts.get(alert_id)
+            if alert is None or alert["status"] != "active" or not alert.get("armed", True):
+                continue
+            record = {"op": "trigger", "id": alert_id, "rate": rate, "at": now}
+            fired.append(record)
+            _apply(record)
+
+        # Disarmed alerts whose value came back across the threshold arm for the next crossing
+        arming = []
+        for scope in set(_rearm_above) | set(_rearm_below):
+            value = rate if scope is None else fx_analytics.analytics(scope).get("percentile", 0.0)
+            for alert_id in _cut_strictly_above(_rearm_above.get(scope, []), value) + _cut_strictly_below(_rearm_below.get(scope, []), value):
+                alert = _alerts.get(alert_id)
+                if alert is None or alert["status"] != "active" or alert.get("armed", True):
+                    continue
+                record = {"op": "arm", "id": alert_id, "at": now}
+                arming.append(record)
+                _apply(record)
+
+        if fired or arming:
+            with file_lock(ALERTS_FILE):
+                append_jsonl(ALERTS_FILE, fired + arming)
+
+    triggered = [dict(_alerts[r["id"]]) for r in fired]
+    for alert in triggered:
+        _notify(alert)
+    return triggered
+
+
+def _describe(alert: dict) -> str:
+    rate = alert["triggeredRate"]
+    if alert["kind"] == "threshold":
+        return f"₹→€ is {rate} — {alert['direction']} your target of {alert['value']}"
+    if alert["kind"] == "move":
+        start = alert["rateAtCreation"]
+        change = (rate - start) / start * 100 if start else 0.0
+        return f"₹→€ moved {change:+.2f}% since you set this alert (now {rate})"
+    side = "top" if alert["direction"] == "above" else "bottom"
+    band = 100 - alert["value"] if alert["direction"] == "above" else alert["value"]
+    return f"₹→€ at {rate} is in the {side} {band:g}% of the last {alert['window']} days"
+
+
+def _notify(alert: dict) -> None:
+    notification = {
+        "alertId": alert["id"],
+        "label": alert["label"],
+        "message": _describe(alert),
+        "rate": alert["triggeredRate"],
+        "at": alert["triggeredAt"],
+    }
+    try:
+        _notifier.send(notification)
+        print(f"[FX Alerts] {alert['id']} triggered — {notification['message']}")
+    except Exception as e:
+        print(f"[FX Alerts] Notifier failed for {alert['id']}: {e}")
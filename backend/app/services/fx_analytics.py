@@ -0,0 +1,245 @@
+"""
+FX rate series and analytics.
+
+fx_rates.json seeds the INR→EUR series; new rate points are appended to
+fx_rate_points.jsonl (POST /fx/rates), so the series grows without
+rewriting the seed file.
+
+The series lives in NumPy arrays (capacity doubles as it grows) along with
+running prefix sums of the rates and of the daily log returns and their
+squares. Appending a point is O(1), and any rolling mean or volatility is
+two lookups into a prefix sum. The analytics for the most recently used
+windows (up to MAX_CACHED_WINDOWS, LRU) are cached until the next point
+arrives:
+
+  • rolling 7- and 30-point means (and the series of both over the window);
+  • volatility — std of daily log returns over the window, plus annualised;
+  • percentile rank of the current rate within the window;
+  • momentum — 7-point mean vs 30-point mean, with an up/down/flat signal;
+  • bestTimeToTransfer, derived from the above instead of a fixed string.
+"""
+
+import math
+import threading
+import numpy as np
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Optional
+from app.services.data_loader import load_json, load_jsonl, append_jsonl, file_lock
+
+
+SEED_FILE = "fx_rates.json"
+POINTS_FILE = "fx_rate_points.jsonl"
+SHORT_WINDOW = 7
+LONG_WINDOW = 30
+MOMENTUM_THRESHOLD = 0.005     # 0.5% between the short and long means
+DEFAULT_WINDOW = 30
+MAX_CACHED_WINDOWS = 16
+
+_lock = threading.RLock()
+_meta: dict = {}
+_size = 0
+_days = np.zeros(0, dtype=np.int64)          # date ordinals, ascending
+_rates = np.zeros(0)
+_rate_sums = np.zeros(1)                     # _rate_sums[k] = sum of the first k rates
+_ret_sums = np.zeros(1)                      # same for log returns (return k is rates[k] / rates[k-1])
+_ret_sq_sums = np.zeros(1)
+_version = 0
+_cache: "OrderedDict[int, dict]" = OrderedDict()   # window → analytics, LRU order
+_loaded = False
+
+
+# ──────────────── Series ────────────────
+
+
+def _grow(needed: int) -> None:
+    global _days, _rates, _rate_sums, _ret_sums, _ret_sq_sums
+    capacity = max(needed, 2 * len(_rates), 64)
+    _days = np.resize(_days, capacity)
+    _rates = np.resize(_rates, capacity)
+    _rate_sums = np.resize(_rate_sums, capacity + 1)
+    _ret_sums = np.resize(_ret_sums, capacity + 1)
+    _ret_sq_sums = np.resize(_ret_sq_sums, capacity + 1)
+
+
+def _push(day: int, rate: float) -> None:
+    global _size
+    if _size + 1 > len(_rates):
+        _grow(_size + 1)
+    i = _size
+    _days[i] = day
+    _rates[i] = rate
+    _rate_sums[i + 1] = _rate_sums[i] + rate
+    r = math.log(rate / _rates[i - 1]) if i > 0 and _rates[i - 1] > 0 else 0.0
+    _ret_sums[i + 1] = _ret_sums[i] + r
+    _ret_sq_sums[i + 1] = _ret_sq_sums[i] + r * r
+    _size += 1
+
+
+def _reset(points: list[tuple[int, float]]) -> None:
+    global _size
+    _size = 0
+    _rate_sums[0] = _ret_sums[0] = _ret_sq_sums[0] = 0.0
+    for day, rate in points:
+        _push(day, rate)
+
+
+def _ensure_loaded() -> None:
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if _loaded:
+            return
+        seed = load_json(SEED_FILE)
+        _meta.update({k: v for k, v in seed.items() if k != "historicalRates"})
+        points = {date.fromisoformat(p["date"]).toordinal(): p["rate"] for p in seed.get("historicalRates", [])}
+        for p in load_jsonl(POINTS_FILE):
+            points[date.fromisoformat(p["date"]).toordinal()] = p["rate"]
+            _meta["lastUpdated"] = p.get("at", _meta.get("lastUpdated"))
+        _reset(sorted(points.items()))
+        _loaded = True
+
+
+def add_rate(day: str, rate: float) -> dict:
+    """Append a rate point (a later point for the same day replaces it)."""
+    global _version
+    _ensure_loaded()
+    ordinal = date.fromisoformat(day).toordinal()
+    record = {"date": day, "rate": rate, "at": datetime.now().isoformat()}
+    with _lock:
+        with file_lock(POINTS_FILE):
+            append_jsonl(POINTS_FILE, [record])
+        if _size and ordinal <= _days[_size - 1]:
+            # Back-dated or same-day correction: rebuild the prefix sums
+            points = dict(zip(_days[:_size].tolist(), _rates[:_size].tolist()))
+            points[ordinal] = rate
+            _reset(sorted(points.items()))
+        else:
+            _push(ordinal, rate)
+        _meta["lastUpdated"] = record["at"]
+        _version += 1
+        _cache.clear()
+    return record
+
+
+def series() -> tuple[np.ndarray, np.ndarray]:
+    """(date ordinals, rates), ascending."""
+    _ensure_loaded()
+    with _lock:
+        return _days[:_size].copy(), _rates[:_size].copy()
+
+
+def version() -> int:
+    """Bumps on every appended rate point."""
+    _ensure_loaded()
+    return _version
+
+
+def current_rate() -> Optional[float]:
+    _ensure_loaded()
+    return float(_rates[_size - 1]) if _size else None
+
+
+# ──────────────── Analytics ────────────────
+
+
+def _mean(end: int, window: int) -> float:
+    start = max(0, end - window)
+    return float((_rate_sums[end] - _rate_sums[start]) / (end - start))
+
+
+def _volatility(window: int) -> float:
+    """Std of daily log returns over the last `window` points."""
+    end = _size
+    start = max(1, end - window + 1)     # return k needs point k - 1
+    n = end - start
+    if n < 2:
+        return 0.0
+    s = _ret_sums[end] - _ret_sums[start]
+    sq = _ret_sq_sums[end] - _ret_sq_sums[start]
+    return math.sqrt(max(sq / n - (s / n) ** 2, 0.0) * n / (n - 1))
+
+
+def _rolling(values: np.ndarray, sums: np.ndarray, window: int, start: int) -> np.ndarray:
+    ends = np.arange(start + 1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (sums[ends] - sums[starts]) / (ends - starts)
+
+
+def _advice(rate: float, long_mean: float, percentile: float, signal: str) -> str:
+    gap = (rate - long_mean) / long_mean * 100 if long_mean else 0.0
+    if gap >= 1 and percentile >= 70:
+        return f"Transfer now — rate is {gap:.1f}% above the 30-day average"
+    if gap <= -1:
+        tail = " and still falling" if signal == "down" else ""
+        return f"Hold off — rate is {-gap:.1f}% below the 30-day average{tail}"
+    if signal == "up":
+        return "Rate is near its 30-day average but climbing — waiting a few days may pay off"
+    return "Rate is near its 30-day average — transfer if you need to, no rush"
+
+
+def _compute(window: int) -> dict:
+    if not _size:
+        return {"window": window, "points": 0}
+    end = _size
+    rate = float(_rates[end - 1])
+    start = max(0, end - window)
+    in_window = _rates[start:end]
+
+    short_mean = _mean(end, SHORT_WINDOW)
+    long_mean = _mean(end, LONG_WINDOW)
+    percentile = float(np.searchsorted(np.sort(in_window), rate, side="right") / len(in_window) * 100)
+    momentum = (short_mean - long_mean) / long_mean if long_mean else 0.0
+    signal = "up" if momentum > MOMENTUM_THRESHOLD else "down" if momentum < -MOMENTUM_THRESHOLD else "flat"
+    daily_vol = _volatility(window)
+
+    short_series = _rolling(_rates[:end], _rate_sums, SHORT_WINDOW, start)
+    long_series = _rolling(_rates[:end], _rate_sums, LONG_WINDOW, start)
+    return {
+        "base": _meta.get("baseCurrency"),
+        "target": _meta.get("targetCurrency"),
+        "currentRate": rate,
+        "asOf": date.fromordinal(int(_days[end - 1])).isoformat(),
+        "window": window,
+        "points": len(in_window),
+        "rolling": {"mean7": round(short_mean, 6), "mean30": round(long_mean, 6)},
+        "vsMean30Pct": round((rate - long_mean) / long_mean * 100, 2) if long_mean else 0.0,
+        "volatility": {"daily": round(daily_vol * 100, 3), "annualized": round(daily_vol * math.sqrt(365) * 100, 2)},
+        "percentile": round(percentile, 1),
+        "range": {"min": float(in_window.min()), "max": float(in_window.max())},
+        "momentum": {"value": round(momentum * 100, 3), "signal": signal},
+        "bestTimeToTransfer": _advice(rate, long_mean, percentile, signal),
+        "series": [
+            {"date": date.fromordinal(int(d)).isoformat(), "rate": float(r), "mean7": round(float(s), 6), "mean30": round(float(l), 6)}
+            for d, r, s, l in zip(_days[start:end], in_window, short_series, long_series)
+        ],
+    }
+
+
+def analytics(window: int = DEFAULT_WINDOW) -> dict:
+    """Rolling stats over the last `window` points, cached until the next rate point."""
+    _ensure_loaded()
+    with _lock:
+        cached = _cache.get(window)
+        if cached is None:
+            cached = _cache[window] = _compute(window)
+            if len(_cache) > MAX_CACHED_WINDOWS:
+                _cache.popitem(last=False)
+        else:
+            _cache.move_to_end(window)
+        return cached
+
+
+def snapshot() -> dict:
+    """fx_rates.json shape with the live series, current rate and derived transfer advice."""
+    _ensure_loaded()
+    with _lock:
+        days, rates = _days[:_size], _rates[:_size]
+        history = [{"date": date.fromordinal(int(d)).isoformat(), "rate": float(r)} for d, r in zip(days, rates)]
+        meta = dict(_meta)
+    stats = analytics()
+    meta["currentRate"] = stats.get("currentRate", meta.get("currentRate"))
+    meta["bestTimeToTransfer"] = stats.get("bestTimeToTransfer", meta.get("bestTimeToTransfer"))
+    meta["historicalRates"] = history
+    return meta
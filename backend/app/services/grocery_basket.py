@@ -0,0 +1,141 @@
+"""
+Shopping-basket planner.
+
+Resolves a shopping list against the grocery index, then prices it on the
+catalog's items × stores matrix:
+
+  • single store — the row sums of the basket's price matrix give every
+    store's total in one vector op;
+  • split — the cheapest set of at most `max_stores` stores, where each
+    item is bought wherever it is cheapest within the set and every store
+    after the first adds `store_penalty` (the cost of the extra trip).
+
+The split search is a depth-first walk over store subsets, cheapest
+single-store totals first. Each node carries the basket's per-item minimum
+over its chosen stores, so extending by every candidate store is one
+np.minimum over a (basket × candidates) block. A branch is pruned when even
+the per-item minimum over all of its remaining stores, plus the penalty
+for one more trip, can't beat the best plan found so far.
+
+`max_stores` is clamped to [1, number of stores] (and the API caps it at
+MAX_STORES), so the walk never explores more subsets than the catalog has.
+Items no store stocks are reported in `unstocked` and left out of both
+plans, so one missing item doesn't sink the rest of the list.
+"""
+
+import math
+import numpy as np
+from typing import Optional
+from app.services import grocery_index
+
+
+MAX_STORES = 5
+
+
+def _best_split(prices: np.ndarray, max_stores: int, penalty: float) -> tuple[float, list[int]]:
+    """Cheapest (cost incl. penalties, store columns) using at most `max_stores` stores."""
+    n_stores = prices.shape[1]
+    order = np.argsort(prices.sum(axis=0), kind="stable")
+    ordered = prices[:, order]
+    # suffix_min[j] = per-item minimum over stores order[j:]
+    suffix_min = np.minimum.accumulate(ordered[:, ::-1], axis=1)[:, ::-1]
+
+    best_cost = math.inf
+    best_set: list[int] = []
+
+    def walk(start: int, chosen: list[int], current: np.ndarray) -> None:
+        nonlocal best_cost, best_set
+        if chosen:
+            cost = float(current.sum()) + penalty * (len(chosen) - 1)
+            if cost < best_cost:
+                best_cost, best_set = cost, list(chosen)
+        if len(chosen) == max_stores or start == n_stores:
+            return
+        bound = float(np.minimum(current, suffix_min[:, start]).sum()) + penalty * len(chosen)
+        if bound >= best_cost:
+            return
+        extended = np.minimum(current[:, None], ordered[:, start:])
+        for offset in range(n_stores - start):
+            walk(start + offset + 1, chosen + [start + offset], extended[:, offset])
+
+    walk(0, [], np.full(prices.shape[0], np.inf))
+    return best_cost, [int(order[j]) for j in best_set]
+
+
+def _lines(rows: list[dict], prices: np.ndarray, stores: list[str], columns: list[int]) -> list[dict]:
+    sub = prices[:, columns]
+    picks = sub.argmin(axis=1)
+    return [
+        {
+            **row,
+            "store": stores[columns[pick]],
+            "unitPrice": round(float(sub[k, pick]) / row["qty"], 2),
+            "lineTotal": round(float(sub[k, pick]), 2),
+        }
+        for k, (row, pick) in enumerate(zip(rows, picks))
+    ]
+
+
+def plan(shopping_list: list[dict], max_stores: int = 2, store_penalty: float = 0.0) -> dict:
+    """Cheapest single-store and split plans for [{"name", "qty"}, …]."""
+    stores, matrix, _ = grocery_index.price_matrix()
+    items = grocery_index.items()
+
+    rows: list[dict] = []
+    indexes: list[int] = []
+    quantities: list[int] = []
+    unmatched: list[str] = []
+    for entry in shopping_list:
+        hits = grocery_index.search_rows(entry["name"], 1)
+        if not hits:
+            unmatched.append(entry["name"])
+            continue
+        item = items[hits[0]]
+        qty = max(int(entry.get("qty", 1)), 1)
+        rows.append({"query": entry["name"], "id": item["id"], "name": item["name"], "emoji": item.get("emoji", ""), "qty": qty})
+        indexes.append(hits[0])
+        quantities.append(qty)
+
+    result: dict = {
+        "matched": len(rows),
+        "unmatched": unmatched,
+        "unstocked": [],
+        "singleStore": None,
+        "split": None,
+        "storeTotals": {},
+    }
+    if not rows:
+        return result
+
+    prices = matrix[indexes] * np.array(quantities, dtype=float)[:, None]
+    # Plan what can be bought; report what no store stocks
+    stocked = np.isfinite(prices).any(axis=1)
+    if not stocked.all():
+        result["unstocked"] = [row["name"] for row, ok in zip(rows, stocked) if not ok]
+        rows = [row for row, ok in zip(rows, stocked) if ok]
+        prices = prices[stocked]
+        if not rows:
+            return result
+
+    totals = prices.sum(axis=0)
+    result["storeTotals"] = {store: (round(float(t), 2) if np.isfinite(t) else None) for store, t in zip(stores, totals)}
+
+    single: Optional[dict] = None
+    if np.isfinite(totals).any():
+        j = int(np.argmin(totals))
+        single = {"stores": [stores[j]], "total": round(float(totals[j]), 2), "lines": _lines(rows, prices, stores, [j])}
+    result["singleStore"] = single
+
+    cost, columns = _best_split(prices, min(max(1, max_stores), len(stores)), max(0.0, store_penalty))
+    if math.isfinite(cost):
+        items_total = float(prices[:, columns].min(axis=1).sum())
+        penalty = max(0.0, store_penalty) * (len(columns) - 1)
+        result["split"] = {
+            "stores": [stores[j] for j in columns],
+            "itemsTotal": round(items_total, 2),
+            "storePenalty": round(penalty, 2),
+            "total": round(items_total + penalty, 2),
+            "savingsVsSingleStore": round(single["total"] - (items_total + penalty), 2) if single else None,
+            "lines": _lines(rows, prices, stores, columns),
+        }
+    return result
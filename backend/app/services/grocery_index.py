@@ -0,0 +1,250 @@
+"""
+Fuzzy grocery search.
+
+Replaces the substring scan over every item name. grocery_prices.json is
+indexed once at load, and again whenever the file's mtime changes:
+
+  • terms — normalised words from each item's name (weight 1.0) and
+    category (weight 0.5); plurals are folded ("eggs" → "egg") and
+    accents stripped;
+  • postings — term → {item index: weight};
+  • vocabulary — sorted, for prefix lookups ("tom" → "tomato");
+  • trigrams — trigram → vocabulary terms, for typo tolerance
+    ("yoghurt" ≈ "yogurt", "bred" ≈ "bread");
+  • a price matrix — items × stores (inf where a store doesn't stock the
+    item) plus on-sale flags, for basket planning and price stats.
+
+Queries only touch the vocabulary (far smaller than the catalog) and the
+postings of matched terms, which are NumPy arrays, so scoring is a few
+vector ops per matched term rather than a Python loop over items. Items
+are ranked by how many query words they match, then by summed
+similarity × field weight.
+"""
+
+import re
+import threading
+import numpy as np
+import unicodedata
+from bisect import bisect_left
+from typing import Optional
+from app.services.data_loader import load_json, file_mtime
+
+
+GROCERY_FILE = "grocery_prices.json"
+NAME_WEIGHT = 1.0
+CATEGORY_WEIGHT = 0.5
+PREFIX_SIMILARITY = 0.8
+MIN_SIMILARITY = 0.45
+MAX_TYPOS = 2
+
+TOKEN_RE = re.compile(r"[a-z]+")
+
+_lock = threading.RLock()
+_items: list[dict] = []
+_postings: dict[str, tuple[np.ndarray, np.ndarray]] = {}   # term → (item indexes, weights)
+_vocab: list[str] = []
+_trigrams: dict[str, set[str]] = {}
+_gram_counts: dict[str, int] = {}
+_stores: list[str] = []
+_prices = np.zeros((0, 0))                 # items × stores, inf where a store doesn't stock it
+_on_sale = np.zeros((0, 0), dtype=bool)
+_mtime: Optional[int] = None
+
+
+# ──────────────── Normalising ────────────────
+
+
+def _fold(text: str) -> str:
+    return unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode()
+
+
+def _stem(word: str) -> str:
+    """Cheap plural folding: berries → berry, tomatoes → tomato, eggs → egg."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("oes"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def terms(text: str) -> list[str]:
+    return [_stem(w) for w in TOKEN_RE.findall(_fold(text))]
+
+
+def _grams(term: str) -> set[str]:
+    padded = f"^{term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ──────────────── Building ────────────────
+
+
+def _build(items: list[dict]) -> None:
+    _items[:] = items
+    _postings.clear()
+    _trigrams.clear()
+    _gram_counts.clear()
+    postings: dict[str, dict[int, float]] = {}
+    for i, item in enumerate(items):
+        for field, weight in ((item.get("name", ""), NAME_WEIGHT), (item.get("category", ""), CATEGORY_WEIGHT)):
+            for term in terms(field):
+                docs = postings.setdefault(term, {})
+                docs[i] = max(docs.get(i, 0.0), weight)
+    for term, docs in postings.items():
+        _postings[term] = (
+            np.fromiter(docs.keys(), dtype=np.int32, count=len(docs)),
+            np.fromiter(docs.values(), dtype=np.float32, count=len(docs)),
+        )
+    _vocab[:] = sorted(_postings)
+    _build_matrix(items)
+    for term in _vocab:
+        grams = _grams(term)
+        _gram_counts[term] = len(grams)
+        for gram in grams:
+            _trigrams.setdefault(gram, set()).add(term)
+
+
+def _build_matrix(items: list[dict]) -> None:
+    global _prices, _on_sale
+    _stores[:] = sorted({s["store"] for item in items for s in item.get("stores", [])})
+    column = {store: j for j, store in enumerate(_stores)}
+    _prices = np.full((len(items), len(_stores)), np.inf)
+    _on_sale = np.zeros((len(items), len(_stores)), dtype=bool)
+    for i, item in enumerate(items):
+        for entry in item.get("stores", []):
+            _prices[i, column[entry["store"]]] = entry["price"]
+            _on_sale[i, column[entry["store"]]] = bool(entry.get("onSale"))
+
+
+def _ensure_fresh() -> None:
+    global _mtime
+    mtime = file_mtime(GROCERY_FILE)
+    if mtime == _mtime:
+        return
+    with _lock:
+        if mtime == _mtime:
+            return
+        _build(load_json(GROCERY_FILE)["items"])
+        _mtime = mtime
+
+
+def items() -> list[dict]:
+    """The current catalog (refreshed if the file changed)."""
+    _ensure_fresh()
+    return _items
+
+
+def version() -> Optional[int]:
+    """Changes whenever the catalog is rebuilt (the file's mtime)."""
+    _ensure_fresh()
+    return _mtime
+
+
+def price_matrix() -> tuple[list[str], np.ndarray, np.ndarray]:
+    """(stores, prices, on_sale) with one row per catalog item, in items() order."""
+    _ensure_fresh()
+    with _lock:
+        return list(_stores), _prices, _on_sale
+
+
+# ──────────────── Querying ────────────────
+
+
+def _typos(a: str, b: str, cap: int) -> int:
+    """Levenshtein distance between a and b, giving up (returning cap + 1) past `cap`."""
+    if abs(len(a) - len(b)) > cap:
+        return cap + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > cap:
+            return cap + 1
+        prev = cur
+    return prev[-1]
+
+
+def _candidates(word: str) -> dict[str, float]:
+    """Vocabulary terms close to `word`, with a similarity in (0, 1]."""
+    found: dict[str, float] = {}
+    if word in _postings:
+        found[word] = 1.0
+
+    i = bisect_left(_vocab, word)
+    while i < len(_vocab) and _vocab[i].startswith(word):
+        found.setdefault(_vocab[i], PREFIX_SIMILARITY)
+        i += 1
+
+    if len(word) >= 3:
+        grams = _grams(word)
+        shared: dict[str, int] = {}
+        for gram in grams:
+            for term in _trigrams.get(gram, ()):
+                shared[term] = shared.get(term, 0) + 1
+        # One typo in a short word breaks most of its trigrams, so short
+        # words fall back to edit distance
+        cap = 1 if len(word) <= 5 else MAX_TYPOS
+        for term, common in shared.items():
+            if term in found:
+                continue
+            dice = 2 * common / (len(grams) + _gram_counts[term])
+            typos = _typos(word, term, cap)
+            if dice < MIN_SIMILARITY and typos > cap:
+                continue
+            found[term] = min(max(dice, 1 - typos / max(len(word), len(term))), 0.95)
+    return found
+
+
+def search(query: str, limit: Optional[int] = None) -> list[dict]:
+    """Items matching `query`, best first."""
+    return [_items[i] for i in search_rows(query, limit)]
+
+
+def _score(words: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Per item: how many of `words` it matches, and the summed match score."""
+    n = len(_items)
+    coverage = np.zeros(n, dtype=np.int32)
+    scores = np.zeros(n, dtype=np.float32)
+    for word in words:
+        best = np.zeros(n, dtype=np.float32)
+        for term, similarity in _candidates(word).items():
+            idx, weights = _postings[term]
+            best[idx] = np.maximum(best[idx], similarity * weights)
+        coverage += best > 0
+        scores += best
+    return coverage, scores
+
+
+def search_rows(query: str, limit: Optional[int] = None) -> list[int]:
+    """Like search(), but returns catalog row numbers (for price_matrix())."""
+    _ensure_fresh()
+    words = list(dict.fromkeys(terms(query)))
+    if not words:
+        return []
+    with _lock:
+        coverage, scores = _score(words)
+        hits = np.flatnonzero(coverage)
+        # Coverage first, then score: scores are < len(words) + 1, so this key is lexicographic
+        key = coverage[hits] * (len(words) + 1) + scores[hits]
+        if limit is not None and limit < len(hits):
+            top = np.argpartition(-key, limit - 1)[:limit]
+            hits, key = hits[top], key[top]
+        return hits[np.lexsort((hits, -key))].tolist()
+
+
+def best_match(query: str) -> Optional[tuple[dict, float]]:
+    """The single best item for `query` and a confidence in [0, 1]
+    (average per-word match score), or None if nothing matches."""
+    _ensure_fresh()
+    words = list(dict.fromkeys(terms(query)))
+    if not words:
+        return None
+    with _lock:
+        coverage, scores = _score(words)
+        if not coverage.any():
+            return None
+        row = int(np.argmax(coverage * (len(words) + 1) + scores))
+        return _items[row], float(scores[row]) / len(words)
@@ -0,0 +1,98 @@
+"""
+Grocery price statistics.
+
+A derived table over the grocery index's items × stores price matrix,
+rebuilt with NumPy only when grocery_prices.json changes (the index tracks
+its mtime), instead of every insight or chat reply re-walking the raw
+store arrays:
+
+  • per item — min / max / mean price, spread, cheapest store, stores
+    with a sale on;
+  • per store — how many items it's cheapest for, how many it has on
+    sale, and a basket index: the store's total for every item all stores
+    stock, relative to buying each at its cheapest (100 = always cheapest).
+"""
+
+import threading
+import numpy as np
+from datetime import datetime
+from typing import Optional
+from app.services import grocery_index
+
+
+_lock = threading.RLock()
+_table: Optional[dict] = None
+_built_for: Optional[int] = None
+
+
+def _build() -> dict:
+    stores, prices, on_sale = grocery_index.price_matrix()
+    items = grocery_index.items()
+    stocked = np.isfinite(prices)
+
+    # Per-item stats; rows no store stocks are skipped below
+    has_price = stocked.any(axis=1)
+    counts = np.maximum(stocked.sum(axis=1), 1)
+    lo = np.where(has_price, prices.min(axis=1), 0.0)
+    hi = np.where(has_price, np.where(stocked, prices, -np.inf).max(axis=1), 0.0)
+    mean = np.where(stocked, prices, 0.0).sum(axis=1) / counts
+    cheapest = np.argmin(prices, axis=1)
+    spread = hi - lo
+
+    rows = []
+    for i, item in enumerate(items):
+        if not has_price[i]:
+            continue
+        rows.append({
+            "id": item["id"],
+            "name": item["name"],
+            "emoji": item.get("emoji", ""),
+            "category": item.get("category", ""),
+            "prices": {stores[j]: float(prices[i, j]) for j in np.flatnonzero(stocked[i])},
+            "min": round(float(lo[i]), 2),
+            "max": round(float(hi[i]), 2),
+            "mean": round(float(mean[i]), 2),
+            "spread": round(float(spread[i]), 2),
+            "spreadPct": round(float(spread[i] / lo[i] * 100), 1) if lo[i] > 0 else 0.0,
+            "cheapestStore": stores[int(cheapest[i])],
+            "onSaleAt": [stores[j] for j in np.flatnonzero(on_sale[i])],
+        })
+
+    # Per-store basket index over items every store stocks
+    common = stocked.all(axis=1)
+    cheapest_total = float(lo[common].sum()) if common.any() else 0.0
+    store_rows = []
+    for j, store in enumerate(stores):
+        basket = float(prices[common, j].sum()) if common.any() else 0.0
+        store_rows.append({
+            "store": store,
+            "itemsStocked": int(stocked[:, j].sum()),
+            "cheapestFor": int(((cheapest == j) & has_price).sum()),
+            "onSale": int(on_sale[:, j].sum()),
+            "basketTotal": round(basket, 2),
+            "basketIndex": round(basket / cheapest_total * 100, 1) if cheapest_total else None,
+        })
+    store_rows.sort(key=lambda s: (s["basketIndex"] is None, s["basketIndex"]))
+
+    return {
+        "stores": store_rows,
+        "items": rows,
+        "basketItems": int(common.sum()),
+        "onSale": [r["id"] for r in rows if r["onSaleAt"]],
+        "builtAt": datetime.now().isoformat(),
+    }
+
+
+def table() -> dict:
+    """The stats table, rebuilt if the grocery file changed since the last build."""
+    global _table, _built_for
+    version = grocery_index.version()
+    if _table is not None and _built_for == version:
+        return _table
+    with _lock:
+        version = grocery_index.version()
+        if _table is None or _built_for != version:
+            _table = _build()
+            _built_for = version
+        return _table
+
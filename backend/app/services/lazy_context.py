@@ -0,0 +1,55 @@
+"""
+Lazy, scoped context mapping for the AI paths.
+
+A LazyContext is built per request from a registry of loaders (key →
+zero-arg callable) restricted to the keys the chosen template or LLM path
+declares. Nothing is read up front: a key's loader runs the first time it
+is accessed, its result is kept for the rest of the request, and the time
+it took is recorded in `timings` (ms). Undeclared keys behave as missing,
+so `ctx.get("x", default)` in a generator keeps working — it just can't
+pull in data the path didn't ask for.
+"""
+
+import time
+from collections.abc import Mapping
+from typing import Any, Callable, Iterable
+
+
+class LazyContext(Mapping):
+    def __init__(self, loaders: dict[str, Callable[[], Any]], keys: Iterable[str]):
+        self._loaders = {k: loaders[k] for k in keys if k in loaders}
+        self._values: dict[str, Any] = {}
+        self.timings: dict[str, float] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._values:
+            return self._values[key]
+        loader = self._loaders.get(key)
+        if loader is None:
+            raise KeyError(key)
+        start = time.perf_counter()
+        try:
+            value = loader()
+        except Exception as e:
+            print(f"[Context] Failed to load {key}: {e}")
+            value = None
+        self.timings[key] = round((time.perf_counter() - start) * 1000, 3)
+        self._values[key] = value
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # A key whose loader failed reads as missing, like the old try/except around load_json
+        value = self[key] if key in self._loaders else None
+        return default if value is None else value
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._loaders
+
+    def __iter__(self):
+        return iter(self._loaders)
+
+    def __len__(self) -> int:
+        return len(self._loaders)
+
+    def loaded(self) -> list[str]:
+        return list(self._values)
@@ -0,0 +1,265 @@
+"""
+Response cache for LLM calls (/chat and /ai/insights).
+
+Exact tier — the key is a SHA-256 over the model, call parameters, the
+full message list and the versions of the data the prompt was built from
+(data file mtimes plus today's date, since streaks and budgets roll over
+daily). Identical prompts on unchanged data are served from memory.
+
+Semantic tier (opt-in, LLM_CACHE_SEMANTIC=1) — for rewordings of the same
+question ("what's my budget?" / "whats my budget today", "how much budget
+do I have left today?" / "how much budget is left today"). The question is
+normalised to its content words (lowercased, punctuation and filler words
+dropped, plurals and -ing forms folded) and hashed into a fixed-size unit
+vector of words plus lower-weighted word pairs, so word order still counts
+("do I owe Alex" ≠ "does Alex owe me"). A hit needs the same scope
+(everything in the exact key except the question) and cosine similarity ≥
+SEMANTIC_THRESHOLD, checked with one matrix product per scope.
+
+The threshold is set from the labelled pairs in tests/test_llm_cache.py:
+rewordings score 1.0, and near misses that change one content word
+("coffee" / "groceries", "streak" / "longest streak") score 0.81 or less.
+A reworded question that adds a content word ("my friends" / "friends")
+scores about 0.85 and misses. That is deliberate: a miss only costs an LLM
+call, but a wrong hit returns the wrong answer.
+
+Entries expire after LLM_CACHE_TTL seconds and the least recently used are
+evicted beyond LLM_CACHE_SIZE. Entries are appended to llm_cache.jsonl and
+replayed on startup; the log is rewritten with just the live entries once
+it holds twice the capacity.
+
+`stats()` reports hits per tier, misses, hit rate and the LLM latency the
+hits saved (each entry remembers how long its original call took).
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+import numpy as np
+from collections import OrderedDict
+from datetime import date
+from typing import Callable, Optional
+from app.services.data_loader import load_jsonl, append_jsonl, truncate_jsonl, file_lock, file_mtime
+
+
+CACHE_FILE = "llm_cache.jsonl"
+TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL", "21600"))
+CAPACITY = int(os.getenv("LLM_CACHE_SIZE", "500"))
+ENABLED = os.getenv("LLM_CACHE", "on").lower() not in ("0", "off", "false")
+SEMANTIC = os.getenv("LLM_CACHE_SEMANTIC", "0").lower() in ("1", "on", "true")
+SEMANTIC_THRESHOLD = 0.9
+VECTOR_DIM = 1024
+BIGRAM_WEIGHT = 0.7
+
+# Words that don't change what is being asked. "today"/"now" are implied: the
+# scope already pins the day's data versions.
+FILLER_WORDS = {
+    "a", "an", "the", "is", "are", "am", "i", "do", "does", "did", "can", "you", "please",
+    "what", "whats", "how", "much", "many", "to", "of", "for", "on", "in", "it", "be", "with",
+    "at", "by", "about", "have", "has", "left", "so", "far", "there", "any", "this",
+    "today", "now", "right", "current", "currently", "tell", "show", "give",
+}
+SUFFIXES = (("ies", "y"), ("ing", ""), ("ent", "end"), ("s", ""))
+
+_lock = threading.RLock()
+_entries: "OrderedDict[str, dict]" = OrderedDict()   # key → {"v", "at", "ms", "scope", "q"}, LRU order
+_scopes: dict[str, dict[str, np.ndarray]] = {}       # scope → {key: question vector}
+_log_records = 0
+_stats = {"exactHits": 0, "semanticHits": 0, "misses": 0, "calls": 0, "savedMs": 0.0, "llmMs": 0.0}
+_loaded = False
+
+
+# ──────────────── Keys ────────────────
+
+
+def data_versions(files: list[str]) -> dict[str, object]:
+    """Change tokens for the data files a prompt was built from."""
+    versions: dict[str, object] = {f: file_mtime(f) for f in sorted(set(files))}
+    versions["day"] = date.today().isoformat()
+    return versions
+
+
+def _digest(payload) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def _fold(word: str) -> str:
+    """Crude suffix folding: groceries → grocery, spending → spend, spent → spend."""
+    for suffix, replacement in SUFFIXES:
+        if len(word) > 4 and word.endswith(suffix):
+            return word[: -len(suffix)] + replacement
+    return word
+
+
+def normalize_question(text: str) -> str:
+    words = re.findall(r"[a-z0-9€₹]+", text.lower().replace("'", ""))
+    return " ".join(_fold(w) for w in words if w not in FILLER_WORDS)
+
+
+def _vector(text: str) -> np.ndarray:
+    words = normalize_question(text).split()
+    vec = np.zeros(VECTOR_DIM)
+    for word in set(words):
+        vec[zlib.crc32(word.encode()) % VECTOR_DIM] += 1.0
+    for pair in set(zip(words, words[1:])):
+        vec[zlib.crc32(" ".join(pair).encode()) % VECTOR_DIM] += BIGRAM_WEIGHT
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+# ──────────────── Store ────────────────
+
+
+def _index(key: str, entry: dict) -> None:
+    _entries[key] = entry
+    _entries.move_to_end(key)
+    if entry.get("q") is not None:
+        _scopes.setdefault(entry["scope"], {})[key] = _vector(entry["q"])
+
+
+def _drop(key: str) -> None:
+    entry = _entries.pop(key, None)
+    if entry is not None and entry.get("q") is not None:
+        scope = _scopes.get(entry["scope"], {})
+        scope.pop(key, None)
+        if not scope:
+            _scopes.pop(entry["scope"], None)
+
+
+def _expired(entry: dict, now: float) -> bool:
+    return now - entry["at"] > TTL_SECONDS
+
+
+def _ensure_loaded() -> None:
+    global _loaded, _log_records
+    if _loaded:
+        return
+    with _lock:
+        if _loaded:
+            return
+        now = time.time()
+        for record in load_jsonl(CACHE_FILE):
+            _log_records += 1
+            key = record.pop("k")
+            if not _expired(record, now):
+                _index(key, record)
+        while len(_entries) > CAPACITY:
+            _drop(next(iter(_entries)))
+        _loaded = True
+
+
+def _persist(key: str, entry: dict) -> None:
+    global _log_records
+    with file_lock(CACHE_FILE):
+        if _log_records + 1 >= 2 * CAPACITY:
+            # Rewrite the log with only the live entries
+            truncate_jsonl(CACHE_FILE)
+            append_jsonl(CACHE_FILE, [{"k": k, **e} for k, e in _entries.items()])
+            _log_records = len(_entries)
+        else:
+            append_jsonl(CACHE_FILE, [{"k": key, **entry}])
+            _log_records += 1
+
+
+def _lookup(key: str, scope: str, question: Optional[str], now: float) -> Optional[tuple[str, dict]]:
+    entry = _entries.get(key)
+    if entry is not None:
+        if not _expired(entry, now):
+            _entries.move_to_end(key)
+            return "exactHits", entry
+        _drop(key)
+    if question is None or scope not in _scopes:
+        return None
+    keys = list(_scopes[scope])
+    sims = np.stack([_scopes[scope][k] for k in keys]) @ _vector(question)
+    best = int(np.argmax(sims))
+    if sims[best] < SEMANTIC_THRESHOLD:
+        return None
+    entry = _entries[keys[best]]
+    if _expired(entry, now):
+        _drop(keys[best])
+        return None
+    _entries.move_to_end(keys[best])
+    return "semanticHits", entry
+
+
+# ──────────────── API ────────────────
+
+
+def cached_completion(
+    call: Callable[[], str],
+    model: str,
+    messages: list[dict],
+    params: dict,
+    versions: dict,
+    question: Optional[str] = None,
+) -> str:
+    """Return the cached text for this prompt, or run `call()` and cache what it returns.
+
+    `question` (the user's own words) enables the semantic tier for this call.
+    If `call` raises, nothing is cached and the error propagates.
+    """
+    if not ENABLED:
+        return call()
+    _ensure_loaded()
+    use_semantic = SEMANTIC and question is not None
+    scope = _digest({"model": model, "params": params, "messages": messages[:-1], "versions": versions})
+    key = _digest({"scope": scope, "last": messages[-1] if messages else None})
+    now = time.time()
+    with _lock:
+        hit = _lookup(key, scope, question if use_semantic else None, now)
+        if hit is not None:
+            tier, entry = hit
+            _stats[tier] += 1
+            _stats["savedMs"] += entry["ms"]
+            return entry["v"]
+        _stats["misses"] += 1
+
+    start = time.perf_counter()
+    text = call()
+    elapsed = round((time.perf_counter() - start) * 1000, 1)
+
+    entry = {"v": text, "at": time.time(), "ms": elapsed, "scope": scope, "q": question if use_semantic else None}
+    with _lock:
+        _stats["calls"] += 1
+        _stats["llmMs"] += elapsed
+        _index(key, entry)
+        while len(_entries) > CAPACITY:
+            _drop(next(iter(_entries)))
+        _persist(key, entry)
+    return text
+
+
+def stats() -> dict:
+    _ensure_loaded()
+    with _lock:
+        hits = _stats["exactHits"] + _stats["semanticHits"]
+        lookups = hits + _stats["misses"]
+        return {
+            "enabled": ENABLED,
+            "semantic": SEMANTIC,
+            "entries": len(_entries),
+            "capacity": CAPACITY,
+            "ttlSeconds": TTL_SECONDS,
+            "exactHits": _stats["exactHits"],
+            "semanticHits": _stats["semanticHits"],
+            "misses": _stats["misses"],
+            "hitRate": round(hits / lookups, 3) if lookups else 0.0,
+            "savedLatencyMs": round(_stats["savedMs"], 1),
+            "avgLlmLatencyMs": round(_stats["llmMs"] / _stats["calls"], 1) if _stats["calls"] else None,
+        }
+
+
+def clear() -> None:
+    global _log_records
+    _ensure_loaded()
+    with _lock:
+        _entries.clear()
+        _scopes.clear()
+        with file_lock(CACHE_FILE):
+            truncate_jsonl(CACHE_FILE)
+        _log_records = 0
@@ -0,0 +1,145 @@
+"""
+Shared LLM client.
+
+Chat, insights and receipt scanning used to build a new AzureOpenAI /
+OpenAI client on every request, so no HTTP connection or TLS session was
+ever reused, and each call blocked its thread for the whole round trip.
+
+Now one async client per provider ("azure", "openai") is created on first
+use and shares a single pooled httpx.AsyncClient. They live on a private
+event loop in a daemon thread, which owns the pool and:
+
+  • caps concurrent LLM calls with one semaphore (LLM_MAX_CONCURRENCY);
+  • gives every attempt a timeout (LLM_TIMEOUT_SECONDS, or per call);
+  • retries connection errors, timeouts, 429s and 5xx up to LLM_MAX_RETRIES
+    times with exponential backoff and full jitter (the SDK's own retries
+    are off, so this is the only policy).
+
+`complete()` is for sync code (FastAPI runs sync endpoints in worker
+threads); `acomplete()` can be awaited from any event loop, e.g. an async
+endpoint. Both return the reply text. Pointing AZURE_OPENAI_ENDPOINT or
+OPENAI_BASE_URL at a local OpenAI-compatible server is enough to test
+against a mock.
+"""
+
+import asyncio
+import os
+import random
+import threading
+from typing import Optional
+
+
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_CAP_SECONDS = 8.0
+POOL_SIZE = MAX_CONCURRENCY * 2
+
+_guard = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_http = None
+_clients: dict[str, object] = {}
+
+
+# ──────────────── Setup ────────────────
+
+
+def available(provider: str = "azure") -> bool:
+    return bool(os.getenv("AZURE_OPENAI_API_KEY" if provider == "azure" else "OPENAI_API_KEY"))
+
+
+def default_model(provider: str = "azure") -> str:
+    return os.getenv("AI_MODEL", "gpt-4.1") if provider == "azure" else "gpt-4o"
+
+
+def _ensure_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _guard:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="stash-llm-client", daemon=True).start()
+            _loop = loop
+        return _loop
+
+
+def _client(provider: str):
+    """The provider's async client — created on first use, on the client loop."""
+    global _http, _semaphore
+    client = _clients.get(provider)
+    if client is not None:
+        return client
+    import httpx
+    from openai import AsyncAzureOpenAI, AsyncOpenAI
+
+    if _http is None:
+        _http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+            timeout=TIMEOUT_SECONDS,
+        )
+        _semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    if provider == "azure":
+        client = AsyncAzureOpenAI(
+            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT", "https://cityupstart.cognitiveservices.azure.com/"),
+            api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview"),
+            http_client=_http,
+            max_retries=0,
+        )
+    else:
+        client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("OPENAI_BASE_URL") or None,
+            http_client=_http,
+            max_retries=0,
+        )
+    _clients[provider] = client
+    return client
+
+
+# ──────────────── Calls ────────────────
+
+
+def _retryable(error: Exception) -> bool:
+    import openai
+
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError, asyncio.TimeoutError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
+
+
+async def _complete(provider: str, messages: list[dict], model: Optional[str], timeout: Optional[float], params: dict) -> str:
+    client = _client(provider)
+    limit = timeout or TIMEOUT_SECONDS
+    attempt = 0
+    while True:
+        try:
+            async with _semaphore:
+                completion = await asyncio.wait_for(
+                    client.chat.completions.create(
+                        model=model or default_model(provider), messages=messages, timeout=limit, **params
+                    ),
+                    limit,
+                )
+            return completion.choices[0].message.content or ""
+        except Exception as e:
+            if attempt >= MAX_RETRIES or not _retryable(e):
+                raise
+            attempt += 1
+            delay = random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+            print(f"[LLM] {provider} call failed ({type(e).__name__}), retry {attempt}/{MAX_RETRIES} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+
+def complete(messages: list[dict], provider: str = "azure", model: Optional[str] = None, timeout: Optional[float] = None, **params) -> str:
+    """Run a chat completion from sync code and return the reply text."""
+    future = asyncio.run_coroutine_threadsafe(_complete(provider, messages, model, timeout, params), _ensure_loop())
+    return future.result()
+
+
+async def acomplete(messages: list[dict], provider: str = "azure", model: Optional[str] = None, timeout: Optional[float] = None, **params) -> str:
+    """Awaitable chat completion, usable from any event loop."""
+    future = asyncio.run_coroutine_threadsafe(_complete(provider, messages, model, timeout, params), _ensure_loop())
+    return await asyncio.wrap_future(future)
+
@@ -0,0 +1,222 @@
+"""
+Faceted query index over market listings.
+
+Built once from market_listings.json and rebuilt when the file changes on
+disk (same mtime check as the search index). Each listing is a row; every
+filterable field gets its own index:
+
+  • categorical (type, category) — value → row ids, plus an int code per
+    row so facet counts are a single np.bincount;
+  • numeric (price, sellerRating, distance, discount) — a value array and
+    its argsort. A range filter is two np.searchsorted calls on the sorted
+    values, and the same order serves as the sort for that field.
+
+Distance is parsed once at build time from strings like "1.2 km", "850 m"
+or "Campus" into kilometres; places we can't place ("Online", a
+neighbourhood name) get no distance and sort last.
+
+Facets are disjunctive: a field's counts apply every filter except that
+field's own, so the UI can show how many results picking another value
+would give.
+"""
+
+import re
+import threading
+import numpy as np
+from typing import Optional
+from app.services.data_loader import load_json, file_mtime
+
+
+LISTINGS_FILE = "market_listings.json"
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+DISTANCE_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*(km|m|mi)\b", re.IGNORECASE)
+NAMED_DISTANCES = {"campus": 0.0, "on campus": 0.0}
+UNIT_KM = {"km": 1.0, "m": 0.001, "mi": 1.609}
+DISTANCE_EDGES = [1.0, 3.0, 10.0]
+DISTANCE_LABELS = ["≤1 km", "1–3 km", "3–10 km", "10+ km"]
+RATING_FLOORS = [4.5, 4.0, 3.0]
+
+CATEGORICAL = ("type", "category")
+NUMERIC = ("price", "sellerRating", "distance", "discount")
+SORTS = {
+    "featured": None,
+    "price_asc": ("price", False),
+    "price_desc": ("price", True),
+    "rating": ("sellerRating", True),
+    "distance": ("distance", False),
+    "discount": ("discount", True),
+}
+
+_lock = threading.RLock()
+_items: list[dict] = []
+_postings: dict[str, dict[str, np.ndarray]] = {}    # field → value → row ids
+_codes: dict[str, np.ndarray] = {}                  # field → per-row value code
+_labels: dict[str, list[str]] = {}                  # field → value per code
+_values: dict[str, np.ndarray] = {}                 # field → per-row number (inf when missing)
+_orders: dict[str, np.ndarray] = {}                 # field → rows sorted by value, missing last
+_sorted: dict[str, np.ndarray] = {}                 # field → values in that order
+_mtime: Optional[int] = None
+
+
+def parse_distance(raw) -> Optional[float]:
+    """Kilometres from "1.2 km" / "850 m" / "Campus"; None when it isn't a distance."""
+    if isinstance(raw, (int, float)):
+        return float(raw)
+    text = str(raw or "").strip().lower()
+    if text in NAMED_DISTANCES:
+        return NAMED_DISTANCES[text]
+    match = DISTANCE_RE.search(text)
+    if not match:
+        return None
+    return round(float(match.group(1).replace(",", ".")) * UNIT_KM[match.group(2).lower()], 3)
+
+
+# ──────────────── Build ────────────────
+
+
+def _row(item: dict) -> dict:
+    price, original = item.get("price"), item.get("originalPrice")
+    discount = round((original - price) / original * 100, 1) if price is not None and original else None
+    return {**item, "distanceKm": parse_distance(item.get("distance")), "discountPct": discount}
+
+
+def _build(listings: list[dict]) -> None:
+    global _items
+    _items = [_row(item) for item in listings]
+    for field in CATEGORICAL:
+        labels = sorted({str(item.get(field) or "") for item in _items})
+        lookup = {label: code for code, label in enumerate(labels)}
+        codes = np.array([lookup[str(item.get(field) or "")] for item in _items], dtype=np.int64)
+        _labels[field] = labels
+        _codes[field] = codes
+        _postings[field] = {label: np.flatnonzero(codes == code) for label, code in lookup.items()}
+
+    raw = {
+        "price": [item.get("price") for item in _items],
+        "sellerRating": [item.get("sellerRating") for item in _items],
+        "distance": [item["distanceKm"] for item in _items],
+        "discount": [item["discountPct"] for item in _items],
+    }
+    for field in NUMERIC:
+        values = np.array([np.inf if v is None else float(v) for v in raw[field]], dtype=float)
+        order = np.argsort(values, kind="stable")
+        _values[field] = values
+        _orders[field] = order
+        _sorted[field] = values[order]
+
+
+def _ensure_fresh() -> None:
+    global _mtime
+    mtime = file_mtime(LISTINGS_FILE)
+    if mtime == _mtime:
+        return
+    with _lock:
+        if mtime != _mtime:
+            _build(load_json(LISTINGS_FILE))
+            _mtime = mtime
+            print(f"[Market] Indexed {len(_items)} listings")
+
+
+# ──────────────── Query ────────────────
+
+
+def _categorical_mask(field: str, wanted: list[str]) -> np.ndarray:
+    mask = np.zeros(len(_items), dtype=bool)
+    for value in wanted:
+        rows = _postings[field].get(value)
+        if rows is not None:
+            mask[rows] = True
+    return mask
+
+
+def _range_mask(field: str, lo: Optional[float], hi: Optional[float]) -> np.ndarray:
+    values = _sorted[field]
+    start = np.searchsorted(values, lo, side="left") if lo is not None else 0
+    end = np.searchsorted(values, hi, side="right") if hi is not None else np.searchsorted(values, np.inf, side="left")
+    mask = np.zeros(len(_items), dtype=bool)
+    mask[_orders[field][start:end]] = True
+    return mask
+
+
+def _facet_counts(field: str, mask: np.ndarray) -> dict[str, int]:
+    counts = np.bincount(_codes[field][mask], minlength=len(_labels[field]))
+    return {label: int(c) for label, c in zip(_labels[field], counts) if label and c}
+
+
+def query(
+    types: Optional[list[str]] = None,
+    categories: Optional[list[str]] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_rating: Optional[float] = None,
+    max_distance: Optional[float] = None,
+    sort: str = "featured",
+    page: int = 1,
+    page_size: Optional[int] = DEFAULT_PAGE_SIZE,
+) -> dict:
+    """Filtered, sorted page of listings with facet counts. Raises ValueError on an unknown sort."""
+    if sort not in SORTS:
+        raise ValueError(f"Sort must be one of: {', '.join(SORTS)}")
+    _ensure_fresh()
+    with _lock:
+        everything = np.ones(len(_items), dtype=bool)
+        masks = {
+            "type": _categorical_mask("type", types) if types else everything,
+            "category": _categorical_mask("category", categories) if categories else everything,
+            "price": _range_mask("price", min_price, max_price) if min_price is not None or max_price is not None else everything,
+            "sellerRating": _range_mask("sellerRating", min_rating, None) if min_rating is not None else everything,
+            "distance": _range_mask("distance", None, max_distance) if max_distance is not None else everything,
+        }
+
+        def combined(skip: Optional[str] = None) -> np.ndarray:
+            out = everything.copy()
+            for field, mask in masks.items():
+                if field != skip:
+                    out &= mask
+            return out
+
+        matched = combined()
+        if SORTS[sort] is None:
+            rows = np.flatnonzero(matched)
+        else:
+            field, descending = SORTS[sort]
+            order = _orders[field]
+            if descending:
+                # Reverse the known values but keep missing ones (inf) last
+                known = np.isfinite(_sorted[field])
+                order = np.concatenate([order[known][::-1], order[~known]])
+            rows = order[matched[order]]
+
+        total = len(rows)
+        if page_size:
+            start = (max(page, 1) - 1) * page_size
+            rows = rows[start:start + page_size]
+
+        distance = _values["distance"]
+        within_distance = combined("distance")
+        rating = _values["sellerRating"]
+        within_rating = combined("sellerRating")
+        price = _values["price"][matched & np.isfinite(_values["price"])]
+
+        known = within_distance & np.isfinite(distance)
+        buckets = np.bincount(np.digitize(distance[known], DISTANCE_EDGES, right=True), minlength=len(DISTANCE_LABELS))
+        distance_buckets = {label: int(c) for label, c in zip(DISTANCE_LABELS, buckets)}
+        distance_buckets["Unknown"] = int((within_distance & ~np.isfinite(distance)).sum())
+
+        return {
+            "items": [_items[i] for i in rows],
+            "total": total,
+            "page": max(page, 1),
+            "pageSize": page_size or total,
+            "pages": -(-total // page_size) if page_size else 1,
+            "sort": sort,
+            "facets": {
+                "type": _facet_counts("type", combined("type")),
+                "category": _facet_counts("category", combined("category")),
+                "sellerRating": {f"{floor:g}+": int((within_rating & (rating >= floor) & np.isfinite(rating)).sum()) for floor in RATING_FLOORS},
+                "distance": distance_buckets,
+                "price": {"min": float(price.min()), "max": float(price.max())} if len(price) else None,
+            },
+        }
@@ -0,0 +1,103 @@
+"""
+Background AI Matchmaker for community posts.
+
+`create_post` only matches a new post against what already exists, so older
+SEEKING posts never hear about OFFERING posts that arrive later (and vice
+versa). New post ids are queued here and a daemon worker scores each one
+against the open posts of the opposite intent, attaching an AI match comment
+to every older post it fits. Queued ids are drained in small batches and the
+resulting comments go to the community store as a single log append.
+
+So a busy feed isn't flooded with bot comments, a (post, match) pair is only
+ever commented once, an older post carries at most MAX_MATCHES_PER_POST AI
+match comments, and one batch attaches at most MAX_COMMENTS_PER_BATCH —
+the best-scoring matches win when a cap bites.
+"""
+
+from app.services import community_feed, community_match, community_store, search_index
+from app.services.workers import BatchWorker
+
+
+# How long the worker waits for more posts before flushing a batch
+BATCH_WINDOW_SECONDS = 0.5
+MAX_BATCH_SIZE = 50
+MAX_MATCHES_PER_POST = 3
+MAX_COMMENTS_PER_BATCH = 20
+
+
+# ──────────────── Public API ────────────────
+
+
+def enqueue(post_id: str) -> None:
+    """Queue a freshly created post for background re-matching."""
+    _worker.submit(post_id)
+
+
+def process_batch(post_ids: list[str]) -> int:
+    """Match each new post against older opposite-intent posts.
+
+    Returns the number of AI match comments attached.
+    """
+    posts = community_store.all_posts()
+    features: dict[str, dict] = {}
+    matches: list[tuple[float, dict, dict]] = []     # (score, older post, new post)
+
+    for post_id in dict.fromkeys(post_ids):
+        new_post = community_store.get_post(post_id)
+        if not new_post or new_post.get("intent") not in ("SEEKING", "OFFERING"):
+            continue
+        target_intent = "OFFERING" if new_post["intent"] == "SEEKING" else "SEEKING"
+        new_features = community_match.match_features(new_post)
+
+        for candidate in posts:
+            if candidate["id"] == post_id or candidate.get("intent") != target_intent:
+                continue
+            cand_features = features.get(candidate["id"])
+            if cand_features is None:
+                cand_features = features[candidate["id"]] = community_match.match_features(candidate)
+            score = community_match.score_match(cand_features, new_features)
+            if score >= community_match.MATCH_THRESHOLD:
+                matches.append((score, candidate, new_post))
+
+    # Best matches first, then dedupe and cap per post and per batch
+    matches.sort(key=lambda m: -m[0])
+    pending: list[tuple[str, dict]] = []
+    ai_matches: dict[str, str] = {}
+    matched: dict[str, set[str]] = {}
+    for _, candidate, new_post in matches:
+        if len(pending) >= MAX_COMMENTS_PER_BATCH:
+            break
+        seen = matched.get(candidate["id"])
+        if seen is None:
+            seen = matched[candidate["id"]] = {
+                c["matchPostId"] for c in candidate.get("comments", []) if c.get("matchPostId")
+            }
+        if new_post["id"] in seen or len(seen) >= MAX_MATCHES_PER_POST:
+            continue
+        seen.add(new_post["id"])
+
+        match_text = community_match.match_text(candidate, new_post)
+        ai_comment = community_match.ai_comment(candidate, match_text)
+        ai_comment["matchPostId"] = new_post["id"]
+        pending.append((candidate["id"], ai_comment))
+        ai_matches.setdefault(candidate["id"], match_text)
+
+    if not pending:
+        return 0
+    touched = {p["id"]: p for p in community_store.add_comments(pending, ai_matches) if p is not None}
+    community_feed.apply_write(*touched.values())
+    search_index.update_posts(*touched.values())
+    return len(pending)
+
+
+# ──────────────── Worker ────────────────
+
+
+_worker = BatchWorker(
+    "stash-matchmaker",
+    "Matchmaker",
+    process_batch,
+    "Attached {count} match(es) for {size} new post(s)",
+    MAX_BATCH_SIZE,
+    BATCH_WINDOW_SECONDS,
+)
@@ -0,0 +1,313 @@
+"""
+Survival-mission rules engine.
+
+Each mission title in survival_missions.json is compiled into a rule over
+today's spending aggregates:
+
+    "Spend under €8 today"        keep     total < 8
+    "No coffee shop visits"       keep     count:coffee == 0
+    "Walk instead of transport"   keep     count:transport == 0
+    "Cook at least 1 meal"        achieve  count:groceries >= 1
+
+"achieve" rules complete the moment a transaction makes them true. "keep"
+rules are on track until a transaction breaks them, and complete when the
+day closes (the first transaction or read after midnight) if they still
+hold — but only on a day with at least one transaction, so an idle day
+pays nothing. Titles that don't compile stay manual and are completed with
+POST /survival-missions/toggle as before.
+
+Aggregates only grow during a day (spend is counted as abs(amount)), so a
+rule's outcome settles once it flips. A transaction updates a few
+aggregate keys (total, count, count:<category>, spend:<category>), and only
+the rules watching those keys are re-evaluated. That makes each
+transaction O(rules on its keys), however many missions exist.
+
+Coins are paid only on the transaction write path (`record()`). Reads
+(`missions()`, `is_automatic()`) may roll the day over or load today's
+transactions, but anything they complete is queued and paid by the next
+`record()`. The queue is only in memory, but it never holds anything that
+can't be derived again: on load the engine replays the last active day
+before today (if within CATCH_UP_DAYS) and closes it, then replays today,
+so completions lost to a restart — including a day that rolled over while
+the process was down — are found again. Awards are coin ledger entries with
+ref "mission:<id>:<date>", checked against the ledger before paying, so
+each mission pays at most once per day.
+"""
+
+import operator
+import re
+import threading
+from datetime import date, timedelta
+from typing import Optional
+from app.services import coin_ledger
+from app.services.data_loader import load_json, file_mtime
+
+
+MISSIONS_FILE = "survival_missions.json"
+TRANSACTIONS_FILE = "transactions.json"
+# How far back a cold start looks for an active day whose close it may have missed
+CATCH_UP_DAYS = 7
+
+# Words in mission titles → transaction category
+CATEGORY_WORDS = {
+    "coffee": "coffee", "cafe": "coffee", "café": "coffee", "latte": "coffee",
+    "meal": "groceries", "meals": "groceries", "cook": "groceries", "grocery": "groceries",
+    "groceries": "groceries",
+    "transport": "transport", "taxi": "transport", "uber": "transport", "bus": "transport",
+    "takeaway": "food", "takeaways": "food", "food": "food", "delivery": "food",
+    "shopping": "shopping", "clothes": "shopping",
+    "entertainment": "entertainment", "games": "entertainment", "cinema": "entertainment",
+}
+
+OPS = {"<": operator.lt, "<=": operator.le, "==": operator.eq, ">=": operator.ge}
+
+_lock = threading.RLock()
+_missions: list[dict] = []
+_rules: dict[str, dict] = {}               # mission id → compiled rule
+_watchers: dict[str, list[str]] = {}       # aggregate key → mission ids
+_agg: dict[str, float] = {}                # today's aggregates
+_status: dict[str, str] = {}               # mission id → on-track | failed | completed
+_seen: set[str] = set()
+_unpaid: list[tuple[str, dict]] = []       # (day, mission) completed but not yet paid
+_day: Optional[str] = None
+_missions_mtime: Optional[int] = None
+_loaded = False
+
+
+# ──────────────── Compiling ────────────────
+
+
+def _category(words: str) -> Optional[str]:
+    for word in re.findall(r"\w+", words.lower()):
+        if word in CATEGORY_WORDS:
+            return CATEGORY_WORDS[word]
+    return None
+
+
+def _spend_cap(m: re.Match) -> Optional[dict]:
+    category = _category(m.group(2) or "")
+    key = f"spend:{category}" if category else "total"
+    return {"kind": "keep", "key": key, "op": "<", "value": float(m.group(1))}
+
+
+def _avoid(m: re.Match) -> Optional[dict]:
+    category = _category(m.group(1))
+    if category is None:
+        return None
+    return {"kind": "keep", "key": f"count:{category}", "op": "==", "value": 0}
+
+
+def _at_least(m: re.Match) -> Optional[dict]:
+    category = _category(m.group(0))
+    if category is None:
+        return None
+    return {"kind": "achieve", "key": f"count:{category}", "op": ">=", "value": int(m.group(1))}
+
+
+RULE_PATTERNS = [
+    (re.compile(r"spend (?:under|less than|below) €\s*(\d+(?:\.\d+)?)(?: on (\w+))?", re.IGNORECASE), _spend_cap),
+    (re.compile(r"\b(?:no|skip|avoid) ((?:\w+\s*){1,3})", re.IGNORECASE), _avoid),
+    (re.compile(r"instead of (?:taking |using |buying )?(\w+)", re.IGNORECASE), _avoid),
+    (re.compile(r"at least (\d+) .+", re.IGNORECASE), _at_least),
+]
+
+
+def compile_rule(title: str) -> Optional[dict]:
+    """Turn a mission title into a rule, or None if it has to stay manual."""
+    for pattern, build in RULE_PATTERNS:
+        m = pattern.search(title)
+        if m:
+            rule = build(m)
+            if rule is not None:
+                return rule
+    return None
+
+
+def _holds(rule: dict) -> bool:
+    return OPS[rule["op"]](_agg.get(rule["key"], 0), rule["value"])
+
+
+# ──────────────── Evaluation ────────────────
+
+
+def _evaluate(mission_id: str) -> Optional[dict]:
+    """Update one mission's status; returns the mission if it just completed."""
+    if _status.get(mission_id) != "on-track":
+        return None  # Already settled for today
+    rule = _rules[mission_id]
+    holds = _holds(rule)
+    if rule["kind"] == "achieve" and holds:
+        _status[mission_id] = "completed"
+        return _mission(mission_id)
+    if rule["kind"] == "keep" and not holds:
+        _status[mission_id] = "failed"
+    return None
+
+
+def _close_day() -> list[dict]:
+    """Complete keep rules that held all day; an idle day completes nothing."""
+    done = []
+    if not _agg.get("count"):
+        return done
+    for mission_id, rule in _rules.items():
+        if rule["kind"] == "keep" and _status.get(mission_id) == "on-track" and _holds(rule):
+            _status[mission_id] = "completed"
+            done.append(_mission(mission_id))
+    return done
+
+
+def _open_day(day: str) -> list[tuple[str, dict]]:
+    """Move to `day`, closing the current one. Returns (day, mission) awards due."""
+    global _day
+    due: list[tuple[str, dict]] = []
+    if _day is not None and day > _day:
+        due = [(_day, m) for m in _close_day()]
+    if _day is None or day > _day:
+        _day = day
+        _agg.clear()
+        for mission_id in _rules:
+            _status[mission_id] = "on-track"
+        _settle_paid()
+    return due
+
+
+def _settle_paid() -> None:
+    """Mark missions already paid today (e.g. before a restart) as completed."""
+    for mission_id in _rules:
+        if coin_ledger.has_ref(f"mission:{mission_id}:{_day}"):
+            _status[mission_id] = "completed"
+
+
+def _fold(tx: dict) -> list[dict]:
+    """Add one of today's transactions to the aggregates and re-check its watchers."""
+    category = (tx.get("category") or "other").lower()
+    amount = abs(tx.get("amount", 0))
+    keys = ("total", "count", f"count:{category}", f"spend:{category}")
+    _agg["total"] = _agg.get("total", 0) + amount
+    _agg["count"] = _agg.get("count", 0) + 1
+    _agg[f"count:{category}"] = _agg.get(f"count:{category}", 0) + 1
+    _agg[f"spend:{category}"] = _agg.get(f"spend:{category}", 0) + amount
+
+    done = []
+    for key in keys:
+        for mission_id in _watchers.get(key, ()):
+            mission = _evaluate(mission_id)
+            if mission is not None:
+                done.append(mission)
+    return done
+
+
+def _pay_unpaid() -> None:
+    """Pay queued completions the ledger doesn't already show. Caller holds _lock."""
+    for day, mission in _unpaid:
+        ref = f"mission:{mission['id']}:{day}"
+        if coin_ledger.has_ref(ref):
+            continue
+        coins = mission.get("coins", mission.get("xp", 0))
+        coin_ledger.earn(coins, "mission", f"Completed: {mission['title']}", ref=ref)
+        print(f"[Missions] {mission['id']} completed for {day}, awarded {coins} coins")
+    _unpaid.clear()
+
+
+# ──────────────── Loading ────────────────
+
+
+def _mission(mission_id: str) -> dict:
+    return next(m for m in _missions if m["id"] == mission_id)
+
+
+def _compile_missions() -> None:
+    global _missions_mtime
+    _missions[:] = load_json(MISSIONS_FILE)
+    _missions_mtime = file_mtime(MISSIONS_FILE)
+    _rules.clear()
+    _watchers.clear()
+    for mission in _missions:
+        rule = compile_rule(mission["title"])
+        if rule is None:
+            continue
+        _rules[mission["id"]] = rule
+        _watchers.setdefault(rule["key"], []).append(mission["id"])
+
+
+def _replay_day(day: str, transactions: list[dict]) -> list[tuple[str, dict]]:
+    """Open `day` and fold its stored transactions. Returns (day, mission) awards due."""
+    due = _open_day(day)
+    for tx in transactions:
+        if tx["date"][:10] == day:
+            _seen.add(tx["id"])
+            due.extend((day, m) for m in _fold(tx))
+    return due
+
+
+def _ensure_fresh() -> None:
+    """Load on first use, recompile if the mission list changed, roll the day over.
+
+    Completions found here are queued in _unpaid, never paid.
+    """
+    global _loaded
+    today = date.today().isoformat()
+    if not _loaded:
+        _compile_missions()
+        transactions = load_json(TRANSACTIONS_FILE)
+        oldest = (date.today() - timedelta(days=CATCH_UP_DAYS)).isoformat()
+        previous = max((tx["date"][:10] for tx in transactions if oldest <= tx["date"][:10] < today), default=None)
+        if previous is not None:
+            # Opening today below closes it, as the running engine would have at midnight
+            _unpaid.extend(_replay_day(previous, transactions))
+        _unpaid.extend(_replay_day(today, transactions))
+        _loaded = True
+    elif _missions_mtime != file_mtime(MISSIONS_FILE):
+        _compile_missions()
+        for mission_id in _rules:
+            _status.setdefault(mission_id, "on-track")
+        _settle_paid()
+        for mission_id in _rules:
+            mission = _evaluate(mission_id)
+            if mission is not None:
+                _unpaid.append((today, mission))
+    _unpaid.extend(_open_day(today))
+
+
+# ──────────────── Public API ────────────────
+
+
+def record(tx: dict) -> None:
+    """Consume a newly saved transaction; pays any mission it (or an earlier read) completed."""
+    with _lock:
+        _ensure_fresh()
+        day = tx["date"][:10]
+        if tx["id"] not in _seen and day >= _day:
+            _seen.add(tx["id"])
+            _unpaid.extend(_open_day(day))
+            _unpaid.extend((day, m) for m in _fold(tx))
+        _pay_unpaid()
+
+
+def is_automatic(mission_id: str) -> bool:
+    with _lock:
+        _ensure_fresh()
+        return mission_id in _rules
+
+
+def missions() -> list[dict]:
+    """survival_missions.json with today's status for rule-driven missions. Read-only: never pays coins."""
+    with _lock:
+        _ensure_fresh()
+        out = []
+        for m in _missions:
+            m = dict(m)
+            m.setdefault("coins", m["xp"])
+            rule = _rules.get(m["id"])
+            if rule is None:
+                m["auto"] = False
+                m["status"] = "completed" if m.get("completed") else "manual"
+            else:
+                status = _status.get(m["id"], "on-track")
+                m["auto"] = True
+                m["status"] = status
+                m["completed"] = status == "completed"
+                m["rule"] = f"{rule['key']} {rule['op']} {rule['value']:g}"
+                m["progress"] = round(_agg.get(rule["key"], 0), 2)
+            out.append(m)
+    return out
@@ -0,0 +1,151 @@
+"""
+Expiry-aware perk index.
+
+GET /perks used to filter perks.json with a linear scan on every request
+and served deals whose expiryDate had already passed. Now the catalog is
+indexed once (and re-indexed when perks.json changes on disk):
+
+  • live perks by category, plus a "near you" list;
+  • a min-heap of (expiry date, perk id) over every perk that expires;
+  • a response cache keyed by (category, near-you).
+
+A perk is valid through its expiry date. A daemon job sleeps until the
+heap's earliest expiry passes, pops every perk that's due, drops it from
+the index and clears the response cache — so requests never look at
+dates, and an expired deal disappears at the moment it lapses rather
+than whenever someone next asks.
+"""
+
+import heapq
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from app.services.data_loader import load_json, file_mtime
+from app.services.workers import DaemonThread
+
+
+PERKS_FILE = "perks.json"
+ALL = "All"
+MAX_SLEEP_SECONDS = 3600     # re-check at least hourly (clock changes, file edits)
+
+_lock = threading.RLock()
+_perks: dict[str, dict] = {}              # id → live perk, in catalog order
+_by_category: dict[str, list[str]] = {}   # category → live perk ids
+_near: list[str] = []
+_heap: list[tuple[str, str]] = []         # (expiry date, perk id)
+_responses: dict[tuple[str, bool], list[dict]] = {}
+_mtime: Optional[int] = None
+
+_wake = threading.Event()
+
+
+# ──────────────── Index ────────────────
+
+
+def _expired(expiry: str, today: str) -> bool:
+    return bool(expiry) and expiry < today
+
+
+def _rebuild(catalog: list[dict]) -> None:
+    today = date.today().isoformat()
+    _perks.clear()
+    _by_category.clear()
+    _near.clear()
+    _heap.clear()
+    for perk in catalog:
+        expiry = perk.get("expiryDate") or ""
+        if _expired(expiry, today):
+            continue
+        _perks[perk["id"]] = perk
+        _by_category.setdefault(perk.get("category", ""), []).append(perk["id"])
+        if perk.get("nearYou"):
+            _near.append(perk["id"])
+        if expiry:
+            _heap.append((expiry, perk["id"]))
+    heapq.heapify(_heap)
+    _responses.clear()
+
+
+def _ensure_fresh() -> None:
+    global _mtime
+    mtime = file_mtime(PERKS_FILE)
+    if mtime == _mtime:
+        return
+    with _lock:
+        if mtime != _mtime:
+            _rebuild(load_json(PERKS_FILE))
+            _mtime = mtime
+            _wake.set()  # the earliest expiry may have changed
+    _job.ensure()
+
+
+def retire_due(today: Optional[str] = None) -> list[str]:
+    """Pop and unindex every perk whose expiry date is before `today`. Returns their ids."""
+    today = today or date.today().isoformat()
+    retired = []
+    with _lock:
+        while _heap and _expired(_heap[0][0], today):
+            _, perk_id = heapq.heappop(_heap)
+            perk = _perks.pop(perk_id, None)
+            if perk is None:
+                continue
+            ids = _by_category.get(perk.get("category", ""), [])
+            if perk_id in ids:
+                ids.remove(perk_id)
+            if perk_id in _near:
+                _near.remove(perk_id)
+            retired.append(perk_id)
+        if retired:
+            _responses.clear()
+    return retired
+
+
+def next_expiry() -> Optional[str]:
+    with _lock:
+        return _heap[0][0] if _heap else None
+
+
+# ──────────────── Queries ────────────────
+
+
+def perks(category: Optional[str] = None, near_you: bool = False) -> list[dict]:
+    """Live perks, optionally for one category and/or only those near you."""
+    _ensure_fresh()
+    key = (category or ALL, near_you)
+    cached = _responses.get(key)
+    if cached is not None:
+        return cached
+    with _lock:
+        ids = list(_perks) if key[0] == ALL else _by_category.get(key[0], [])
+        if near_you:
+            near = set(_near)
+            ids = [i for i in ids if i in near]
+        result = _responses[key] = [_perks[i] for i in ids]
+        return result
+
+
+# ──────────────── Expiry job ────────────────
+
+
+def _seconds_until_due() -> float:
+    """Seconds until the earliest expiry lapses (midnight after its expiry date)."""
+    expiry = next_expiry()
+    if expiry is None:
+        return MAX_SLEEP_SECONDS
+    lapses = datetime.combine(date.fromisoformat(expiry) + timedelta(days=1), time.min)
+    return min(max((lapses - datetime.now()).total_seconds(), 0.0), MAX_SLEEP_SECONDS)
+
+
+def _run() -> None:
+    while True:
+        _wake.wait(_seconds_until_due())
+        _wake.clear()
+        try:
+            retired = retire_due()
+            if retired:
+                print(f"[Perks] Retired {len(retired)} expired perk(s): {', '.join(retired)}")
+        except Exception as e:
+            print(f"[Perks] Expiry job failed: {e}")
+
+
+_job = DaemonThread("stash-perk-expiry", _run)
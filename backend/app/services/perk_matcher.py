@@ -0,0 +1,160 @@
+"""
+Perk-to-transaction matching — fills a transaction's `perkMissed`.
+
+perks.json is compiled (and recompiled when its mtime changes) into:
+
+  • one regex alternation of every usable perk's normalised brand name,
+    longest first, so a merchant string is matched in a single search
+    ("Tesco Superstore, Dublin", "McDonalds Grafton St" …);
+  • brand → [(perk, saving rule)], where the saving rule is parsed once
+    from the deal text ("10% off" → 10%, "€5 off" → €5, "… over €15" →
+    minimum spend). Deals with no amount to quote ("Free size upgrade",
+    "€8 tickets") are skipped.
+
+A perk is usable if it's active, its expiry date hasn't passed on the
+transaction's date, and its category fits the transaction's
+(CATEGORY_FIT — an "Apple" merchant filed under food isn't the Apple
+Store). Matches are memoised per (merchant, category), so a long history
+costs one dictionary lookup per repeat merchant.
+
+`annotate()` runs at insert time; `backfill()` annotates the stored
+history in one pass and one write.
+"""
+
+import re
+import threading
+import unicodedata
+from typing import Optional
+from app.services.data_loader import load_json, save_json, file_mtime, file_lock
+
+
+PERKS_FILE = "perks.json"
+TRANSACTIONS_FILE = "transactions.json"
+
+PERCENT_RE = re.compile(r"(\d+(?:\.\d+)?)\s*%")
+FIXED_RE = re.compile(r"(?:[€$£]\s*(\d+(?:\.\d+)?)|(\d+(?:\.\d+)?)\s*(?:€|eur\b))\s*off", re.IGNORECASE)
+MIN_SPEND_RE = re.compile(r"(?:over|above|min(?:imum)?(?: spend)?(?: of)?)\s*[€$£]\s*(\d+(?:\.\d+)?)", re.IGNORECASE)
+CATEGORY_FIT = {
+    "coffee": {"Food"},
+    "food": {"Food"},
+    "groceries": {"Food"},
+    "transport": {"Transport"},
+    "entertainment": {"Entertainment"},
+    "shopping": {"Shopping", "Tech"},
+    "school": {"Tech", "Shopping"},
+}
+
+_lock = threading.RLock()
+_pattern: Optional[re.Pattern] = None
+_by_brand: dict[str, list[tuple]] = {}        # brand key → [(perk, "pct" | "fixed", amount, min spend)]
+_memo: dict[tuple[str, str], list[tuple]] = {}
+_mtime: Optional[int] = None
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+    return " ".join(re.findall(r"[a-z0-9]+", text.replace("'", "")))
+
+
+def _saving_rule(deal: str) -> Optional[tuple[str, float, float]]:
+    minimum = MIN_SPEND_RE.search(deal)
+    min_spend = float(minimum.group(1)) if minimum else 0.0
+    match = PERCENT_RE.search(deal)
+    if match:
+        return "pct", float(match.group(1)), min_spend
+    match = FIXED_RE.search(deal)
+    if match:
+        return "fixed", float(match.group(1) or match.group(2)), min_spend
+    return None
+
+
+def _ensure_compiled() -> None:
+    global _pattern, _mtime
+    mtime = file_mtime(PERKS_FILE)
+    if mtime == _mtime:
+        return
+    with _lock:
+        if mtime == _mtime:
+            return
+        _by_brand.clear()
+        _memo.clear()
+        for perk in load_json(PERKS_FILE):
+            rule = _saving_rule(perk.get("deal", ""))
+            key = normalize(perk.get("brand", ""))
+            if perk.get("isActive") and rule and key:
+                _by_brand.setdefault(key, []).append((perk, *rule))
+        brands = sorted(_by_brand, key=len, reverse=True)
+        _pattern = re.compile(r"\b(" + "|".join(re.escape(b) for b in brands) + r")\b") if brands else None
+        _mtime = mtime
+
+
+def _candidates(merchant: str, category: str) -> list[tuple]:
+    key = (merchant, category)
+    hit = _memo.get(key)
+    if hit is None:
+        hit = []
+        match = _pattern.search(normalize(merchant)) if _pattern else None
+        if match:
+            fits = CATEGORY_FIT.get(category)
+            hit = [c for c in _by_brand[match.group(1)] if fits is None or c[0].get("category") in fits]
+        _memo[key] = hit
+    return hit
+
+
+def match(tx: dict) -> Optional[dict]:
+    """The best usable perk for one transaction, in `perkMissed` shape, or None."""
+    candidates = _candidates(tx.get("merchant") or "", (tx.get("category") or "").lower())
+    if not candidates:
+        return None
+    day = str(tx.get("date", ""))[:10]
+    spent = abs(float(tx.get("amount") or 0))
+    best: Optional[tuple[float, dict, str, float]] = None
+    for perk, kind, amount, min_spend in candidates:
+        expiry = perk.get("expiryDate")
+        if (expiry and day > expiry) or spent < min_spend:
+            continue
+        saved = spent * amount / 100 if kind == "pct" else min(amount, spent)
+        if best is None or saved > best[0]:
+            best = (saved, perk, kind, amount)
+    if best is None or best[0] <= 0:
+        return None
+    saved, perk, kind, amount = best
+    return {
+        "perkId": perk["id"],
+        "discount": f"{amount:g}%" if kind == "pct" else f"€{amount:g}",
+        "brand": perk["brand"],
+        "code": perk.get("code", ""),
+        "savedAmount": round(saved, 2),
+    }
+
+
+def annotate(transactions: list[dict], overwrite: bool = False) -> int:
+    """Fill `perkMissed` in place; returns how many transactions changed."""
+    _ensure_compiled()
+    changed = 0
+    with _lock:
+        for tx in transactions:
+            if tx.get("perkMissed") and not overwrite:
+                continue
+            perk = match(tx)
+            if perk != tx.get("perkMissed"):
+                tx["perkMissed"] = perk
+                changed += 1
+    return changed
+
+
+def backfill(overwrite: bool = False) -> dict:
+    """Annotate the stored transaction history in one pass."""
+    with file_lock(TRANSACTIONS_FILE):
+        transactions = load_json(TRANSACTIONS_FILE)
+        changed = annotate(transactions, overwrite)
+        if changed:
+            save_json(TRANSACTIONS_FILE, transactions)
+    missed = [tx["perkMissed"] for tx in transactions if tx.get("perkMissed")]
+    print(f"[Perks] Backfill annotated {changed} of {len(transactions)} transactions")
+    return {
+        "scanned": len(transactions),
+        "updated": changed,
+        "withMissedPerk": len(missed),
+        "totalMissedSavings": round(sum(m.get("savedAmount", 0) for m in missed), 2),
+    }
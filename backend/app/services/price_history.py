@@ -0,0 +1,241 @@
+"""
+Grocery price history learned from scanned receipts.
+
+POST /expense/scan hands each parsed receipt to `submit()`, which only
+queues it, so the scan response never waits on matching or disk. A
+daemon worker drains the queue in batches:
+
+  1. normalises every line item name (drops sizes and pack counts,
+     expands common till abbreviations: "WHL MLK 1L" → "whole milk");
+  2. matches it to a catalog item through the grocery index, keeping
+     matches above MIN_CONFIDENCE;
+  3. maps the merchant to a catalog store ("Tesco Superstore, Dublin" →
+     Tesco);
+  4. appends one compact observation per matched line to
+     price_observations.jsonl — {"d": date, "i": item id, "s": store,
+     "p": unit price} — in a single write per batch.
+
+Rows that can't become an observation (unparseable date or price) are
+logged and skipped; a receipt is only marked as seen once its rows have
+been validated, and one bad receipt never costs the rest of the batch.
+
+In memory each (item, store) pair is a date-sorted series. `estimate()`
+blends the catalog price with the observations, weighting each
+observation by recency (half-life HALF_LIFE_DAYS).
+"""
+
+import hashlib
+import json
+import re
+import threading
+from bisect import insort
+from datetime import date
+from typing import Optional
+from app.services import grocery_index
+from app.services.data_loader import load_jsonl, append_jsonl, file_lock
+from app.services.workers import BatchWorker
+
+
+OBSERVATIONS_FILE = "price_observations.jsonl"
+BATCH_WINDOW_SECONDS = 1.0
+MAX_BATCH_SIZE = 100
+MIN_CONFIDENCE = 0.6
+HALF_LIFE_DAYS = 14
+PRIOR_WEIGHT = 0.25      # the catalog price counts as a quarter of a fresh observation
+
+ABBREVIATIONS = {
+    "whl": "whole", "mlk": "milk", "semi": "semi skimmed", "skm": "skimmed",
+    "brd": "bread", "wht": "white", "chkn": "chicken", "chk": "chicken", "brst": "breast",
+    "ygt": "yogurt", "yog": "yogurt", "nat": "natural", "fr": "free", "rng": "range",
+    "org": "organic", "bsmti": "basmati", "tom": "tomato", "pot": "potato", "bnna": "banana",
+}
+SIZE_RE = re.compile(r"\b\d+(?:[.,]\d+)?\s*(?:kg|g|ml|l|ltr|pk|pack|x|pcs)?\b", re.IGNORECASE)
+
+
+_lock = threading.RLock()
+_series: dict[tuple[str, str], list[tuple[int, float]]] = {}   # (item id, store) → [(date ordinal, price)]
+_receipts: set[str] = set()
+_loaded = False
+
+
+# ──────────────── Normalising & matching ────────────────
+
+
+def normalize_name(raw: str) -> str:
+    text = SIZE_RE.sub(" ", raw.lower())
+    words = re.findall(r"[a-z]+", text)
+    return " ".join(ABBREVIATIONS.get(w, w) for w in words)
+
+
+def _store_for(merchant: str, stores: list[str]) -> str:
+    lowered = merchant.lower()
+    for store in stores:
+        if store.lower() in lowered:
+            return store
+    return merchant.strip() or "Unknown"
+
+
+def _receipt_key(receipt: dict) -> str:
+    body = json.dumps(
+        [receipt.get("merchant"), receipt.get("date"), receipt.get("total"), receipt.get("items")],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha1(body.encode()).hexdigest()[:16]
+
+
+def _valid_day(value) -> Optional[str]:
+    """ISO date (YYYY-MM-DD) from a receipt date, or None if it isn't one."""
+    day = str(value or date.today().isoformat())[:10]
+    try:
+        date.fromisoformat(day)
+    except ValueError:
+        return None
+    return day
+
+
+def _observations(receipt: dict, stores: list[str]) -> list[dict]:
+    day = _valid_day(receipt.get("date"))
+    if day is None:
+        print(f"[PriceHistory] Skipping receipt with invalid date {receipt.get('date')!r}")
+        return []
+    store = _store_for(receipt.get("merchant", ""), stores)
+    out = []
+    for line in receipt.get("items", []):
+        try:
+            price = float(line.get("price", 0))
+            qty = float(line.get("qty") or line.get("quantity") or 1)
+        except (TypeError, ValueError):
+            print(f"[PriceHistory] Skipping line with invalid price/qty: {line!r}")
+            continue
+        name = normalize_name(str(line.get("name", "")))
+        if price <= 0 or not name:
+            continue
+        match = grocery_index.best_match(name)
+        if match is None or match[1] < MIN_CONFIDENCE:
+            continue
+        out.append({"d": day, "i": match[0]["id"], "s": store, "p": round(price / max(qty, 1.0), 2)})
+    return out
+
+
+# ──────────────── Series ────────────────
+
+
+def _apply(obs: dict) -> None:
+    series = _series.setdefault((obs["i"], obs["s"]), [])
+    point = (date.fromisoformat(obs["d"]).toordinal(), obs["p"])
+    if not series or point[0] >= series[-1][0]:
+        series.append(point)
+    else:
+        insort(series, point)
+
+
+def _ensure_loaded() -> None:
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if _loaded:
+            return
+        for record in load_jsonl(OBSERVATIONS_FILE):
+            if "receipt" in record:
+                _receipts.add(record["receipt"])
+            elif _valid_day(record.get("d")) is None:
+                print(f"[PriceHistory] Ignoring stored observation with invalid date: {record!r}")
+            else:
+                _apply(record)
+        _loaded = True
+
+
+def process_batch(receipts: list[dict]) -> int:
+    """Match and store a batch of parsed receipts. Returns observations written."""
+    _ensure_loaded()
+    stores = grocery_index.price_matrix()[0]
+    records: list[dict] = []
+    with _lock:
+        for receipt in receipts:
+            key = _receipt_key(receipt)
+            if key in _receipts:
+                continue  # Same receipt scanned twice
+            try:
+                observations = _observations(receipt, stores)
+            except Exception as e:
+                # Not marked as seen, so the same receipt can be submitted again
+                print(f"[PriceHistory] Skipping receipt {key}: {e}")
+                continue
+            _receipts.add(key)
+            records.append({"receipt": key})
+            records.extend(observations)
+            for obs in observations:
+                _apply(obs)
+        if records:
+            with file_lock(OBSERVATIONS_FILE):
+                append_jsonl(OBSERVATIONS_FILE, records)
+    return sum(1 for r in records if "receipt" not in r)
+
+
+# ──────────────── Queries ────────────────
+
+
+def estimate(item_id: str, store: str, catalog_price: Optional[float] = None) -> Optional[dict]:
+    """Recency-weighted price for one item at one store."""
+    _ensure_loaded()
+    with _lock:
+        series = list(_series.get((item_id, store), []))
+    if not series and catalog_price is None:
+        return None
+
+    today = date.today().toordinal()
+    weighted = PRIOR_WEIGHT * catalog_price if catalog_price is not None else 0.0
+    total_weight = PRIOR_WEIGHT if catalog_price is not None else 0.0
+    for day, price in series:
+        w = 0.5 ** (max(today - day, 0) / HALF_LIFE_DAYS)
+        weighted += w * price
+        total_weight += w
+    return {
+        "store": store,
+        "estimate": round(weighted / total_weight, 2),
+        "catalogPrice": catalog_price,
+        "observations": len(series),
+        "lastSeen": date.fromordinal(series[-1][0]).isoformat() if series else None,
+        "lastPrice": series[-1][1] if series else None,
+    }
+
+
+def item_history(item_id: str) -> Optional[dict]:
+    """Observed prices and current estimates per store for one catalog item."""
+    _ensure_loaded()
+    item = next((i for i in grocery_index.items() if i["id"] == item_id), None)
+    if item is None:
+        return None
+    catalog = {s["store"]: s["price"] for s in item.get("stores", [])}
+    with _lock:
+        observed = {store: list(points) for (i, store), points in _series.items() if i == item_id}
+    stores = list(dict.fromkeys([*catalog, *observed]))
+    return {
+        "id": item_id,
+        "name": item["name"],
+        "estimates": [estimate(item_id, store, catalog.get(store)) for store in stores],
+        "history": {
+            store: [{"date": date.fromordinal(d).isoformat(), "price": p} for d, p in points]
+            for store, points in observed.items()
+        },
+    }
+
+
+# ──────────────── Worker ────────────────
+
+
+_worker = BatchWorker(
+    "stash-price-history",
+    "PriceHistory",
+    process_batch,
+    "Stored {count} price observation(s) from {size} receipt(s)",
+    MAX_BATCH_SIZE,
+    BATCH_WINDOW_SECONDS,
+)
+
+
+def submit(receipt: dict) -> None:
+    """Queue a parsed receipt for background price ingestion."""
+    _worker.submit(receipt)
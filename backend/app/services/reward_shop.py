@@ -0,0 +1,241 @@
+"""
+Reward shop purchase engine.
+
+Purchasing used to check stock and balance, then save coins.json and
+rewards_shop.json separately, so two requests racing for the last unit of a
+flash-drop reward could both pass the checks. Now:
+
+  • each reward has its own lock and an in-memory stock counter;
+  • a purchase first takes a reservation, which holds one unit for
+    RESERVATION_TTL_SECONDS — expired reservations hand their unit back;
+  • committing a reservation debits the coin ledger (tagged with the
+    purchase id) and appends one record to reward_purchases.jsonl. That
+    record is the commit point for stock: if the process dies between the
+    two appends, startup finds the tagged coin entry without a purchase
+    record and rolls the purchase forward, so coins and stock never disagree.
+
+rewards_shop.json is the catalog and is no longer rewritten; remaining
+stock and purchased flags are the catalog minus the purchase log.
+"""
+
+import heapq
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from app.services import coin_ledger
+from app.services.data_loader import load_json, load_jsonl, append_jsonl, file_lock
+
+
+CATALOG_FILE = "rewards_shop.json"
+PURCHASES_FILE = "reward_purchases.jsonl"
+RESERVATION_TTL_SECONDS = 30
+
+_lock = threading.RLock()                    # reservations + expiry heap
+_reward_locks: dict[str, threading.Lock] = {}
+_catalog: dict[str, dict] = {}               # reward id → catalog entry, in file order
+_remaining: dict[str, Optional[int]] = {}    # unsold units (None = unlimited)
+_held: dict[str, str] = {}                   # reward id → active reservation id
+_purchases: dict[str, dict] = {}             # reward id → purchase record
+_reservations: dict[str, dict] = {}
+_expiry: list[tuple[float, str]] = []        # (monotonic deadline, reservation id)
+_loaded = False
+
+
+# ──────────────── Loading ────────────────
+
+
+def _apply_purchase(record: dict) -> None:
+    reward_id = record["rewardId"]
+    _purchases[reward_id] = record
+    if _remaining.get(reward_id) is not None:
+        _remaining[reward_id] -= 1
+
+
+def _ensure_loaded() -> None:
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if _loaded:
+            return
+        for reward in load_json(CATALOG_FILE):
+            _catalog[reward["id"]] = reward
+            _reward_locks[reward["id"]] = threading.Lock()
+            _remaining[reward["id"]] = reward.get("stock")
+
+        records = load_jsonl(PURCHASES_FILE)
+        for record in records:
+            _apply_purchase(record)
+
+        # Roll forward purchases whose coins were debited but whose record never landed
+        committed = {r["id"] for r in records}
+        orphans = []
+        for entry in coin_ledger.entries_with_ref("reward"):
+            reward_id = entry["ref"].partition(":")[2]
+            if entry["ref"] in committed or reward_id not in _catalog:
+                continue
+            orphans.append({
+                "id": entry["ref"],
+                "rewardId": reward_id,
+                "cost": -entry["amount"],
+                "coinEntryId": entry["id"],
+                "purchasedAt": entry.get("at", entry["date"]),
+                "recovered": True,
+            })
+        if orphans:
+            with file_lock(PURCHASES_FILE):
+                append_jsonl(PURCHASES_FILE, orphans)
+            for record in orphans:
+                _apply_purchase(record)
+            print(f"[Rewards] Recovered {len(orphans)} interrupted purchase(s)")
+        _loaded = True
+
+
+# ──────────────── Reservations ────────────────
+
+
+def _release(reservation: dict) -> None:
+    """Hand a reserved unit back. Caller holds the reward's lock."""
+    reward_id = reservation["rewardId"]
+    if _held.get(reward_id) == reservation["id"]:
+        del _held[reward_id]
+        if _remaining.get(reward_id) is not None:
+            _remaining[reward_id] += 1
+
+
+def _expire_due() -> None:
+    """Release every reservation whose TTL has passed."""
+    now = time.monotonic()
+    due = []
+    with _lock:
+        while _expiry and _expiry[0][0] <= now:
+            _, reservation_id = heapq.heappop(_expiry)
+            due.append(reservation_id)
+    for reservation_id in due:
+        reservation = _reservations.get(reservation_id)
+        if reservation is None:
+            continue  # Already committed or released
+        with _reward_locks[reservation["rewardId"]]:
+            with _lock:
+                if _reservations.pop(reservation_id, None) is None:
+                    continue
+            _release(reservation)
+
+
+def reserve(reward_id: str, ttl: float = RESERVATION_TTL_SECONDS) -> dict:
+    """Hold one unit of a reward for `ttl` seconds. Raises ValueError if it can't."""
+    _ensure_loaded()
+    _expire_due()
+    reward = _catalog.get(reward_id)
+    if reward is None:
+        raise ValueError("Reward not found")
+
+    with _reward_locks[reward_id]:
+        if reward.get("purchased") or reward_id in _purchases:
+            raise ValueError("Already purchased")
+        if reward_id in _held:
+            raise ValueError("Purchase already in progress")
+        remaining = _remaining[reward_id]
+        if remaining is not None and remaining <= 0:
+            raise ValueError("Out of stock")
+        if coin_ledger.balance() < reward["cost"]:
+            raise ValueError(f"Not enough coins. Need {reward['cost']}, have {coin_ledger.balance()}")
+
+        reservation = {
+            "id": f"res-{uuid.uuid4().hex[:10]}",
+            "rewardId": reward_id,
+            "cost": reward["cost"],
+            "deadline": time.monotonic() + ttl,
+            "expiresAt": (datetime.now() + timedelta(seconds=ttl)).isoformat(),
+        }
+        if remaining is not None:
+            _remaining[reward_id] = remaining - 1
+        _held[reward_id] = reservation["id"]
+        with _lock:
+            _reservations[reservation["id"]] = reservation
+            heapq.heappush(_expiry, (reservation["deadline"], reservation["id"]))
+    return _present_reservation(reservation)
+
+
+def release(reservation_id: str) -> bool:
+    """Cancel a reservation. Returns False if it no longer exists."""
+    _ensure_loaded()
+    reservation = _reservations.get(reservation_id)
+    if reservation is None:
+        return False
+    with _reward_locks[reservation["rewardId"]]:
+        with _lock:
+            if _reservations.pop(reservation_id, None) is None:
+                return False
+        _release(reservation)
+    return True
+
+
+def commit(reservation_id: str) -> dict:
+    """Pay for a reservation and record the purchase. Returns the updated reward."""
+    _ensure_loaded()
+    reservation = _reservations.get(reservation_id)
+    if reservation is None:
+        raise ValueError("Reservation not found or expired")
+    reward_id = reservation["rewardId"]
+    reward = _catalog[reward_id]
+
+    with _reward_locks[reward_id]:
+        with _lock:
+            if _reservations.pop(reservation_id, None) is None:
+                raise ValueError("Reservation not found or expired")
+        if reservation["deadline"] <= time.monotonic():
+            _release(reservation)
+            raise ValueError("Reservation expired")
+
+        purchase_id = f"pur-{uuid.uuid4().hex[:8]}:{reward_id}"
+        entry = coin_ledger.spend(reservation["cost"], "reward", f"Redeemed: {reward['name']}", ref=purchase_id)
+        if entry is None:
+            _release(reservation)
+            raise ValueError(f"Not enough coins. Need {reservation['cost']}, have {coin_ledger.balance()}")
+
+        record = {
+            "id": purchase_id,
+            "rewardId": reward_id,
+            "cost": reservation["cost"],
+            "coinEntryId": entry["id"],
+            "purchasedAt": entry["at"],
+        }
+        with file_lock(PURCHASES_FILE):
+            append_jsonl(PURCHASES_FILE, [record])
+        # The reserved unit is now sold: stock was already taken at reserve time
+        del _held[reward_id]
+        _purchases[reward_id] = record
+        return _present(reward_id)
+
+
+def purchase(reward_id: str) -> dict:
+    """Reserve and immediately commit — the one-step purchase path."""
+    reservation = reserve(reward_id)
+    return commit(reservation["id"])
+
+
+# ──────────────── Reads ────────────────
+
+
+def _present_reservation(reservation: dict) -> dict:
+    return {k: v for k, v in reservation.items() if k != "deadline"}
+
+
+def _present(reward_id: str) -> dict:
+    """Catalog entry with live stock and purchase state (rewards_shop.json shape)."""
+    reward = dict(_catalog[reward_id])
+    reward["stock"] = _remaining[reward_id]
+    purchase_record = _purchases.get(reward_id)
+    if purchase_record:
+        reward["purchased"] = True
+        reward["purchasedAt"] = datetime.fromisoformat(purchase_record["purchasedAt"]).strftime("%Y-%m-%d %H:%M")
+    return reward
+
+
+def rewards() -> list[dict]:
+    _ensure_loaded()
+    _expire_due()
+    return [_present(reward_id) for reward_id in _catalog]
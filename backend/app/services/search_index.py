@@ -0,0 +1,269 @@
+"""
+In-process full-text search over community posts and market listings.
+
+A positional inverted index (term → doc → positions) ranked with BM25.
+Supports plain terms, "quoted phrases" and prefix* terms, plus filters on
+kind, intent, listing type and price. Posts come from the community store and
+are re-indexed one at a time as their text changes (votes don't touch the
+index: a doc holds the store's own post dict, so its vote count is always
+current); listings are rebuilt when market_listings.json changes on disk.
+"""
+
+import re
+import math
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Optional
+from app.services import community_match, community_store
+from app.services.data_loader import load_json, file_mtime
+
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+STOPWORDS = {"a", "an", "the", "in", "on", "at", "for", "to", "of", "and", "or", "is", "with", "near", "my", "i"}
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+PRICE_CAP_RE = re.compile(r"\b(?:under|below|less than|max|up to)\s*€\s*(\d+(?:\.\d+)?)", re.IGNORECASE)
+QUERY_PART_RE = re.compile(r'"([^"]+)"|(\S+)')
+
+LISTINGS_FILE = "market_listings.json"
+
+_lock = threading.RLock()
+_postings: dict[str, dict[str, list[int]]] = {}   # term → doc key → positions
+_vocab: list[str] = []                             # sorted terms, for prefix lookups
+_docs: dict[str, dict] = {}                        # doc key → {kind, item, length, terms, intent, type, price}
+_total_length = 0
+_posts_loaded = False
+_listings_mtime: Optional[int] = None
+
+
+# ──────────────── Tokenising ────────────────
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+def _doc_text(kind: str, item: dict) -> str:
+    if kind == "post":
+        return f"{item.get('content', '')} {' '.join(item.get('tags', []))}"
+    return f"{item.get('title', '')} {item.get('description', '')} {item.get('category', '')}"
+
+
+def _doc_price(kind: str, item: dict) -> Optional[float]:
+    if kind == "listing":
+        return item.get("price")
+    budget = community_match.extract_budget(item.get("content", ""))
+    return budget["low"] if budget else None
+
+
+# ──────────────── Index maintenance ────────────────
+
+
+def _add(kind: str, item: dict) -> None:
+    global _total_length
+    key = f"{kind}:{item['id']}"
+    tokens = tokenize(_doc_text(kind, item))
+    for pos, term in enumerate(tokens):
+        docs = _postings.get(term)
+        if docs is None:
+            docs = _postings[term] = {}
+            insort(_vocab, term)
+        docs.setdefault(key, []).append(pos)
+    _docs[key] = {
+        "kind": kind,
+        "item": item,
+        "length": len(tokens),
+        "terms": set(tokens),
+        "intent": item.get("intent"),
+        "type": item.get("type"),
+        "price": _doc_price(kind, item),
+    }
+    _total_length += len(tokens)
+
+
+def _remove(key: str) -> None:
+    global _total_length
+    doc = _docs.pop(key, None)
+    if doc is None:
+        return
+    _total_length -= doc["length"]
+    for term in doc["terms"]:
+        docs = _postings.get(term)
+        if docs is None:
+            continue
+        docs.pop(key, None)
+        if not docs:
+            del _postings[term]
+            i = bisect_left(_vocab, term)
+            if i < len(_vocab) and _vocab[i] == term:
+                _vocab.pop(i)
+
+
+def _rebuild_kind(kind: str, items: list[dict]) -> None:
+    for key in [k for k, d in _docs.items() if d["kind"] == kind]:
+        _remove(key)
+    for item in items:
+        _add(kind, item)
+
+
+def _ensure_fresh() -> None:
+    global _posts_loaded, _listings_mtime
+    if not _posts_loaded:
+        _rebuild_kind("post", community_store.all_posts())
+        _posts_loaded = True
+    mtime = file_mtime(LISTINGS_FILE)
+    if _listings_mtime != mtime:
+        _rebuild_kind("listing", load_json(LISTINGS_FILE))
+        _listings_mtime = mtime
+
+
+def update_posts(*posts: dict) -> None:
+    """Re-index posts that were just created or changed in the community store."""
+    with _lock:
+        if not _posts_loaded:
+            return  # Not built yet — the first search indexes every post
+        for post in posts:
+            _remove(f"post:{post['id']}")
+            _add("post", post)
+
+
+# ──────────────── Querying ────────────────
+
+
+def parse_query(q: str) -> dict:
+    """Split a raw query into terms, prefixes, phrases and an optional price cap."""
+    max_price = None
+    cap = PRICE_CAP_RE.search(q)
+    if cap:
+        max_price = float(cap.group(1))
+        q = PRICE_CAP_RE.sub(" ", q)
+
+    terms: list[str] = []
+    prefixes: list[str] = []
+    phrases: list[list[str]] = []
+    for phrase, word in QUERY_PART_RE.findall(q):
+        if phrase:
+            tokens = tokenize(phrase)
+            if len(tokens) > 1:
+                phrases.append(tokens)
+            terms.extend(tokens)
+        elif word.endswith("*") and len(word) > 1:
+            prefixes.extend(tokenize(word[:-1])[:1])
+        else:
+            terms.extend(t for t in tokenize(word) if t not in STOPWORDS)
+    return {"terms": terms, "prefixes": prefixes, "phrases": phrases, "max_price": max_price}
+
+
+def _expand_prefix(prefix: str) -> list[str]:
+    i = bisect_left(_vocab, prefix)
+    out = []
+    while i < len(_vocab) and _vocab[i].startswith(prefix):
+        out.append(_vocab[i])
+        i += 1
+    return out
+
+
+def _has_phrase(key: str, phrase: list[str]) -> bool:
+    first = _postings.get(phrase[0], {}).get(key)
+    if not first:
+        return False
+    rest = [set(_postings.get(t, {}).get(key, ())) for t in phrase[1:]]
+    return any(all(p + i + 1 in positions for i, positions in enumerate(rest)) for p in first)
+
+
+def _bm25(term: str, n_docs: int, avgdl: float) -> dict[str, float]:
+    docs = _postings.get(term)
+    if not docs:
+        return {}
+    idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+    scores = {}
+    for key, positions in docs.items():
+        tf = len(positions)
+        dl = _docs[key]["length"]
+        scores[key] = idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * dl / avgdl))
+    return scores
+
+
+def _matches_filters(doc: dict, kind, intent, listing_type, min_price, max_price) -> bool:
+    if kind and doc["kind"] != kind:
+        return False
+    if intent and doc["intent"] != intent:
+        return False
+    if listing_type and doc["type"] != listing_type:
+        return False
+    if min_price is not None or max_price is not None:
+        price = doc["price"]
+        if price is None:
+            return False
+        if min_price is not None and price < min_price:
+            return False
+        if max_price is not None and price > max_price:
+            return False
+    return True
+
+
+def _present(doc: dict) -> dict:
+    item = doc["item"]
+    if doc["kind"] == "post":
+        item = {k: v for k, v in item.items() if k != "comments"}
+        item["commentCount"] = len(doc["item"].get("comments", []))
+    return item
+
+
+def search(
+    q: str,
+    kind: Optional[str] = None,
+    intent: Optional[str] = None,
+    listing_type: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    limit: int = 20,
+) -> dict:
+    """Rank posts and listings against `q` with BM25."""
+    started = time.perf_counter()
+    parsed = parse_query(q)
+    if parsed["max_price"] is not None and max_price is None:
+        max_price = parsed["max_price"]
+
+    with _lock:
+        _ensure_fresh()
+        n_docs = len(_docs)
+        avgdl = _total_length / n_docs if n_docs else 1.0
+
+        query_terms = list(dict.fromkeys(parsed["terms"]))
+        for prefix in parsed["prefixes"]:
+            query_terms.extend(t for t in _expand_prefix(prefix) if t not in query_terms)
+
+        scores: dict[str, float] = {}
+        for term in query_terms:
+            for key, score in _bm25(term, n_docs, avgdl).items():
+                scores[key] = scores.get(key, 0.0) + score
+
+        # Filter-only queries (e.g. "under €50") list every matching doc
+        if not query_terms and not parsed["phrases"]:
+            scores = {key: 0.0 for key in _docs}
+
+        hits = []
+        for key, score in scores.items():
+            doc = _docs[key]
+            if not _matches_filters(doc, kind, intent, listing_type, min_price, max_price):
+                continue
+            if any(not _has_phrase(key, phrase) for phrase in parsed["phrases"]):
+                continue
+            hits.append((score, key))
+        hits.sort(key=lambda h: (-h[0], h[1]))
+
+        results = [
+            {"kind": _docs[key]["kind"], "score": round(score, 4), "item": _present(_docs[key])}
+            for score, key in hits[:limit]
+        ]
+
+    return {
+        "query": q,
+        "total": len(hits),
+        "results": results,
+        "tookMs": round((time.perf_counter() - started) * 1000, 3),
+    }
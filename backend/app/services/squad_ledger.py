@@ -0,0 +1,352 @@
+"""
+Event-sourced squad ledger.
+
+Every squad mutation — split, payment (settle), nudge — is an append to
+squad_ledger.jsonl. Balances are a materialized view over that log, held
+in memory and indexed by member id, so mutations are O(1) appends and
+lookups never scan squad_members.json (which is now just the roster of
+names and initials). The first time the ledger is opened it is seeded
+with one "opening" event per member from the roster's pairwise balances.
+
+Two views are maintained per event:
+  • the pairwise balance between "you" and each member (what the Squad tab
+    shows: positive = they owe you), and
+  • every participant's net position, so debts between members are
+    visible to the settlement planner.
+
+The view is snapshotted to squad_snapshot.json every SNAPSHOT_EVERY events
+together with the log's byte offset; startup restores the snapshot and
+replays only the tail. `rebuild()` replays the whole log from scratch and
+`history()` returns the events behind any balance.
+
+All amounts are integer cents so thousands of splits never drift.
+"""
+
+import heapq
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from app.services.data_loader import (
+    load_json,
+    save_json_atomic,
+    load_jsonl,
+    append_jsonl,
+    file_lock,
+    file_size,
+)
+
+
+LEDGER_FILE = "squad_ledger.jsonl"
+SNAPSHOT_FILE = "squad_snapshot.json"
+SNAPSHOT_EVERY = 500
+YOU = "you"
+
+_lock = threading.RLock()
+_roster: dict[str, dict] = {}
+_view: dict[str, dict] = {}      # member id → pairwise balance with you + metadata
+_net: dict[str, int] = {}        # participant → net cents (positive = owed money)
+_event_count = 0
+_loaded = False
+
+
+def to_cents(amount: float) -> int:
+    return int(round(amount * 100))
+
+
+def split_shares(total_cents: int, participants: list[str]) -> dict[str, int]:
+    """Split a total evenly, handing leftover cents to the first participants."""
+    base, remainder = divmod(total_cents, len(participants))
+    return {p: base + (1 if i < remainder else 0) for i, p in enumerate(participants)}
+
+
+# ──────────────── Event application ────────────────
+
+
+def _entry(member_id: str) -> dict:
+    entry = _view.get(member_id)
+    if entry is None:
+        entry = _view[member_id] = {
+            "balance": 0,
+            "reason": "",
+            "lastActivityAt": None,
+            "nudges": 0,
+            "lastNudgedAt": None,
+        }
+    return entry
+
+
+def _touch(member_id: str, delta: int, reason: Optional[str], at: str) -> None:
+    if member_id == YOU:
+        return
+    entry = _entry(member_id)
+    entry["balance"] += delta
+    if reason:
+        entry["reason"] = reason
+    entry["lastActivityAt"] = at
+
+
+def _shift(participant: str, delta: int) -> None:
+    _net[participant] = _net.get(participant, 0) + delta
+
+
+def _apply(event: dict) -> None:
+    global _event_count
+    kind = event["type"]
+    at = event["at"]
+
+    if kind == "opening":
+        # Carried-over debt: `from` owes `to`
+        debtor, creditor, amount = event["from"], event["to"], event["amount"]
+        _shift(debtor, -amount)
+        _shift(creditor, amount)
+        if creditor == YOU:
+            _touch(debtor, amount, event.get("reason"), at)
+        elif debtor == YOU:
+            _touch(creditor, -amount, event.get("reason"), at)
+
+    elif kind == "payment":
+        # `from` pays `to` back
+        payer, payee, amount = event["from"], event["to"], event["amount"]
+        _shift(payer, amount)
+        _shift(payee, -amount)
+        if payee == YOU:
+            _touch(payer, -amount, None, at)
+        elif payer == YOU:
+            _touch(payee, amount, None, at)
+
+    elif kind == "split":
+        paid_by, shares = event["paidBy"], event["shares"]
+        reason = f"{event.get('description', 'Expense')} (split)"
+        _shift(paid_by, event["amount"])
+        for participant, share in shares.items():
+            _shift(participant, -share)
+        if paid_by == YOU:
+            for participant, share in shares.items():
+                _touch(participant, share, reason, at)
+        elif YOU in shares:
+            _touch(paid_by, -shares[YOU], reason, at)
+
+    elif kind == "nudge":
+        entry = _entry(event["memberId"])
+        entry["nudges"] += 1
+        entry["lastNudgedAt"] = at
+
+    _event_count += 1
+
+
+def _event(kind: str, **fields) -> dict:
+    return {
+        "id": f"sqe-{uuid.uuid4().hex[:8]}",
+        "type": kind,
+        "at": datetime.now().isoformat(),
+        **fields,
+    }
+
+
+def _opening_events() -> list[dict]:
+    events = []
+    now = datetime.now()
+    for member in _roster.values():
+        amount = to_cents(member.get("amount", 0))
+        if amount <= 0 or member.get("direction") not in ("owes-you", "you-owe"):
+            continue
+        debtor, creditor = (member["id"], YOU) if member["direction"] == "owes-you" else (YOU, member["id"])
+        event = _event("opening", **{"from": debtor, "to": creditor, "amount": amount})
+        event["reason"] = member.get("reason", "")
+        event["at"] = (now - timedelta(days=member.get("daysSince", 0))).isoformat()
+        events.append(event)
+    return events
+
+
+# ──────────────── Loading, snapshots & replay ────────────────
+
+
+def _reset() -> None:
+    global _event_count
+    _view.clear()
+    _net.clear()
+    _event_count = 0
+
+
+def _ensure_loaded() -> None:
+    global _loaded, _event_count
+    if _loaded:
+        return
+    with _lock:
+        if _loaded:
+            return
+        _roster.clear()
+        _roster.update({m["id"]: m for m in load_json("squad_members.json")})
+        _reset()
+
+        offset = 0
+        try:
+            state = load_json(SNAPSHOT_FILE)
+            view, net, count, offset = state["view"], state["net"], state["eventCount"], state["logOffset"]
+            _view.update(view)
+            _net.update(net)
+            _event_count = count
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError) as e:
+            # A torn or hand-edited snapshot is only a cache: replay the whole log
+            print(f"[Squad] Ignoring unreadable {SNAPSHOT_FILE} ({e}), replaying the ledger")
+            _reset()
+            offset = 0
+
+        events = load_jsonl(LEDGER_FILE, offset)
+        if not events and offset == 0:
+            events = _opening_events()
+            with file_lock(LEDGER_FILE):
+                append_jsonl(LEDGER_FILE, events)
+        for event in events:
+            _apply(event)
+        _loaded = True
+
+
+def snapshot() -> None:
+    """Persist the materialized view and the log offset it covers."""
+    _ensure_loaded()
+    with _lock, file_lock(LEDGER_FILE):
+        save_json_atomic(SNAPSHOT_FILE, {
+            "eventCount": _event_count,
+            "logOffset": file_size(LEDGER_FILE),
+            "takenAt": datetime.now().isoformat(),
+            "view": _view,
+            "net": _net,
+        })
+
+
+def rebuild() -> int:
+    """Discard the view and replay the full event log. Returns events replayed."""
+    _ensure_loaded()
+    with _lock:
+        _reset()
+        for event in load_jsonl(LEDGER_FILE):
+            _apply(event)
+        snapshot()
+        return _event_count
+
+
+def _record(event: dict) -> dict:
+    _ensure_loaded()
+    with _lock:
+        with file_lock(LEDGER_FILE):
+            append_jsonl(LEDGER_FILE, [event])
+        _apply(event)
+        if _event_count % SNAPSHOT_EVERY == 0:
+            snapshot()
+    return event
+
+
+# ──────────────── Recording ────────────────
+
+
+def record_split(description: str, total_amount: float, paid_by: str, participants: list[str]) -> dict:
+    """Record an expense paid by `paid_by` and shared evenly by `participants`."""
+    total = to_cents(total_amount)
+    return _record(_event(
+        "split",
+        description=description,
+        paidBy=paid_by,
+        amount=total,
+        shares=split_shares(total, list(dict.fromkeys(participants))),
+    ))
+
+
+def record_payment(payer: str, payee: str, amount: float) -> dict:
+    """Record `payer` paying `payee` back."""
+    return _record(_event("payment", **{"from": payer, "to": payee, "amount": to_cents(amount)}))
+
+
+def record_nudge(member_id: str) -> dict:
+    return _record(_event("nudge", memberId=member_id))
+
+
+# ──────────────── Queries ────────────────
+
+
+def _present(member_id: str) -> dict:
+    roster = _roster[member_id]
+    entry = _view.get(member_id) or {}
+    balance = entry.get("balance", 0)
+    last = entry.get("lastActivityAt")
+    days_since = (datetime.now() - datetime.fromisoformat(last)).days if last else roster.get("daysSince", 0)
+    return {
+        "id": member_id,
+        "name": roster["name"],
+        "initials": roster.get("initials", ""),
+        "amount": abs(balance) / 100,
+        "direction": "owes-you" if balance > 0 else "you-owe" if balance < 0 else "settled",
+        "reason": entry.get("reason") or roster.get("reason", ""),
+        "daysSince": days_since,
+        "nudges": entry.get("nudges", 0),
+    }
+
+
+def get_member(member_id: str) -> Optional[dict]:
+    """O(1) lookup of a member's current balance with you."""
+    _ensure_loaded()
+    with _lock:
+        if member_id not in _roster:
+            return None
+        return _present(member_id)
+
+
+def members() -> list[dict]:
+    """All members in roster order, in the squad_members.json shape."""
+    _ensure_loaded()
+    with _lock:
+        return [_present(member_id) for member_id in _roster]
+
+
+def member_names() -> dict[str, str]:
+    _ensure_loaded()
+    return {**{m_id: m["name"] for m_id, m in _roster.items()}, YOU: "You"}
+
+
+def history(member_id: Optional[str] = None) -> list[dict]:
+    """Events behind the balances, oldest first, optionally for one member."""
+    _ensure_loaded()
+    events = load_jsonl(LEDGER_FILE)
+    if member_id is None:
+        return events
+    return [
+        e for e in events
+        if member_id in (e.get("from"), e.get("to"), e.get("paidBy"), e.get("memberId"))
+        or member_id in e.get("shares", {})
+    ]
+
+
+def net_balances() -> dict[str, int]:
+    """Net position per participant in cents (positive = owed money)."""
+    _ensure_loaded()
+    with _lock:
+        return {p: amount for p, amount in _net.items() if amount != 0}
+
+
+def settlement_plan() -> list[dict]:
+    """Short list of transfers that zeroes every net balance.
+
+    Greedy min-cash-flow: repeatedly match the largest creditor with the
+    largest debtor. Each step settles at least one of them, so n people
+    need at most n - 1 transfers; heaps make it O(n log n).
+    """
+    balances = net_balances()
+    creditors = [(-amount, p) for p, amount in balances.items() if amount > 0]
+    debtors = [(amount, p) for p, amount in balances.items() if amount < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+
+    transfers = []
+    while creditors and debtors:
+        credit, creditor = heapq.heappop(creditors)
+        debt, debtor = heapq.heappop(debtors)
+        amount = min(-credit, -debt)
+        transfers.append({"from": debtor, "to": creditor, "amount": amount})
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, creditor))
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, debtor))
+    return transfers
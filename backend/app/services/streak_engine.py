@@ -0,0 +1,237 @@
+"""
+Under-budget streak engine.
+
+Streak state used to be hand-written in streaks.json. It is now derived
+from transactions.json and the daily budget in budget.json: a day counts
+towards the streak when it has at least one transaction and its total
+spend is within the daily budget. A day over budget, or a calendar day with
+no recorded activity, ends the streak — an idle user builds nothing. Today
+is still open: until it has a transaction, the streak ending yesterday is
+shown as alive.
+
+Transactions are consumed one at a time and only the "open" day is kept
+in full, so each transaction is O(1):
+
+  • _open_day / _open_spent — the latest active day and its running spend;
+  • _run_before — the under-budget run ending the day before _open_day.
+
+A transaction on a later day closes the open day: the run through it is
+final, so that is where milestones are checked. A transaction dated before
+the open day, or a budget change, cannot be folded in, so the engine
+replays everything instead (`backfill()`, which sorts once and then takes
+the same O(1) step per transaction).
+
+Milestone coins (MILESTONE_COINS) are paid once a closed run reaches the
+milestone, and only on the write path — `record()` and `backfill()`.
+Reads (`state()`) and the replays they may trigger never touch coins;
+milestones a replay finds are queued and paid by the next write. Each award
+is a coin ledger entry with ref "milestone:<days>", checked again under the
+lock before paying, so it is paid exactly once even across restarts and
+backfills. Milestones already marked achieved in streaks.json count as
+paid. streaks.json is still the milestone catalog and keeps the claimed
+flags.
+"""
+
+import threading
+import time
+from datetime import date
+from typing import Optional
+from app.services import coin_ledger
+from app.services.data_loader import load_json, file_mtime
+
+
+STREAKS_FILE = "streaks.json"
+TRANSACTIONS_FILE = "transactions.json"
+BUDGET_FILE = "budget.json"
+MILESTONE_COINS = {3: 50, 7: 100, 14: 150, 30: 250, 60: 400, 90: 600}
+
+_lock = threading.RLock()
+_budget = 0.0
+_open_day: Optional[int] = None     # date ordinal of the latest active day
+_open_spent = 0.0
+_run_before = 0
+_longest = 0
+_seen: set[str] = set()             # transaction ids already counted
+_awarded: set[int] = set()          # milestone days reached (paid or queued)
+_unpaid: list[dict] = []            # reached milestones waiting for a write to pay them
+_milestones: list[dict] = []
+_source_mtimes: Optional[tuple] = None
+_loaded = False
+
+
+def _day(tx: dict) -> int:
+    return date.fromisoformat(tx["date"][:10]).toordinal()
+
+
+# ──────────────── Incremental step ────────────────
+
+
+def _open_run() -> int:
+    """Run through the open day, if the open day stays within budget."""
+    return _run_before + 1 if _open_spent <= _budget else 0
+
+
+def _current(today: int) -> int:
+    """Live streak as of `today`, without changing any state."""
+    if _open_day is None or _open_day < today - 1:
+        return 0
+    return _open_run()
+
+
+def _close_run(run: int) -> None:
+    """A run that can no longer change: note it and queue the milestones it reached."""
+    global _longest
+    _longest = max(_longest, run)
+    for m in _milestones:
+        if m["days"] <= run and m["days"] not in _awarded:
+            _awarded.add(m["days"])
+            _unpaid.append(m)
+
+
+def _advance(day: int) -> None:
+    """Make `day` the open day, closing the previous one."""
+    global _open_day, _open_spent, _run_before
+    if _open_day is None:
+        _open_day = day
+        return
+    if day <= _open_day:
+        return
+    run = _open_run()
+    _close_run(run)
+    # Only the very next day continues the run; a day without activity ends it
+    _run_before = run if day == _open_day + 1 else 0
+    _open_day = day
+    _open_spent = 0.0
+
+
+def _close_past(today: int) -> None:
+    """An open day before today is over, so its run is final."""
+    if _open_day is not None and _open_day < today:
+        _close_run(_open_run())
+
+
+def _step(tx: dict) -> bool:
+    """Fold one transaction in. False means it predates the open day."""
+    global _open_spent
+    if tx["id"] in _seen:
+        return True
+    day = _day(tx)
+    if _open_day is not None and day < _open_day:
+        return False
+    _seen.add(tx["id"])
+    _advance(day)
+    _open_spent += abs(tx.get("amount", 0))
+    return True
+
+
+def _pay_unpaid() -> list[dict]:
+    """Pay queued milestones, skipping any the ledger already shows as paid. Caller holds _lock."""
+    paid = []
+    for m in _unpaid:
+        ref = f"milestone:{m['days']}"
+        coins = MILESTONE_COINS.get(m["days"], 0)
+        if not coins or coin_ledger.has_ref(ref):
+            continue
+        coin_ledger.earn(coins, "streak", f"Streak milestone: {m['label']}", ref=ref)
+        paid.append(m)
+        print(f"[Streaks] {m['days']}-day milestone reached, awarded {coins} coins")
+    _unpaid.clear()
+    return paid
+
+
+# ──────────────── Loading & backfill ────────────────
+
+
+def _mtimes() -> tuple:
+    return file_mtime(TRANSACTIONS_FILE), file_mtime(BUDGET_FILE)
+
+
+def _replay() -> int:
+    global _budget, _open_day, _open_spent, _run_before, _longest, _source_mtimes
+    streaks = load_json(STREAKS_FILE)
+    _milestones[:] = sorted(streaks.get("milestones", []), key=lambda m: m["days"])
+    _budget = float(load_json(BUDGET_FILE).get("dailyBudget", 0))
+    transactions = sorted(load_json(TRANSACTIONS_FILE), key=lambda t: t["date"])
+    _source_mtimes = _mtimes()
+
+    _open_day, _open_spent, _run_before = None, 0.0, 0
+    _longest = streaks.get("longestStreak", 0)
+    _seen.clear()
+    _unpaid.clear()
+    _awarded.clear()
+    _awarded.update(m["days"] for m in _milestones if m.get("achieved"))
+    for entry in coin_ledger.entries_with_ref("streak"):
+        _awarded.add(int(entry["ref"].partition(":")[2]))
+
+    for tx in transactions:
+        _step(tx)
+    _close_past(date.today().toordinal())
+    return len(transactions)
+
+
+def _ensure_fresh(check_sources: bool = True) -> None:
+    """Load on first use; replay if either source file changed underneath us."""
+    global _loaded
+    if _loaded and (not check_sources or _source_mtimes == _mtimes()):
+        return
+    with _lock:
+        if _loaded and (not check_sources or _source_mtimes == _mtimes()):
+            return
+        _replay()
+        _loaded = True
+
+
+def backfill() -> dict:
+    """Replay the full transaction history from scratch and pay any milestones it reached."""
+    global _loaded
+    started = time.perf_counter()
+    with _lock:
+        count = _replay()
+        _loaded = True
+        paid = _pay_unpaid()
+        stats = {
+            "transactions": count,
+            "currentStreak": _current(date.today().toordinal()),
+            "longestStreak": _longest,
+            "milestonesAwarded": [m["days"] for m in paid],
+        }
+    stats["tookMs"] = round((time.perf_counter() - started) * 1000, 3)
+    return stats
+
+
+# ──────────────── Writes ────────────────
+
+
+def record(tx: dict) -> list[dict]:
+    """Consume a transaction that was just saved to transactions.json.
+
+    This is the write path that pays milestone coins; returns the milestones paid.
+    """
+    global _source_mtimes
+    # The caller just rewrote transactions.json, so its mtime says nothing here
+    _ensure_fresh(check_sources=False)
+    with _lock:
+        if not _step(tx):
+            _replay()   # Back-dated: fold it in by replaying
+        _close_past(date.today().toordinal())
+        _source_mtimes = _mtimes()
+        return _pay_unpaid()
+
+
+# ──────────────── Reads ────────────────
+
+
+def state() -> dict:
+    """streaks.json with live streak, today flag and milestone state. Read-only: never pays coins."""
+    _ensure_fresh()
+    today = date.today().toordinal()
+    with _lock:
+        current = _current(today)
+        streaks = load_json(STREAKS_FILE)
+        streaks["currentStreak"] = current
+        streaks["longestStreak"] = max(_longest, current)
+        streaks["todayUnderBudget"] = _open_day != today or _open_spent <= _budget
+        for m in streaks.get("milestones", []):
+            m["achieved"] = m["days"] in _awarded
+            m["coins"] = MILESTONE_COINS.get(m["days"], 0)
+    return streaks
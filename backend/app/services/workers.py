@@ -0,0 +1,84 @@
+"""
+Background threads shared by the services.
+
+`DaemonThread` is a named daemon thread that is started on first use and
+restarted if it ever died. `BatchWorker` builds the queue-draining pattern
+on top of it: block for the first item, collect more for a short window
+(up to a batch size), hand the batch to a function and log what it did.
+"""
+
+import queue
+import threading
+from typing import Callable, Optional
+
+
+class DaemonThread:
+    """Runs `target` on a named daemon thread, (re)started by `ensure()`."""
+
+    def __init__(self, name: str, target: Callable[[], None]):
+        self.name = name
+        self._target = target
+        self._thread: Optional[threading.Thread] = None
+        self._guard = threading.Lock()
+
+    def ensure(self) -> None:
+        with self._guard:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._target, name=self.name, daemon=True)
+                self._thread.start()
+
+
+class BatchWorker:
+    """Drains submitted items in batches on a daemon thread.
+
+    `process(batch)` returns a count; when it is non-zero, `summary` is
+    logged under `[tag]` with {count} and {size} (the batch length) filled in.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        tag: str,
+        process: Callable[[list], int],
+        summary: str,
+        max_batch_size: int,
+        window_seconds: float,
+    ):
+        self.tag = tag
+        self.max_batch_size = max_batch_size
+        self.window_seconds = window_seconds
+        self._process = process
+        self._summary = summary
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = DaemonThread(name, self._run)
+
+    def submit(self, item) -> None:
+        self._thread.ensure()
+        self._queue.put(item)
+
+    def join(self) -> None:
+        """Block until every submitted item has been processed."""
+        self._queue.join()
+
+    def _drain(self) -> list:
+        """Block for the first item, then collect more for a short window."""
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get(timeout=self.window_seconds))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._drain()
+            try:
+                count = self._process(batch)
+                if count:
+                    print(f"[{self.tag}] " + self._summary.format(count=count, size=len(batch)))
+            except Exception as e:
+                print(f"[{self.tag}] Batch failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
@@ -0,0 +1,53 @@
+"""
+Shared fixtures.
+
+Services keep their state at module level and read/write backend/data, so
+every test gets a private copy of the data directory and fresh module
+state: `data_dir` points data_loader at the copy, and `fresh(...)` reloads
+the named service modules so they replay from it. Modules with background
+threads expose `shutdown()`; `fresh` calls it before each reload and at
+teardown, while data_loader still points at the copy.
+"""
+
+import importlib
+import shutil
+from pathlib import Path
+
+import pytest
+
+from app.services import data_loader
+
+
+SEED_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    target = tmp_path / "data"
+    shutil.copytree(SEED_DIR, target, ignore=shutil.ignore_patterns("*.jsonl"))
+    monkeypatch.setattr(data_loader, "DATA_DIR", target)
+    return target
+
+
+def _shutdown(module) -> None:
+    if hasattr(module, "shutdown"):
+        module.shutdown()
+
+
+@pytest.fixture
+def fresh(data_dir):
+    """Reload service modules (in the order given) against the test's data copy."""
+    reloaded = {}
+
+    def reload(*names: str):
+        modules = []
+        for name in names:
+            module = importlib.import_module(f"app.services.{name}")
+            _shutdown(module)
+            modules.append(importlib.reload(module))
+            reloaded[name] = module
+        return modules[0] if len(modules) == 1 else modules
+
+    yield reload
+    for module in reloaded.values():
+        _shutdown(module)
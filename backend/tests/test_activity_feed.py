@@ -0,0 +1,37 @@
+def _walk(activity_feed, limit: int) -> list[int]:
+    seqs, cursor = [], None
+    while True:
+        entries, cursor = activity_feed.page(limit, cursor)
+        seqs.extend(e["seq"] for e in entries)
+        if cursor is None:
+            return seqs
+
+
+def test_cursor_walks_across_ring_buffer_and_segments(fresh, data_dir):
+    activity_feed = fresh("activity_feed")
+    for i in range(2500):
+        activity_feed.record("🧪", f"entry {i}")
+    newest = activity_feed.page(1)[0][0]["seq"]
+
+    # 2.5k entries span two archived segments, the active one and the 200-entry ring
+    assert len(list(data_dir.glob("squad_activity.*.jsonl"))) == 2
+    for limit in (7, 37, 100):
+        assert _walk(activity_feed, limit) == list(range(newest, 0, -1))
+
+    # A page that starts inside the ring and ends in a segment is contiguous
+    boundary = newest - activity_feed.HOT_CAPACITY
+    entries, cursor = activity_feed.page(10, boundary + 5)
+    assert [e["seq"] for e in entries] == list(range(boundary + 4, boundary - 6, -1))
+    assert cursor == boundary - 5
+
+
+def test_replay_after_restart(fresh):
+    activity_feed = fresh("activity_feed")
+    for i in range(1200):
+        activity_feed.record("🧪", f"entry {i}")
+    before = _walk(activity_feed, 50)
+
+    activity_feed = fresh("activity_feed")
+    assert _walk(activity_feed, 50) == before
+    entry = activity_feed.record("🧪", "after restart")
+    assert entry["seq"] == before[0] + 1
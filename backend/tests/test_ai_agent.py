@@ -0,0 +1,37 @@
+import pytest
+
+from app.services import ai_agent
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    monkeypatch.delenv("AZURE_OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("AI_MODE", "mock")
+
+
+def test_one_context_key_per_source():
+    loaders = list(ai_agent.CONTEXT_LOADERS.values())
+    assert len(loaders) == len(set(loaders))
+    declared = {k for keys in ai_agent.TEMPLATE_CONTEXT.values() for k in keys} | set(ai_agent.LLM_CONTEXT)
+    assert declared <= set(ai_agent.CONTEXT_LOADERS)
+    assert set(ai_agent.CONTEXT_FILES) == set(ai_agent.CONTEXT_LOADERS)
+
+
+@pytest.mark.parametrize("message, keys", [
+    ("What's my current streak?", {"streaks", "missions"}),
+    ("Who owes me money in the squad?", {"squad_members"}),
+    ("What's the INR exchange rate?", {"fx"}),
+    ("How do I renew my IRP?", set()),
+])
+def test_chat_loads_only_declared_context(fresh, message, keys):
+    fresh("coin_ledger", "streak_engine", "mission_engine", "squad_ledger")
+    result = ai_agent.run_agent(message)
+    assert set(result["contextTimings"]) == keys
+
+
+def test_chat_about_streaks_never_mints_coins(fresh):
+    coin_ledger, _, _ = fresh("coin_ledger", "streak_engine", "mission_engine")
+    balance = coin_ledger.balance()
+    for _ in range(3):
+        ai_agent.run_agent("How long is my streak and which missions are left?")
+    assert coin_ledger.balance() == balance
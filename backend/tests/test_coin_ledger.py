@@ -0,0 +1,51 @@
+import json
+
+
+def test_seeded_from_coins_json(fresh, data_dir):
+    coins = json.loads((data_dir / "coins.json").read_text())
+    coin_ledger = fresh("coin_ledger")
+    assert coin_ledger.balance() == coins["balance"]
+    assert coin_ledger.lifetime() == coins["lifetime"]
+
+
+def test_spend_never_overdraws(fresh):
+    coin_ledger = fresh("coin_ledger")
+    balance = coin_ledger.balance()
+    assert coin_ledger.spend(balance + 1, "reward", "too much") is None
+    assert coin_ledger.spend(balance, "reward", "all of it") is not None
+    assert coin_ledger.balance() == 0
+    assert coin_ledger.reverse(50, "mission", "undo")["amount"] == 0
+    assert coin_ledger.balance() == 0
+
+
+def test_replay_rebuilds_balance_and_indexes(fresh):
+    coin_ledger = fresh("coin_ledger")
+    coin_ledger.earn(100, "mission", "m1")
+    coin_ledger.spend(30, "reward", "r1", ref="pur-1:rw-001")
+    coin_ledger.earn(5, "streak", "s1")
+    state = (coin_ledger.balance(), coin_ledger.lifetime(), coin_ledger.rollups(), coin_ledger.history(limit=100))
+
+    coin_ledger = fresh("coin_ledger")
+    assert (coin_ledger.balance(), coin_ledger.lifetime(), coin_ledger.rollups(), coin_ledger.history(limit=100)) == state
+    assert [e["ref"] for e in coin_ledger.entries_with_ref("reward")] == ["pur-1:rw-001"]
+    assert coin_ledger.has_ref("pur-1:rw-001")
+    assert not coin_ledger.has_ref("pur-2:rw-001")
+
+
+def test_history_pages_by_source_and_cursor(fresh):
+    coin_ledger = fresh("coin_ledger")
+    for i in range(25):
+        coin_ledger.earn(1, "mission", f"m{i}")
+        coin_ledger.earn(1, "streak", f"s{i}")
+
+    labels, cursor = [], None
+    while True:
+        page, cursor = coin_ledger.history(source="mission", limit=10, cursor=cursor)
+        labels.extend(e["label"] for e in page)
+        if cursor is None:
+            break
+    assert labels[:25] == [f"m{i}" for i in reversed(range(25))]
+    assert all(e["source"] == "mission" for e in coin_ledger.history(source="mission", limit=100)[0])
+
+    seqs = [e["seq"] for e in coin_ledger.history(limit=50)[0]]
+    assert seqs == sorted(seqs, reverse=True) and len(seqs) == 50
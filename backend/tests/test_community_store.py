@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+
+import numpy as np
+
+
+def _post(i: int) -> dict:
+    return {
+        "id": f"cp-{i:05d}",
+        "author": "Test User",
+        "avatar": "TU",
+        "content": f"Post number {i} about rooms, bikes and books",
+        "tags": [],
+        "intent": "GENERAL",
+        "aiMatch": None,
+        "upvotes": 0,
+        "comments": [],
+        "createdAt": f"2026-03-01T10:{i % 60:02d}:00",
+    }
+
+
+def _comment(i: int) -> dict:
+    return {"id": f"cc-{i:05d}", "author": "Tester", "avatar": "T", "content": "nice", "isAI": False, "createdAt": "2026-03-01T12:00:00"}
+
+
+def _percentiles(samples: list[float]) -> tuple[float, float]:
+    ms = np.array(samples) * 1000
+    return float(np.percentile(ms, 50)), float(np.percentile(ms, 95))
+
+
+def test_vote_and_comment_latency_10k_posts(fresh, data_dir):
+    (data_dir / "community_posts.json").write_text(json.dumps([_post(i) for i in range(10_000)]))
+    community_store = fresh("community_store")
+    assert len(community_store.all_posts()) == 10_000
+
+    ids = [f"cp-{i:05d}" for i in np.random.default_rng(0).integers(0, 10_000, 2000)]
+    votes, comments = [], []
+    for n, post_id in enumerate(ids):
+        start = time.perf_counter()
+        community_store.vote(post_id, 1)
+        votes.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        community_store.add_comment(post_id, _comment(n))
+        comments.append(time.perf_counter() - start)
+
+    vote_p50, vote_p95 = _percentiles(votes)
+    comment_p50, comment_p95 = _percentiles(comments)
+    # Neither path may touch the 10k-post snapshot
+    assert vote_p50 < 0.2 and vote_p95 < 1.0
+    assert comment_p50 < 1.0 and comment_p95 < 5.0
+
+
+def test_log_replays_over_snapshot(fresh):
+    community_store = fresh("community_store")
+    post = community_store.all_posts()[0]
+    upvotes = post["upvotes"]
+    community_store.insert_post(_post(1))
+    community_store.add_comment(post["id"], _comment(1))
+    community_store.vote(post["id"], 1)
+    community_store.flush()
+
+    community_store = fresh("community_store")
+    replayed = community_store.get_post(post["id"])
+    assert replayed["upvotes"] == upvotes + 1
+    assert replayed["comments"][-1]["id"] == "cc-00001"
+    assert community_store.get_post("cp-00001") is not None
+
+
+def test_compaction_folds_log_into_snapshot(fresh, data_dir, monkeypatch):
+    community_store = fresh("community_store")
+    monkeypatch.setattr(community_store, "COMPACT_AFTER", 5)
+    post_id = community_store.all_posts()[0]["id"]
+    for i in range(5):
+        community_store.add_comment(post_id, _comment(i))
+    community_store.flush()
+
+    assert (data_dir / "community_log.jsonl").read_text() == ""
+    snapshot = json.loads((data_dir / "community_posts.json").read_text())
+    assert [c["id"] for c in snapshot[0]["comments"][-5:]] == [f"cc-{i:05d}" for i in range(5)]
+
+    community_store = fresh("community_store")
+    assert len(community_store.get_post(post_id)["comments"]) == len(snapshot[0]["comments"])
+
+
+def test_unflushed_votes_are_not_on_disk_until_flush(fresh, data_dir):
+    community_store = fresh("community_store")
+    post_id = community_store.all_posts()[0]["id"]
+    community_store.vote(post_id, 1)
+    log = data_dir / "community_log.jsonl"
+    assert not log.exists() or '"votes"' not in log.read_text()
+    community_store.flush()
+    assert '"votes"' in log.read_text()
+
+
+def test_reload_leaves_one_flusher(fresh):
+    for _ in range(3):
+        community_store = fresh("community_store")
+        community_store.all_posts()
+    flushers = [t for t in threading.enumerate() if t.name == "stash-community-flush"]
+    assert flushers == [community_store._flusher]
+
+    community_store.shutdown()
+    assert community_store._flusher is None
+    assert not flushers[0].is_alive()
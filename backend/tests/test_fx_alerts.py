@@ -0,0 +1,60 @@
+from datetime import date, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def fx(fresh):
+    fx_analytics, fx_alerts = fresh("fx_analytics", "fx_alerts")
+    fx_alerts.set_notifier(fx_alerts.InMemoryNotifier())
+    start = date.today() + timedelta(days=1)
+    days = iter(range(10_000))
+
+    def push(rate: float) -> list[dict]:
+        fx_analytics.add_rate((start + timedelta(days=next(days))).isoformat(), rate)
+        return fx_alerts.evaluate()
+
+    return fx_analytics, fx_alerts, push
+
+
+def test_alert_already_met_at_creation_waits_for_a_crossing(fx):
+    fx_analytics, fx_alerts, push = fx
+    rate = fx_analytics.current_rate()
+    above = fx_alerts.create("threshold", "above", rate * 0.99)
+    below = fx_alerts.create("threshold", "below", rate * 1.01)
+    assert above["armed"] is False and below["armed"] is False
+
+    # Still on the met side: no trigger
+    assert push(rate) == []
+    # Back across the threshold arms the alert without firing it
+    assert push(rate * 0.98) == []
+    assert {a["id"] for a in fx_alerts.alerts("active")} >= {above["id"], below["id"]}
+    # The next crossing fires the "above" alert
+    assert [a["id"] for a in push(rate)] == [above["id"]]
+    # Crossing up arms "below"; crossing down fires it
+    assert push(rate * 1.02) == []
+    assert [a["id"] for a in push(rate)] == [below["id"]]
+
+
+def test_armed_alert_fires_on_first_crossing(fx):
+    fx_analytics, fx_alerts, push = fx
+    rate = fx_analytics.current_rate()
+    alert = fx_alerts.create("threshold", "above", rate * 1.01)
+    assert alert["armed"] is True
+    assert push(rate * 1.005) == []
+    fired = push(rate * 1.02)
+    assert [a["id"] for a in fired] == [alert["id"]]
+    assert fx_alerts.notifier().recent()[0]["alertId"] == alert["id"]
+    assert push(rate * 1.03) == []   # one-shot
+
+
+def test_arm_state_survives_restart(fx, fresh):
+    fx_analytics, fx_alerts, push = fx
+    rate = fx_analytics.current_rate()
+    alert = fx_alerts.create("threshold", "above", rate * 0.99)
+    push(rate * 0.98)   # arms it
+
+    fx_alerts = fresh("fx_alerts")
+    assert next(a for a in fx_alerts.alerts() if a["id"] == alert["id"])["armed"] is True
+    fx_analytics.add_rate((date.today() + timedelta(days=500)).isoformat(), rate)
+    assert [a["id"] for a in fx_alerts.evaluate()] == [alert["id"]]
@@ -0,0 +1,19 @@
+def test_analytics_cache_is_bounded_lru(fresh, monkeypatch):
+    fx_analytics = fresh("fx_analytics")
+    monkeypatch.setattr(fx_analytics, "MAX_CACHED_WINDOWS", 3)
+    first = fx_analytics.analytics(7)
+    for window in range(20, 120):
+        fx_analytics.analytics(window)
+        fx_analytics.analytics(7)   # keep the hot window cached
+    assert len(fx_analytics._cache) == 3
+    assert fx_analytics.analytics(7) is first
+    assert list(fx_analytics._cache)[-1] == 7
+
+
+def test_new_rate_point_invalidates_cache(fresh):
+    fx_analytics = fresh("fx_analytics")
+    before = fx_analytics.analytics(30)
+    fx_analytics.add_rate("2099-01-01", before["currentRate"] * 1.1)
+    after = fx_analytics.analytics(30)
+    assert after is not before
+    assert after["asOf"] == "2099-01-01"
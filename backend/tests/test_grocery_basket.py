@@ -0,0 +1,38 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def unstocked_bread(data_dir):
+    path = data_dir / "grocery_prices.json"
+    catalog = json.loads(path.read_text())
+    bread = next(i for i in catalog["items"] if i["id"] == "grc-002")
+    bread["stores"] = []
+    path.write_text(json.dumps(catalog))
+
+
+def test_unstocked_item_is_reported_and_rest_is_planned(unstocked_bread, fresh):
+    fresh("grocery_index")
+    grocery_basket = fresh("grocery_basket")
+    result = grocery_basket.plan([{"name": "milk", "qty": 2}, {"name": "white bread", "qty": 1}], max_stores=2)
+    assert result["unstocked"] == ["White Bread (800g)"]
+    assert result["singleStore"]["stores"] == ["Lidl"]
+    assert [line["id"] for line in result["singleStore"]["lines"]] == ["grc-001"]
+    assert result["split"] is not None
+
+
+def test_max_stores_is_clamped_to_store_count(fresh):
+    fresh("grocery_index")
+    grocery_basket = fresh("grocery_basket")
+    basket = [{"name": "milk"}, {"name": "bread"}, {"name": "eggs"}, {"name": "rice"}]
+    assert grocery_basket.plan(basket, max_stores=10**9) == grocery_basket.plan(basket, max_stores=3)
+
+
+def test_router_caps_max_stores(fresh):
+    from app.main import app
+    from app.services import grocery_basket
+
+    r = TestClient(app).post("/api/grocery/basket", json={"items": [{"name": "milk"}], "max_stores": grocery_basket.MAX_STORES + 1})
+    assert r.status_code == 422
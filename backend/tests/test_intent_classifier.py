@@ -0,0 +1,58 @@
+"""
+Held-out evaluation of the intent classifier.
+
+tests/data/intent_holdout.jsonl is written independently of the keyword
+weights and LABELED_EXAMPLES in app/services/intent_classifier.py (none of
+its messages appear there), so the accuracy reported here is not measured
+on the examples the weights were tuned against. Run with `-s` to see the
+report.
+"""
+
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.services import intent_classifier
+
+
+HOLDOUT_FILE = Path(__file__).parent / "data" / "intent_holdout.jsonl"
+MIN_ACCURACY = 0.85
+REPEAT = 200
+
+
+def _holdout() -> list[dict]:
+    with open(HOLDOUT_FILE, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_holdout_is_disjoint_from_tuning_examples():
+    tuned = {message.lower() for message, _ in intent_classifier.LABELED_EXAMPLES}
+    assert not tuned & {row["message"].lower() for row in _holdout()}
+
+
+def test_holdout_accuracy_and_latency():
+    rows = _holdout()
+    misses = [
+        (row["message"], row["intent"], got)
+        for row in rows
+        if (got := intent_classifier.classify(row["message"])["intent"]) != row["intent"]
+    ]
+    accuracy = 1 - len(misses) / len(rows)
+
+    samples = []
+    for _ in range(REPEAT):
+        for row in rows:
+            start = time.perf_counter()
+            intent_classifier.classify(row["message"])
+            samples.append(time.perf_counter() - start)
+    p50, p95 = np.percentile(np.array(samples) * 1e6, [50, 95])
+
+    print(f"\n[Intent] held-out accuracy {accuracy:.1%} over {len(rows)} examples, "
+          f"p50 {p50:.1f} µs / p95 {p95:.1f} µs per message")
+    for message, expected, got in misses:
+        print(f"  ✗ {message!r}: expected {expected}, got {got}")
+
+    assert accuracy >= MIN_ACCURACY
+    assert p95 < 1000
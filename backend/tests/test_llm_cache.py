@@ -0,0 +1,125 @@
+import time
+import types
+
+import pytest
+
+
+VERSIONS = {"day": "2026-10-19"}
+
+# Rewordings of one question: the semantic tier must serve the cached answer
+PARAPHRASES = [
+    ("what's my budget?", "whats my budget today"),
+    ("How much budget do I have left today?", "how much budget is left today"),
+    ("how much did I spend on coffee this week", "how much have I spent on coffee this week?"),
+    ("Am I on track with my budget?", "am i on track for my budget"),
+    ("What's the euro rate today", "what is the euro rate today?"),
+    ("what's my streak", "what is my current streak"),
+]
+
+# Different questions that share most of their words: must never hit
+NEAR_MISSES = [
+    ("how much did I spend on coffee", "how much did I spend on groceries"),
+    ("what's my budget", "what's my balance"),
+    ("how much do I owe Alex", "how much does Alex owe me"),
+    ("how much do I owe Alex", "how much does Alex owe"),
+    ("spending this week", "spending this month"),
+    ("what's my streak", "what's my longest streak"),
+    ("show my transactions today", "show my transactions yesterday"),
+    ("am I over budget", "am I under budget"),
+    ("best time to transfer", "worst time to transfer"),
+]
+
+
+class Calls:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, text: str = "answer"):
+        def call():
+            self.count += 1
+            return f"{text} {self.count}"
+        return call
+
+
+def _ask(llm_cache, call, question: str, semantic: bool = False) -> str:
+    messages = [{"role": "system", "content": "ctx"}, {"role": "user", "content": question}]
+    return llm_cache.cached_completion(call, "model", messages, {}, VERSIONS, question=question if semantic else None)
+
+
+@pytest.fixture
+def llm_cache(fresh, monkeypatch):
+    module = fresh("llm_cache")
+    monkeypatch.setattr(module, "ENABLED", True)
+    return module
+
+
+def test_exact_hit_and_ttl_expiry(llm_cache, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(llm_cache, "time", types.SimpleNamespace(time=lambda: clock[0], perf_counter=time.perf_counter))
+    monkeypatch.setattr(llm_cache, "TTL_SECONDS", 60)
+    calls = Calls()
+
+    assert _ask(llm_cache, calls(), "budget?") == "answer 1"
+    clock[0] += 59
+    assert _ask(llm_cache, calls(), "budget?") == "answer 1"
+    clock[0] += 2
+    assert _ask(llm_cache, calls(), "budget?") == "answer 2"
+    assert llm_cache.stats()["exactHits"] == 1
+
+
+def test_lru_eviction(llm_cache, monkeypatch):
+    monkeypatch.setattr(llm_cache, "CAPACITY", 2)
+    calls = Calls()
+    _ask(llm_cache, calls(), "a")
+    _ask(llm_cache, calls(), "b")
+    _ask(llm_cache, calls(), "a")          # a is now the most recently used
+    _ask(llm_cache, calls(), "c")          # evicts b
+    assert calls.count == 3
+    _ask(llm_cache, calls(), "a")
+    assert calls.count == 3
+    _ask(llm_cache, calls(), "b")
+    assert calls.count == 4
+
+
+def test_replay_after_reload(fresh, llm_cache):
+    calls = Calls()
+    first = _ask(llm_cache, calls(), "coins?")
+
+    llm_cache = fresh("llm_cache")
+    llm_cache.ENABLED = True
+    assert _ask(llm_cache, calls(), "coins?") == first
+    assert calls.count == 1
+
+
+def test_log_is_compacted_at_twice_capacity(fresh, llm_cache, data_dir, monkeypatch):
+    monkeypatch.setattr(llm_cache, "CAPACITY", 3)
+    calls = Calls()
+    log = data_dir / llm_cache.CACHE_FILE
+    for i in range(10):
+        _ask(llm_cache, calls(), f"question {i}")
+        assert len(log.read_text().splitlines()) < 2 * llm_cache.CAPACITY
+
+    llm_cache = fresh("llm_cache")
+    monkeypatch.setattr(llm_cache, "ENABLED", True)
+    monkeypatch.setattr(llm_cache, "CAPACITY", 3)
+    for i in range(7, 10):
+        _ask(llm_cache, calls(), f"question {i}")
+    assert calls.count == 10
+
+
+@pytest.mark.parametrize("cached, asked", PARAPHRASES)
+def test_semantic_hit_on_rewording(llm_cache, monkeypatch, cached, asked):
+    monkeypatch.setattr(llm_cache, "SEMANTIC", True)
+    calls = Calls()
+    answer = _ask(llm_cache, calls(), cached, semantic=True)
+    assert _ask(llm_cache, calls(), asked, semantic=True) == answer
+    assert llm_cache.stats()["semanticHits"] == 1
+
+
+@pytest.mark.parametrize("cached, asked", NEAR_MISSES)
+def test_semantic_miss_on_different_question(llm_cache, monkeypatch, cached, asked):
+    monkeypatch.setattr(llm_cache, "SEMANTIC", True)
+    calls = Calls()
+    _ask(llm_cache, calls(), cached, semantic=True)
+    _ask(llm_cache, calls(), asked, semantic=True)
+    assert calls.count == 2
@@ -0,0 +1,145 @@
+import importlib
+import json
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+
+from app.services import llm_client as llm_module
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+class StubServer(ThreadingHTTPServer):
+    """OpenAI-compatible chat endpoint that replays a plan of (status, delay) replies."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.plan: list[tuple[int, float]] = []
+        self.delay = 0.0
+        self.requests = 0
+        self.in_flight = 0
+        self.peak = 0
+        self.guard = threading.Lock()
+
+    def next_reply(self) -> tuple[int, float]:
+        with self.guard:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            return self.plan.pop(0) if self.plan else (200, self.delay)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        status, delay = self.server.next_reply()
+        try:
+            time.sleep(delay)
+            if status == 200:
+                body = {
+                    "id": "stub", "object": "chat.completion", "created": 0, "model": "stub",
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+                }
+            else:
+                body = {"error": {"message": f"stub {status}"}}
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except OSError:
+            pass  # The client gave up (timeout) and closed the connection
+        finally:
+            with self.server.guard:
+                self.server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def llm(stub, monkeypatch):
+    """A fresh llm_client (own loop, pool and semaphore) pointed at the stub."""
+    monkeypatch.setenv("AZURE_OPENAI_API_KEY", "test")
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", f"http://127.0.0.1:{stub.server_address[1]}")
+    module = importlib.reload(llm_module)
+    monkeypatch.setattr(module, "BACKOFF_BASE_SECONDS", 0.01)
+    yield module
+    monkeypatch.undo()
+    importlib.reload(llm_module)  # Don't leave a client bound to the stub behind
+
+
+def test_complete_returns_reply_text(llm, stub):
+    assert llm.complete(MESSAGES) == "ok"
+    assert stub.requests == 1
+
+
+def test_slow_reply_times_out_and_is_retried(llm, stub, monkeypatch):
+    monkeypatch.setattr(llm, "MAX_RETRIES", 1)
+    stub.delay = 1.0
+    started = time.perf_counter()
+    with pytest.raises((openai.APITimeoutError, TimeoutError)):
+        llm.complete(MESSAGES, timeout=0.2)
+    assert time.perf_counter() - started < 0.9
+    assert stub.requests == 2
+
+
+def test_server_errors_retry_with_capped_full_jitter(llm, stub, monkeypatch):
+    monkeypatch.setattr(llm, "MAX_RETRIES", 3)
+    monkeypatch.setattr(llm, "BACKOFF_CAP_SECONDS", 0.03)
+    ceilings = []
+
+    def uniform(low, high):
+        ceilings.append((low, high))
+        return high / 2
+
+    monkeypatch.setattr(llm, "random", types.SimpleNamespace(uniform=uniform))
+    stub.plan = [(500, 0.0), (429, 0.0), (503, 0.0)]
+    assert llm.complete(MESSAGES) == "ok"
+    assert stub.requests == 4
+    # Delay is drawn from [0, min(cap, base * 2^attempt)]
+    assert ceilings == [(0, 0.02), (0, 0.03), (0, 0.03)]
+
+
+def test_client_errors_are_not_retried(llm, stub):
+    stub.plan = [(400, 0.0)]
+    with pytest.raises(openai.BadRequestError):
+        llm.complete(MESSAGES)
+    assert stub.requests == 1
+
+
+def test_gives_up_after_max_retries(llm, stub, monkeypatch):
+    monkeypatch.setattr(llm, "MAX_RETRIES", 2)
+    stub.plan = [(500, 0.0)] * 5
+    with pytest.raises(openai.InternalServerError):
+        llm.complete(MESSAGES)
+    assert stub.requests == 3
+
+
+def test_semaphore_caps_concurrent_calls(llm, stub, monkeypatch):
+    # Read when the first client is created
+    monkeypatch.setattr(llm, "MAX_CONCURRENCY", 3)
+    stub.delay = 0.1
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        replies = list(pool.map(lambda _: llm.complete(MESSAGES), range(12)))
+    assert replies == ["ok"] * 12
+    assert stub.requests == 12
+    assert stub.peak == 3
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+
+def _post(post_id: str, intent: str, content: str) -> dict:
+    return {
+        "id": post_id,
+        "author": "Test User",
+        "avatar": "TU",
+        "content": content,
+        "tags": ["accommodation", "rathmines"],
+        "intent": intent,
+        "aiMatch": None,
+        "upvotes": 0,
+        "comments": [],
+        "createdAt": datetime.now().isoformat(),
+    }
+
+
+def _match_comments(post: dict) -> list[dict]:
+    return [c for c in post["comments"] if c.get("matchPostId")]
+
+
+def _seed(community_store, seekers: int) -> list[str]:
+    community_store.insert_post(_post("cp-offer", "OFFERING", "Room to rent in Rathmines for €600 a month"))
+    ids = [f"cp-seek-{i}" for i in range(seekers)]
+    for post_id in ids:
+        community_store.insert_post(_post(post_id, "SEEKING", "Looking for a room to rent in Rathmines around €600"))
+    return ids
+
+
+def test_matches_are_capped_per_post_and_deduped(fresh):
+    community_store, _, _, matchmaker = fresh("community_store", "community_feed", "search_index", "matchmaker")
+    seekers = _seed(community_store, 6)
+
+    matchmaker.process_batch(seekers)
+    first = _match_comments(community_store.get_post("cp-offer"))
+    assert len(first) == matchmaker.MAX_MATCHES_PER_POST
+
+    # Re-running the same posts (or a later batch) never re-comments or exceeds the cap
+    assert matchmaker.process_batch(seekers + seekers) == 0
+    assert _match_comments(community_store.get_post("cp-offer")) == first
+    assert len({c["matchPostId"] for c in first}) == len(first)
+
+
+def test_batch_cap(fresh, monkeypatch):
+    community_store, _, _, matchmaker = fresh("community_store", "community_feed", "search_index", "matchmaker")
+    monkeypatch.setattr(matchmaker, "MAX_COMMENTS_PER_BATCH", 2)
+    community_store.insert_post(_post("cp-seek", "SEEKING", "Looking for a room to rent in Rathmines around €600"))
+    offers = [f"cp-offer-{i}" for i in range(5)]
+    for post_id in offers:
+        community_store.insert_post(_post(post_id, "OFFERING", "Room to rent in Rathmines for €600 a month"))
+
+    # Five new offers all fit the one older seeker, but a batch only attaches two comments
+    assert matchmaker.process_batch(offers) == 2
@@ -0,0 +1,95 @@
+import json
+from datetime import date, timedelta
+
+
+def _tx(tx_id: str, days_ahead: int, amount: float, category: str) -> dict:
+    return {"id": tx_id, "date": (date.today() + timedelta(days=days_ahead)).isoformat(), "amount": -amount, "category": category}
+
+
+def _paid(coin_ledger) -> list[str]:
+    return sorted(e["ref"] for e in coin_ledger.entries_with_ref("mission"))
+
+
+def test_compiles_titles_into_rules():
+    from app.services.mission_engine import compile_rule
+
+    assert compile_rule("Spend under €8 today") == {"kind": "keep", "key": "total", "op": "<", "value": 8.0}
+    assert compile_rule("No coffee shop visits")["key"] == "count:coffee"
+    assert compile_rule("Walk instead of taking transport")["key"] == "count:transport"
+    assert compile_rule("Cook at least 1 meal") == {"kind": "achieve", "key": "count:groceries", "op": ">=", "value": 1}
+    assert compile_rule("Use student discount on a purchase") is None
+
+
+def test_idle_day_pays_no_keep_missions(data_dir, fresh):
+    (data_dir / "transactions.json").write_text("[]")
+    coin_ledger, mission_engine = fresh("coin_ledger", "mission_engine")
+    mission_engine.missions()
+
+    # Today had no activity: rolling over to tomorrow completes nothing
+    mission_engine.record(_tx("t1", 1, 3, "Other"))
+    assert _paid(coin_ledger) == []
+
+    # Tomorrow had one small transaction, so its keep missions pay when it closes
+    mission_engine.record(_tx("t2", 2, 3, "Other"))
+    day = (date.today() + timedelta(days=1)).isoformat()
+    assert _paid(coin_ledger) == [f"mission:{m}:{day}" for m in ("sm-001", "sm-003", "sm-005")]
+
+
+def test_reads_never_pay_and_writes_pay_once(data_dir, fresh):
+    (data_dir / "transactions.json").write_text(json.dumps([_tx("t0", 0, 4, "Groceries")]))
+    coin_ledger, mission_engine = fresh("coin_ledger", "mission_engine")
+    balance = coin_ledger.balance()
+
+    cook = next(m for m in mission_engine.missions() if m["id"] == "sm-002")
+    assert cook["status"] == "completed"
+    mission_engine.is_automatic("sm-002")
+    assert coin_ledger.balance() == balance
+
+    mission_engine.record(_tx("t1", 0, 1, "Other"))
+    mission_engine.record(_tx("t2", 0, 1, "Groceries"))
+    assert _paid(coin_ledger) == [f"mission:sm-002:{date.today().isoformat()}"]
+    assert coin_ledger.balance() == balance + 30
+
+    # A restart replays today's transactions but the ledger already shows the award
+    coin_ledger, mission_engine = fresh("coin_ledger", "mission_engine")
+    mission_engine.record(_tx("t3", 0, 1, "Groceries"))
+    assert coin_ledger.balance() == balance + 30
+
+
+def test_broken_keep_rule_does_not_pay(data_dir, fresh):
+    (data_dir / "transactions.json").write_text("[]")
+    coin_ledger, mission_engine = fresh("coin_ledger", "mission_engine")
+    mission_engine.record(_tx("t1", 1, 12, "Coffee"))
+    status = {m["id"]: m["status"] for m in mission_engine.missions()}
+    assert status["sm-001"] == "failed" and status["sm-003"] == "failed"
+    mission_engine.record(_tx("t2", 2, 1, "Other"))
+    day = (date.today() + timedelta(days=1)).isoformat()
+    assert _paid(coin_ledger) == [f"mission:sm-005:{day}"]
+
+
+def test_cold_start_pays_the_day_that_closed_while_down(data_dir, fresh):
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    (data_dir / "transactions.json").write_text(json.dumps([_tx("t0", -1, 3, "Other")]))
+    coin_ledger, mission_engine = fresh("coin_ledger", "mission_engine")
+
+    # A read closes yesterday and queues its keep missions, then the process restarts
+    assert {m["id"]: m["status"] for m in mission_engine.missions()}["sm-001"] == "on-track"
+    assert _paid(coin_ledger) == []
+    coin_ledger, mission_engine = fresh("coin_ledger", "mission_engine")
+
+    # The restarted engine replays yesterday, so the next write still pays it
+    mission_engine.record(_tx("t1", 0, 1, "Other"))
+    expected = [f"mission:{m}:{yesterday}" for m in ("sm-001", "sm-003", "sm-005")]
+    assert _paid(coin_ledger) == expected
+
+    # Replaying it again after another restart never pays twice
+    coin_ledger, mission_engine = fresh("coin_ledger", "mission_engine")
+    mission_engine.record(_tx("t2", 0, 1, "Other"))
+    assert _paid(coin_ledger) == expected
+
+
+def test_cold_start_ignores_days_past_the_catch_up_window(data_dir, fresh):
+    (data_dir / "transactions.json").write_text(json.dumps([_tx("t0", -30, 3, "Other")]))
+    coin_ledger, mission_engine = fresh("coin_ledger", "mission_engine")
+    mission_engine.record(_tx("t1", 0, 1, "Other"))
+    assert _paid(coin_ledger) == []
@@ -0,0 +1,44 @@
+from datetime import date
+
+
+def _receipt(day, items, merchant="Tesco Express"):
+    return {"merchant": merchant, "date": day, "total": 9.99, "items": items}
+
+
+def test_bad_rows_are_skipped_without_losing_the_batch(fresh, data_dir):
+    fresh("grocery_index")
+    price_history = fresh("price_history")
+    today = date.today().isoformat()
+    batch = [
+        _receipt("31/02/2026", [{"name": "WHL MLK 1L", "price": 1.2}]),
+        _receipt(today, [{"name": "WHL MLK 1L", "price": "abc"}, {"name": "WHT BRD 800G", "price": 1.4}]),
+        _receipt(today, [{"name": "WHL MLK 1L", "price": 1.3, "qty": "two"}, {"name": "WHL MLK 1L", "price": 2.6, "qty": 2}]),
+    ]
+    assert price_history.process_batch(batch) == 2
+    history = price_history.item_history("grc-001")["history"]
+    assert [p["price"] for p in history["Tesco"]] == [1.3]
+
+    # Reprocessing is a no-op: valid receipts were marked as seen
+    assert price_history.process_batch(batch) == 0
+
+    # The log replays cleanly after a restart
+    price_history = fresh("price_history")
+    assert price_history.item_history("grc-001")["history"] == history
+
+
+def test_receipt_that_raises_is_not_marked_seen(fresh, monkeypatch):
+    fresh("grocery_index")
+    price_history = fresh("price_history")
+    receipt = _receipt(date.today().isoformat(), [{"name": "WHL MLK 1L", "price": 1.2}])
+    good = _receipt(date.today().isoformat(), [{"name": "WHT BRD 800G", "price": 1.4}], merchant="Lidl")
+    real = price_history._observations
+
+    def flaky(r, stores):
+        if r is receipt:
+            raise RuntimeError("matcher unavailable")
+        return real(r, stores)
+
+    monkeypatch.setattr(price_history, "_observations", flaky)
+    assert price_history.process_batch([receipt, good]) == 1
+    monkeypatch.setattr(price_history, "_observations", real)
+    assert price_history.process_batch([receipt]) == 1
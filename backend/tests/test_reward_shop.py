@@ -0,0 +1,106 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _set_stock(data_dir, stock: dict) -> dict:
+    path = data_dir / "rewards_shop.json"
+    catalog = json.loads(path.read_text())
+    for reward in catalog:
+        if reward["id"] in stock:
+            reward["stock"] = stock[reward["id"]]
+    path.write_text(json.dumps(catalog))
+    return {r["id"]: r for r in catalog}
+
+
+def test_concurrent_purchases_never_oversell(fresh, data_dir):
+    catalog = _set_stock(data_dir, {"rw-002": 1, "rw-005": 0, "rw-010": 1})
+    coin_ledger, reward_shop = fresh("coin_ledger", "reward_shop")
+    start_balance = coin_ledger.balance()
+    barrier = threading.Barrier(32)
+    successes: list[str] = []
+    guard = threading.Lock()
+
+    def shopper(seed: int) -> None:
+        rng = random.Random(seed)
+        barrier.wait()
+        for _ in range(50):
+            reward_id = rng.choice(list(catalog))
+            try:
+                if rng.random() < 0.3:
+                    # Reserve-then-abandon path: the unit must come back
+                    reward_shop.release(reward_shop.reserve(reward_id)["id"])
+                    continue
+                reward_shop.purchase(reward_id)
+            except ValueError:
+                continue
+            with guard:
+                successes.append(reward_id)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(32) as pool:
+        list(pool.map(shopper, range(32)))
+    elapsed = time.perf_counter() - started
+    print(f"\n[Rewards] 1600 contended attempts in {elapsed * 1000:.0f} ms, {len(successes)} purchases")
+
+    # One purchase per reward, never past its stock
+    assert len(successes) == len(set(successes))
+    stock = {r["id"]: r["stock"] for r in reward_shop.rewards()}
+    for reward_id, reward in catalog.items():
+        if reward.get("stock") is not None:
+            assert stock[reward_id] >= 0
+            assert stock[reward_id] == reward["stock"] - successes.count(reward_id)
+    assert "rw-005" not in successes
+
+    # Coins moved exactly once per successful purchase
+    spent = sum(catalog[r]["cost"] for r in successes)
+    assert coin_ledger.balance() == start_balance - spent >= 0
+    purchases = [json.loads(line) for line in (data_dir / "reward_purchases.jsonl").read_text().splitlines()]
+    assert sorted(p["rewardId"] for p in purchases) == sorted(successes)
+
+
+def test_last_unit_goes_to_one_buyer(fresh, data_dir):
+    _set_stock(data_dir, {"rw-010": 1})
+    coin_ledger, reward_shop = fresh("coin_ledger", "reward_shop")
+    barrier = threading.Barrier(16)
+
+    def buy(_):
+        barrier.wait()
+        try:
+            reward_shop.purchase("rw-010")
+            return True
+        except ValueError:
+            return False
+
+    with ThreadPoolExecutor(16) as pool:
+        assert sum(pool.map(buy, range(16))) == 1
+    assert next(r for r in reward_shop.rewards() if r["id"] == "rw-010")["stock"] == 0
+
+
+def test_expired_reservation_returns_stock(fresh, data_dir):
+    _set_stock(data_dir, {"rw-002": 1})
+    coin_ledger, reward_shop = fresh("coin_ledger", "reward_shop")
+    reservation = reward_shop.reserve("rw-002", ttl=0.01)
+    assert next(r for r in reward_shop.rewards() if r["id"] == "rw-002")["stock"] == 0
+    time.sleep(0.02)
+    assert next(r for r in reward_shop.rewards() if r["id"] == "rw-002")["stock"] == 1
+    try:
+        reward_shop.commit(reservation["id"])
+        raise AssertionError("an expired reservation must not commit")
+    except ValueError:
+        pass
+
+
+def test_interrupted_purchase_is_rolled_forward(fresh, data_dir):
+    coin_ledger, reward_shop = fresh("coin_ledger", "reward_shop")
+    balance = coin_ledger.balance()
+    # Coins debited, but the process died before the purchase record was written
+    coin_ledger.spend(40, "reward", "Redeemed: test", ref="pur-deadbeef:rw-003")
+
+    coin_ledger, reward_shop = fresh("coin_ledger", "reward_shop")
+    reward = next(r for r in reward_shop.rewards() if r["id"] == "rw-003")
+    assert reward["purchased"] is True
+    assert reward["stock"] == 24
+    assert coin_ledger.balance() == balance - 40
@@ -0,0 +1,7 @@
+def test_text_change_reindexes(fresh):
+    community_store, search_index = fresh("community_store", "search_index")
+    post = community_store.all_posts()[0]
+    search_index.search("anything")
+    post["content"] = "zanzibar ukulele swap"
+    search_index.update_posts(post)
+    assert [r["item"]["id"] for r in search_index.search("ukulele")["results"]] == [post["id"]]
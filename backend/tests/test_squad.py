@@ -0,0 +1,54 @@
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(fresh):
+    fresh("squad_ledger", "activity_feed")
+    from app.main import app
+    return TestClient(app)
+
+
+def test_split_shares_match_ledger_when_ids_are_unknown(client):
+    from app.services import squad_ledger
+
+    before = {m["id"]: m["amount"] for m in squad_ledger.members()}
+    r = client.post("/api/squad/split", json={
+        "description": "Pizza", "total_amount": 30, "member_ids": ["sq-001", "sq-nope", "sq-002"],
+    })
+    assert r.status_code == 200
+    body = r.json()
+    assert body["totalPeople"] == 3
+    assert body["perPerson"] == 10.0
+    assert body["skippedMemberIds"] == ["sq-nope"]
+    assert "€10.00 each" in body["activity"]["text"]
+
+    event = squad_ledger.history()[-1]
+    assert event["shares"] == {"sq-001": 1000, "sq-002": 1000, "you": 1000}
+    assert squad_ledger.get_member("sq-001")["amount"] == before["sq-001"] + 10
+
+
+def test_split_rejects_unknown_payer(client):
+    r = client.post("/api/squad/split", json={"description": "x", "total_amount": 10, "member_ids": ["sq-001"], "paid_by": "ghost"})
+    assert r.status_code == 404
+    assert r.json()["success"] is False
+
+
+def test_split_rejects_when_no_valid_members(client):
+    from app.services import squad_ledger
+
+    events = len(squad_ledger.history())
+    r = client.post("/api/squad/split", json={"description": "x", "total_amount": 10, "member_ids": ["sq-nope", "you"]})
+    assert r.status_code == 422
+    assert len(squad_ledger.history()) == events
+
+
+def test_split_paid_by_member(client):
+    from app.services import squad_ledger
+
+    before = squad_ledger.get_member("sq-002")
+    signed = before["amount"] if before["direction"] == "owes-you" else -before["amount"]
+    r = client.post("/api/squad/split", json={"description": "Taxi", "total_amount": 20, "member_ids": ["sq-002"], "paid_by": "sq-002"})
+    assert "paid by Sarah L." in r.json()["activity"]["text"]
+    after = squad_ledger.get_member("sq-002")
+    assert (after["amount"] if after["direction"] == "owes-you" else -after["amount"]) == pytest.approx(signed - 10)
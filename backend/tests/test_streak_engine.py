@@ -0,0 +1,98 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+
+
+def _tx(tx_id: str, days_ago: int, amount: float = 10.0) -> dict:
+    return {"id": tx_id, "date": (date.today() - timedelta(days=days_ago)).isoformat(), "amount": -amount, "category": "Food"}
+
+
+@pytest.fixture
+def seed(data_dir):
+    """Write transactions (budget €35/day) and reset every milestone to unachieved."""
+
+    def write(transactions: list[dict]) -> None:
+        (data_dir / "transactions.json").write_text(json.dumps(transactions))
+        (data_dir / "budget.json").write_text(json.dumps({**json.loads((data_dir / "budget.json").read_text()), "dailyBudget": 35}))
+        streaks = json.loads((data_dir / "streaks.json").read_text())
+        for m in streaks["milestones"]:
+            m["achieved"] = False
+        streaks["longestStreak"] = 0
+        (data_dir / "streaks.json").write_text(json.dumps(streaks))
+
+    return write
+
+
+def _paid(coin_ledger) -> list[str]:
+    return [e["ref"] for e in coin_ledger.entries_with_ref("streak")]
+
+
+def test_idle_user_has_no_streak(seed, fresh):
+    seed([])
+    coin_ledger, streak_engine = fresh("coin_ledger", "streak_engine")
+    assert streak_engine.state()["currentStreak"] == 0
+    assert streak_engine.state()["todayUnderBudget"] is True
+
+
+def test_empty_day_ends_the_streak(seed, fresh):
+    # Active and under budget 5..3 days ago, nothing 2 days ago, active yesterday
+    seed([_tx("t5", 5), _tx("t4", 4), _tx("t3", 3), _tx("t1", 1)])
+    coin_ledger, streak_engine = fresh("coin_ledger", "streak_engine")
+    state = streak_engine.state()
+    assert state["currentStreak"] == 1
+    assert state["longestStreak"] == 3
+
+
+def test_streak_survives_until_today_is_active(seed, fresh):
+    seed([_tx("t2", 2), _tx("t1", 1)])
+    coin_ledger, streak_engine = fresh("coin_ledger", "streak_engine")
+    assert streak_engine.state()["currentStreak"] == 2
+    streak_engine.record(_tx("t0", 0))
+    assert streak_engine.state()["currentStreak"] == 3
+    streak_engine.record(_tx("t0b", 0, amount=40))   # today goes over budget
+    state = streak_engine.state()
+    assert state["currentStreak"] == 0
+    assert state["todayUnderBudget"] is False
+
+
+def test_reads_never_pay_coins(seed, fresh):
+    seed([_tx(f"t{i}", i) for i in range(1, 9)])
+    coin_ledger, streak_engine = fresh("coin_ledger", "streak_engine")
+    balance = coin_ledger.balance()
+    for _ in range(3):
+        state = streak_engine.state()
+    assert state["currentStreak"] == 8
+    assert coin_ledger.balance() == balance
+    assert _paid(coin_ledger) == []
+    # Reached milestones show as achieved, waiting for the next write to pay them
+    assert {m["days"] for m in state["milestones"] if m["achieved"]} == {3, 7}
+
+
+def test_milestones_are_paid_once_on_the_write_path(seed, fresh):
+    seed([_tx(f"t{i}", i) for i in range(1, 4)])
+    coin_ledger, streak_engine = fresh("coin_ledger", "streak_engine")
+    balance = coin_ledger.balance()
+
+    paid = streak_engine.record(_tx("t0", 0))
+    assert [m["days"] for m in paid] == [3]
+    assert coin_ledger.balance() == balance + streak_engine.MILESTONE_COINS[3]
+
+    # More writes, a backfill and a restart never pay it again
+    streak_engine.record(_tx("t0b", 0, amount=1))
+    assert streak_engine.backfill()["milestonesAwarded"] == []
+    coin_ledger, streak_engine = fresh("coin_ledger", "streak_engine")
+    streak_engine.record(_tx("t0c", 0, amount=1))
+    streak_engine.backfill()
+    assert _paid(coin_ledger) == ["milestone:3"]
+    assert coin_ledger.balance() == balance + streak_engine.MILESTONE_COINS[3]
+
+
+def test_back_dated_transaction_replays(seed, fresh, data_dir):
+    seed([_tx("t3", 3), _tx("t1", 1)])
+    coin_ledger, streak_engine = fresh("coin_ledger", "streak_engine")
+    assert streak_engine.state()["currentStreak"] == 1
+    # Like POST /transactions: saved to transactions.json first, then recorded
+    seed([_tx("t3", 3), _tx("t2", 2), _tx("t1", 1)])
+    streak_engine.record(_tx("t2", 2))    # fills the gap
+    assert streak_engine.state()["currentStreak"] == 3
@@ -0,0 +1,42 @@
+import threading
+
+from app.services.workers import BatchWorker, DaemonThread
+
+
+def test_batch_worker_collects_items_into_batches():
+    batches = []
+    worker = BatchWorker("test-batch", "Test", lambda batch: batches.append(batch) or len(batch), "{count} of {size}", 10, 0.2)
+    for i in range(25):
+        worker.submit(i)
+    worker.join()
+    assert [i for batch in batches for i in batch] == list(range(25))
+    assert all(len(batch) <= 10 for batch in batches)
+
+
+def test_batch_worker_survives_a_failing_batch(capsys):
+    seen = []
+
+    def process(batch):
+        if "bad" in batch:
+            raise ValueError("boom")
+        seen.extend(batch)
+        return len(batch)
+
+    worker = BatchWorker("test-batch-fail", "Test", process, "Did {count}", 1, 0.01)
+    worker.submit("bad")
+    worker.join()
+    worker.submit("good")
+    worker.join()
+    assert seen == ["good"]
+    out = capsys.readouterr().out
+    assert "[Test] Batch failed: boom" in out and "[Test] Did 1" in out
+
+
+def test_daemon_thread_restarts_after_exit():
+    runs = threading.Semaphore(0)
+    thread = DaemonThread("test-daemon", runs.release)
+    thread.ensure()
+    assert runs.acquire(timeout=1)
+    thread._thread.join()
+    thread.ensure()
+    assert runs.acquire(timeout=1)